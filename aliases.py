@@ -0,0 +1,168 @@
+# aliases.py
+"""
+One alias registry for device, location and action names, shared by every
+parser (process_commands, llm_interface, debug_parser, the CLI).
+
+Loaded from aliases.json - {kind: {canonical name: [aliases]}}:
+
+    {
+      "devices": {"smart_oven": ["oven"]},
+      "locations": {"living room": ["livingroom", "where the child is standing"]},
+      "actions": {"turn_on": ["turn on", "switch on"]},
+      "phrases": {"tv": ["smart tv", "television"], "": ["child is near"]}
+    }
+
+Devices, locations and actions are looked up as whole strings only ("_"
+counts as a space), so a name that is already canonical - "door lock",
+"start_recording" - is never rewritten piecewise. Phrases are rewritten
+inside a longer name: every alias is compiled into a single KeywordAutomaton
+and one left-to-right pass replaces the leftmost, longest phrase on word
+boundaries. The file is re-read when its mtime changes, so aliases can be
+edited while running.
+
+    normalize_device("Oven")                 # "smart_oven"
+    normalize_name("child is near the tv")   # "the tv"
+"""
+
+import json
+import os
+import time
+
+from keyword_automaton import KeywordAutomaton
+
+DEFAULT_ALIASES_PATH = "aliases.json"
+
+
+def _key(text):
+    return " ".join(text.lower().replace("_", " ").split())
+
+
+def _whole_words(text, start, end):
+    return (start == 0 or not text[start - 1].isalnum()) and (end == len(text) or not text[end].isalnum())
+
+
+class AliasRegistry:
+    def __init__(self, path=DEFAULT_ALIASES_PATH, check_interval=1.0):
+        """
+        path: aliases.json
+        check_interval: seconds between mtime checks (0 checks on every call)
+        """
+        self.path = path
+        self.check_interval = check_interval
+        self.version = 0
+        self._mtime = None
+        self._checked = 0.0
+        self._compile({})
+        self.maybe_reload(force=True)
+
+    def _compile(self, config):
+        # {alias: {kind: canonical}}; canonical names map to themselves so a
+        # shorter alias never rewrites part of one ("front door" stays whole)
+        self.lookup = {}
+        self.canonical = {}
+        for kind, names in config.items():
+            self.canonical[kind] = set(names)
+            for canonical, aliases in names.items():
+                for alias in [canonical, *aliases]:
+                    key = _key(alias)
+                    if key:
+                        self.lookup.setdefault(key, {}).setdefault(kind, canonical)
+        self.automaton = KeywordAutomaton(self.lookup)
+        self.version += 1
+
+    def maybe_reload(self, force=False):
+        """Re-read the file if its mtime changed; a broken file keeps the current aliases."""
+        now = time.monotonic()
+        if not force and now - self._checked < self.check_interval:
+            return False
+        self._checked = now
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError:
+            if self._mtime is None and force:
+                print(f"[INFO] No alias registry at {self.path}, names are only lowercased.")
+            return False
+        if mtime == self._mtime:
+            return False
+        self._mtime = mtime
+        try:
+            with open(self.path, "r") as f:
+                config = json.load(f)
+        except json.JSONDecodeError:
+            print(f"[WARNING] Could not parse {self.path}, keeping the previous aliases.")
+            return False
+        self._compile(config)
+        return True
+
+    def normalize(self, text, kind):
+        """Canonical name if the whole text is an alias of kind, else the text lowercased and stripped."""
+        if not text:
+            return ""
+        self.maybe_reload()
+        text = text.lower().strip()
+        return self.lookup.get(_key(text), {}).get(kind, text)
+
+    def rewrite(self, text, kind="phrases"):
+        """
+        Lowercased text with every alias of kind inside it replaced by its
+        canonical name (leftmost-longest, whole words), whitespace collapsed.
+        """
+        if not text:
+            return ""
+        self.maybe_reload()
+        text = text.lower().strip()
+        key = text.replace("_", " ")
+
+        # Longest alias starting at each position, then a left-to-right sweep
+        spans = {}
+        for end, alias in self.automaton.iter_matches(key):
+            start = end - len(alias)
+            if not _whole_words(key, start, end):
+                continue
+            canonical = self.lookup[alias].get(kind)
+            if canonical is not None and end > spans.get(start, (start, None))[0]:
+                spans[start] = (end, canonical)
+
+        parts, pos = [], 0
+        for start in sorted(spans):
+            if start < pos:
+                continue
+            end, canonical = spans[start]
+            parts.append(text[pos:start])
+            parts.append(canonical)
+            pos = end
+        parts.append(text[pos:])
+        return " ".join("".join(parts).split())
+
+    def names(self, kind):
+        """Canonical names of a kind."""
+        self.maybe_reload()
+        return self.canonical.get(kind, set())
+
+
+_default = None
+
+
+def get_aliases():
+    """The registry from DEFAULT_ALIASES_PATH, loaded once and hot-reloaded."""
+    global _default
+    if _default is None:
+        _default = AliasRegistry(os.path.join(os.path.dirname(os.path.abspath(__file__)), DEFAULT_ALIASES_PATH))
+    return _default
+
+
+def normalize_name(name):
+    """Device or location name for registry lookup (phrases rewritten in place)."""
+    return get_aliases().rewrite(name, "phrases")
+
+
+def normalize_device(name):
+    return get_aliases().normalize(name, "devices")
+
+
+def normalize_location(name):
+    return get_aliases().normalize(name, "locations")
+
+
+def normalize_action(name):
+    return get_aliases().normalize(name, "actions")
@@ -0,0 +1,114 @@
+# answer_cache.py
+"""
+Bounded LRU cache of post-processed RAG answers.
+
+Entries are keyed on (version, normalized preprocessed query). The version
+covers the index and the answerer (backend + model), so rebuilding the
+knowledge base or switching LLMs never serves old answers. Optionally
+persisted to a JSON file between runs; writes are debounced and flushed at exit.
+"""
+
+import atexit
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+
+def normalize_query(query: str) -> str:
+    """Case/whitespace/trailing-punctuation insensitive form of a query."""
+    text = re.sub(r"\s+", " ", (query or "").casefold()).strip()
+    return text.rstrip("?!. ")
+
+
+class AnswerCache:
+    def __init__(self, max_entries: int = 256, path: Optional[str] = None, save_interval: float = 30.0):
+        """
+        max_entries: LRU bound on the number of cached answers
+        path: optional JSON file the cache is loaded from and saved to
+        save_interval: minimum seconds between writes of the file (pending changes are flushed at exit)
+        """
+        self.max_entries = max_entries
+        self.path = path
+        self.save_interval = save_interval
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._last_save = time.monotonic()
+
+        if path and os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    for item in json.load(f):
+                        self.entries[(item["version"], item["query"])] = item["answer"]
+            except (json.JSONDecodeError, KeyError, TypeError):
+                print(f"[WARNING] Could not parse {path}, starting with empty answer cache.")
+                self.entries.clear()
+            # The file may come from a run with a larger bound; keep the newest entries
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        if path:
+            atexit.register(self.flush)
+
+    def get(self, version: str, query: str) -> Optional[str]:
+        key = (version, normalize_query(query))
+        with self._lock:
+            answer = self.entries.get(key)
+            if answer is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return answer
+
+    def put(self, version: str, query: str, answer: str):
+        key = (version, normalize_query(query))
+        with self._lock:
+            self.entries[key] = answer
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        self._changed()
+
+    def invalidate(self, keep_version: Optional[str] = None):
+        """Drop every entry not built against ``keep_version`` (all if None)."""
+        with self._lock:
+            for key in [k for k in self.entries if k[0] != keep_version]:
+                del self.entries[key]
+        self._changed()
+
+    def _changed(self):
+        if not self.path:
+            return
+        self._dirty = True
+        if time.monotonic() - self._last_save >= self.save_interval:
+            self.save()
+
+    def flush(self):
+        """Write pending changes now (registered to run at exit)."""
+        if self.path and self._dirty:
+            self.save()
+
+    def save(self):
+        with self._lock:
+            items = [{"version": v, "query": q, "answer": a} for (v, q), a in self.entries.items()]
+            self._dirty = False
+            self._last_save = time.monotonic()
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(items, f)
+        os.replace(tmp_path, self.path)
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
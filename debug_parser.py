@@ -3,35 +3,13 @@
 import json
 import re
 
+from aliases import normalize_device, normalize_location
+
 def normalize_command(cmd):
     if isinstance(cmd, dict):
-        device = cmd.get("device", "").lower().replace(" ", "_")
-        location = cmd.get("location", "").lower().replace(" ", "_")
-
-        # Normalize device
-        if device in ["all_lights", "lights", "lightbulbs", "lamps"]:
-            cmd["device"] = "light"
-        else:
-            cmd["device"] = device.replace("_", " ")
-
-        # Enhanced location normalization
-        location_mapping = {
-            "all_rooms": "all",
-            "entire_house": "all", 
-            "whole_home": "all",
-            "all": "all",
-            "unknown": "all",
-            "current": "living room",
-            "here": "living room",
-            "this_room": "living room",
-            "livingroom": "living room",
-            "kids_room": "kids room",
-            "front_door": "front door",
-            "": "all"
-        }
-
-        normalized_location = location_mapping.get(location, location.replace("_", " "))
-        cmd["location"] = normalized_location
+        # Device and location aliases (aliases.json, shared with llm_interface)
+        cmd["device"] = normalize_device(cmd.get("device", "")).replace("_", " ")
+        cmd["location"] = normalize_location(cmd.get("location", "")).replace("_", " ")
 
         if not cmd.get("location") or cmd["location"].strip() in ["", "unknown"]:
             cmd["location"] = "all"
@@ -0,0 +1,162 @@
+# device_catalog.py
+"""
+Device catalog: one source for every device's stable id (the device_states
+key), display name, type, location, capabilities, aliases and initial state.
+
+Loaded from devices.json:
+
+    {
+      "types": {"appliance": ["turn_on", "turn_off", "get_status"]},
+      "devices": {
+        "smart_oven": {"type": "appliance", "location": "kitchen",
+                       "aliases": ["oven"], "state": {"status": "off"}}
+      },
+      "registry": {"oven": {"id": "smart_oven", "type": "appliance", "location": "kitchen"}}
+    }
+
+"registry" is the curated list_devices() view: its names and locations are
+what the assistant shows, each tied to a catalog id.
+
+The catalog publishes immutable snapshots. Each one carries its lookup
+tables prebuilt (name/alias -> id, ids by location and type, the
+list_devices() view, scan rows for control_device), so the parser, the
+firewall, control_device and the fuzzy matcher all read the same indexes
+instead of rebuilding them per call. Editing devices.json publishes a new
+snapshot with a higher version; readers holding the old one are unaffected.
+
+    snapshot = get_catalog().snapshot()
+    snapshot.resolve("coffee maker")      # "coffee_machine"
+    snapshot.by_location["kitchen"]       # ("kitchen_light", "smart_oven", ...)
+"""
+
+import itertools
+import json
+import os
+import time
+from types import MappingProxyType
+
+DEFAULT_CATALOG_PATH = "devices.json"
+
+# Shared by every catalog, so a snapshot version never repeats within a process
+_versions = itertools.count(1)
+
+
+def _name_key(name):
+    return " ".join((name or "").lower().replace("_", " ").split())
+
+
+class CatalogSnapshot:
+    def __init__(self, config, version):
+        """
+        config: parsed devices.json
+        version: increases with every snapshot published
+        """
+        self.version = version
+        type_capabilities = config.get("types", {})
+        devices, by_name, by_location, by_type = {}, {}, {}, {}
+        for device_id, spec in config.get("devices", {}).items():
+            name = spec.get("name") or device_id.replace("_", " ")
+            names = [name, device_id, *spec.get("aliases", [])]
+            entry = {
+                "id": device_id,
+                "name": name,
+                "type": spec.get("type", ""),
+                "location": spec.get("location", ""),
+                "capabilities": tuple(spec.get("capabilities") or type_capabilities.get(spec.get("type"), ())),
+                "aliases": tuple(spec.get("aliases", [])),
+                "names": frozenset(_name_key(n) for n in names),
+                "state": MappingProxyType(dict(spec.get("state", {}))),
+            }
+            devices[device_id] = MappingProxyType(entry)
+            # First device to claim a name keeps it, like the home topology
+            for key in entry["names"]:
+                by_name.setdefault(key, device_id)
+            by_location.setdefault(entry["location"], []).append(device_id)
+            by_type.setdefault(entry["type"], []).append(device_id)
+
+        registry = {}
+        for name, listed in config.get("registry", {}).items():
+            if listed.get("id") not in devices:
+                print(f"[WARNING] Registry entry '{name}' has no catalog device, skipping it.")
+                continue
+            registry[name] = MappingProxyType(dict(listed))
+            by_name.setdefault(_name_key(name), listed["id"])
+
+        self.devices = MappingProxyType(devices)
+        self.by_name = MappingProxyType(by_name)
+        self.by_location = MappingProxyType({k: tuple(v) for k, v in by_location.items()})
+        self.by_type = MappingProxyType({k: tuple(v) for k, v in by_type.items()})
+        # list_devices(): {name: {"id", "type", "location"}}
+        self.registry = MappingProxyType(registry)
+        # control_device's substring scan: (id, lowercased id, location, names)
+        self.scan_rows = tuple((d, d.lower(), e["location"], e["names"]) for d, e in devices.items())
+
+    def resolve(self, name):
+        """Device id for an id, display name or alias; None if unknown."""
+        if name in self.devices:
+            return name
+        return self.by_name.get(_name_key(name))
+
+    def get(self, name):
+        """Catalog entry for an id, display name or alias; None if unknown."""
+        device_id = self.resolve(name)
+        return self.devices[device_id] if device_id is not None else None
+
+    def initial_states(self):
+        """Fresh, mutable {id: state} - the shape of smart_home_api.device_states."""
+        return {device_id: dict(entry["state"]) for device_id, entry in self.devices.items()}
+
+
+class DeviceCatalog:
+    def __init__(self, path=DEFAULT_CATALOG_PATH, check_interval=1.0):
+        """
+        path: devices.json
+        check_interval: seconds between mtime checks (0 checks on every call)
+        """
+        self.path = path
+        self.check_interval = check_interval
+        self._snapshot = CatalogSnapshot({}, 0)
+        self._mtime = None
+        self._checked = 0.0
+        self.maybe_reload(force=True)
+
+    def snapshot(self):
+        """The current snapshot (re-reading devices.json first if it changed)."""
+        self.maybe_reload()
+        return self._snapshot
+
+    def maybe_reload(self, force=False):
+        """Publish a new snapshot if the file's mtime changed; a broken file keeps the current one."""
+        now = time.monotonic()
+        if not force and now - self._checked < self.check_interval:
+            return False
+        self._checked = now
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError:
+            if self._mtime is None and force:
+                print(f"[INFO] No device catalog at {self.path}, no devices registered.")
+            return False
+        if mtime == self._mtime:
+            return False
+        self._mtime = mtime
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                config = json.load(f)
+        except json.JSONDecodeError:
+            print(f"[WARNING] Could not parse {self.path}, keeping catalog version {self._snapshot.version}.")
+            return False
+        # Built completely before it is published: readers never see a half-made snapshot
+        self._snapshot = CatalogSnapshot(config, next(_versions))
+        return True
+
+
+_default = None
+
+
+def get_catalog():
+    """The catalog from DEFAULT_CATALOG_PATH, loaded once and hot-reloaded."""
+    global _default
+    if _default is None:
+        _default = DeviceCatalog(os.path.join(os.path.dirname(os.path.abspath(__file__)), DEFAULT_CATALOG_PATH))
+    return _default
@@ -0,0 +1,90 @@
+# fuzzy_benchmark.py - FuzzyMatcher vs difflib on large device registries
+"""
+Builds a synthetic registry of "<kind> <kind> <n> (<room>)" names, queries it
+with misspelled names and bare "kind (room)" targets, and compares
+difflib.get_close_matches(n=1, cutoff=0.5) against FuzzyMatcher: build time,
+ms/query and whether every answer is identical.
+
+Usage:
+    python fuzzy_benchmark.py                    # 10k devices, 200 queries
+    python fuzzy_benchmark.py --devices 1000 10000 --queries 500
+"""
+
+import argparse
+import difflib
+import random
+import time
+
+from fuzzy_matcher import FuzzyMatcher
+
+KINDS = ["smart", "light", "lamp", "door", "fan", "heater", "camera", "sensor", "plug", "tv",
+         "speaker", "blind", "valve", "pump", "lock"]
+ROOMS = ["kitchen", "bedroom", "living room", "garage", "attic", "hall", "office", "bathroom", "patio", "den"]
+
+
+def synthetic_registry(n_devices, seed=0):
+    rng = random.Random(seed)
+    names = {}
+    while len(names) < n_devices:
+        name = f"{rng.choice(KINDS)} {rng.choice(KINDS)} {rng.randint(1, 99)} ({rng.choice(ROOMS)})"
+        names[name] = None
+    return list(names)
+
+
+def misspell(text, rng, edits=3):
+    chars = list(text)
+    for _ in range(rng.randint(0, edits)):
+        i = rng.randrange(len(chars))
+        op = rng.random()
+        if op < 0.33:
+            del chars[i]
+        elif op < 0.66:
+            chars.insert(i, rng.choice("abcdefghijklmnopqrstuvwxyz "))
+        else:
+            chars[i] = rng.choice("abcdefghijklmnopqrstuvwxyz")
+    return "".join(chars)
+
+
+def queries_for(names, n_queries, seed=1):
+    rng = random.Random(seed)
+    typos = [misspell(rng.choice(names), rng) for _ in range(n_queries * 2 // 3)]
+    bare = [f"{rng.choice(KINDS)} ({rng.choice(ROOMS)})" for _ in range(n_queries - len(typos))]
+    return typos + bare
+
+
+def bench(n_devices, n_queries):
+    names = synthetic_registry(n_devices)
+    queries = queries_for(names, n_queries)
+
+    t0 = time.perf_counter()
+    matcher = FuzzyMatcher(names)
+    build_s = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    expected = [difflib.get_close_matches(q, names, n=1, cutoff=0.5) for q in queries]
+    difflib_s = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    got = [matcher.close_matches(q, cutoff=0.5) for q in queries]
+    matcher_s = time.perf_counter() - t0
+
+    same = sum(a == b for a, b in zip(expected, got))
+    print(f"{n_devices:>7} devices | build {build_s * 1000:.0f} ms | "
+          f"difflib {difflib_s / n_queries * 1000:.2f} ms/q | matcher {matcher_s / n_queries * 1000:.2f} ms/q "
+          f"({difflib_s / matcher_s:.0f}x) | identical {same}/{n_queries}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--devices", type=int, nargs="+", default=[10_000])
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    print("🔎 Fuzzy device matching: FuzzyMatcher vs difflib.get_close_matches")
+    print("=" * 60)
+    for n_devices in args.devices:
+        bench(n_devices, args.queries)
+
+
+if __name__ == "__main__":
+    main()
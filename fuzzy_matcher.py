@@ -0,0 +1,117 @@
+# fuzzy_matcher.py
+"""
+Fuzzy device-name matching without scanning the whole registry.
+
+Same answer as ``difflib.get_close_matches(target, names, n=1, cutoff=0.5)``
+(best SequenceMatcher ratio, ties to the larger string), but built once per
+registry:
+
+- a character-trigram inverted index proposes the names sharing the most
+  trigrams with the target, which are verified first so a strong match is
+  known early;
+- per-name character counts give difflib's quick_ratio - an upper bound of
+  ratio - for every name in one vectorized step; names whose bound cannot
+  beat the best verified score are never compared.
+
+    matcher = FuzzyMatcher(list_devices())
+    matcher.best_match("kitchn light")   # "kitchen light"
+"""
+
+import difflib
+from collections import Counter
+
+import numpy as np
+
+
+def trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class FuzzyMatcher:
+    def __init__(self, names, seeds=8):
+        """
+        names: registry names (any iterable; dict keys work)
+        seeds: top trigram candidates verified before bound-based pruning
+        """
+        self.names = list(dict.fromkeys(names))
+        self.seeds = seeds
+        self.lengths = np.array([len(name) for name in self.names], dtype=np.int64)
+
+        self.index = {}
+        for i, name in enumerate(self.names):
+            for gram in trigrams(name):
+                self.index.setdefault(gram, []).append(i)
+        self.index = {gram: np.array(ids, dtype=np.int64) for gram, ids in self.index.items()}
+
+        alphabet = sorted({ch for name in self.names for ch in name})
+        self.columns = {ch: j for j, ch in enumerate(alphabet)}
+        self.counts = np.zeros((len(self.names), len(alphabet)), dtype=np.int32)
+        for i, name in enumerate(self.names):
+            for ch, n in Counter(name).items():
+                self.counts[i, self.columns[ch]] = n
+
+    def _upper_bounds(self, target):
+        """difflib quick_ratio(name, target) for every name, in float64 like difflib."""
+        shared = np.zeros(len(self.names), dtype=np.int64)
+        for ch, n in Counter(target).items():
+            j = self.columns.get(ch)
+            if j is not None:
+                shared += np.minimum(self.counts[:, j], n)
+        total = self.lengths + len(target)
+        return np.where(total > 0, 2.0 * shared / np.maximum(total, 1), 1.0)
+
+    def best_match(self, target, cutoff=0.5):
+        """Best name with SequenceMatcher ratio >= cutoff, or None."""
+        if not self.names:
+            return None
+        matcher = difflib.SequenceMatcher()
+        matcher.set_seq2(target)
+        best_score, best_name = -1.0, None
+
+        def verify(i):
+            nonlocal best_score, best_name
+            name = self.names[i]
+            matcher.set_seq1(name)
+            score = matcher.ratio()
+            if score >= cutoff and (score, name) > (best_score, best_name or ""):
+                best_score, best_name = score, name
+
+        # Trigram seeds: names sharing the most trigrams usually include the winner
+        hits = [self.index[gram] for gram in trigrams(target) if gram in self.index]
+        seeded = set()
+        if hits:
+            votes = np.bincount(np.concatenate(hits), minlength=len(self.names))
+            for i in np.argsort(-votes, kind="stable")[:self.seeds]:
+                if votes[i]:
+                    seeded.add(int(i))
+                    verify(int(i))
+
+        # Everyone else only if their upper bound can still reach (or tie) the best score
+        bounds = self._upper_bounds(target)
+        floor = max(cutoff, best_score)
+        for i in np.argsort(-bounds, kind="stable"):
+            if bounds[i] < floor:
+                break
+            if int(i) not in seeded:
+                verify(int(i))
+                floor = max(cutoff, best_score)
+        return best_name
+
+    def close_matches(self, target, cutoff=0.5):
+        """get_close_matches-shaped result: [best] or []."""
+        best = self.best_match(target, cutoff)
+        return [best] if best is not None else []
+
+
+_matchers = {}
+
+
+def matcher_for(registry):
+    """FuzzyMatcher for a registry object, built on first use and reused while it is unchanged."""
+    key = (id(registry), len(registry))
+    cached = _matchers.get(key)
+    if cached is None or cached[0] is not registry:
+        _matchers.clear()
+        cached = _matchers[key] = (registry, FuzzyMatcher(registry))
+    return cached[1]
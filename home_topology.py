@@ -0,0 +1,104 @@
+# home_topology.py
+"""
+Home topology: which room each camera and scene object belongs to, and which
+registry devices (device_states keys) are in each room.
+
+Loaded from home_topology.json:
+
+    {
+      "cameras": {"default": {"room": "living room"}},
+      "objects": {"tv": "living room", "oven": "kitchen"},
+      "rooms": {"kitchen": {"smart_oven": ["oven"], "kitchen_light": ["light", "lamp"]}}
+    }
+
+Zone rooms come with the relations themselves (camera_zones.json). Every
+lookup is a dict access, so "turn on the light where the child is standing"
+resolves to the room the person is in and then straight to an exact device
+key - no fuzzy matching.
+"""
+
+import json
+import os
+
+DEFAULT_TOPOLOGY_PATH = "home_topology.json"
+
+
+def _name_key(name):
+    return " ".join((name or "").lower().replace("_", " ").split())
+
+
+class HomeTopology:
+    def __init__(self, cameras=None, objects=None, rooms=None):
+        """
+        cameras: {camera_id: {"room": room}}
+        objects: {relation object: room}, in priority order (first match wins)
+        rooms: {room: {device key: [aliases]}}
+        """
+        self.camera_rooms = {cam: cfg["room"] for cam, cfg in (cameras or {}).items() if cfg.get("room")}
+        self.object_rooms = dict(objects or {})
+        self.room_devices = {}
+        self.device_rooms = {}
+        for room, devices in (rooms or {}).items():
+            lookup = self.room_devices.setdefault(room, {})
+            for key, aliases in devices.items():
+                self.device_rooms[key] = room
+                for name in [key, *aliases]:
+                    lookup.setdefault(_name_key(name), key)
+
+    def person_room(self, image_context):
+        """
+        Room a person is in: a zone relation's room, else the room of the
+        first object (in topology order) a person is near, else - if a person
+        is in frame at all - the camera's room.
+        """
+        if not image_context:
+            return None
+        near = set()
+        for rel in image_context.get("relations", []):
+            if rel.get("subject") != "person":
+                continue
+            if rel.get("room"):
+                return rel["room"]
+            near.add(rel.get("object"))
+        for obj, room in self.object_rooms.items():
+            if obj in near:
+                return room
+        if any(d.get("label") == "person" for d in image_context.get("detections", [])):
+            return self.camera_rooms.get(image_context.get("camera"))
+        return None
+
+    def resolve_device(self, room, device):
+        """Exact device_states key for a device name/alias in a room, or None."""
+        lookup = self.room_devices.get(room)
+        if lookup is None:
+            return None
+        name = _name_key(device)
+        key = lookup.get(name)
+        if key is None and name.startswith("smart "):
+            key = lookup.get(name[len("smart "):])
+        return key
+
+
+def load_topology(path=DEFAULT_TOPOLOGY_PATH):
+    """HomeTopology from a JSON file; an empty topology if there is none."""
+    if not path or not os.path.exists(path):
+        print(f"[INFO] No home topology at {path}, room resolution disabled.")
+        return HomeTopology()
+    try:
+        with open(path, "r") as f:
+            config = json.load(f)
+    except json.JSONDecodeError:
+        print(f"[WARNING] Could not parse {path}, room resolution disabled.")
+        return HomeTopology()
+    return HomeTopology(config.get("cameras"), config.get("objects"), config.get("rooms"))
+
+
+_default = None
+
+
+def get_topology():
+    """The topology from DEFAULT_TOPOLOGY_PATH, loaded once."""
+    global _default
+    if _default is None:
+        _default = load_topology(os.path.join(os.path.dirname(os.path.abspath(__file__)), DEFAULT_TOPOLOGY_PATH))
+    return _default
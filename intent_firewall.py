@@ -2,6 +2,7 @@
 import datetime
 import pytz
 import re
+from device_catalog import get_catalog
 from smart_home_api import control_device
 
 LOCAL_TZ = pytz.timezone("Asia/Kolkata")
@@ -30,6 +31,11 @@ def intent_firewall(command, system_state=None, raw_text=""):
     action = command.get("action", "").lower()
     text_check = raw_text.lower()
 
+    # Catalog entry (by id, name or alias): rules see the device's type and every name it goes by
+    entry = get_catalog().snapshot().get(device)
+    device_type = entry["type"] if entry else ""
+    names = entry["names"] | {device} if entry else {device}
+
     # ====== ALWAYS SAFE INTENTS ======
     if action in ["status", "get_status", "list_devices"]:
         return (True, "", False)
@@ -39,7 +45,7 @@ def intent_firewall(command, system_state=None, raw_text=""):
         action = "status"
 
     # ====== LIGHTING SAFETY RULES ======
-    if "light" in device or device in ["lamp", "chandelier", "led strip", "bulb"]:
+    if "light" in device or device_type == "lighting" or not names.isdisjoint(["lamp", "chandelier", "led strip", "bulb"]):
         if action == "turn_off":
             if "all" in location or "all lights" in text_check:
                 if now.hour >= 22 or now.hour < 6:
@@ -66,7 +72,7 @@ def intent_firewall(command, system_state=None, raw_text=""):
                 ), True)
 
     # ====== DOOR & SECURITY ======
-    if device in ["door", "lock", "smart lock"]:
+    if device_type == "door" or not names.isdisjoint(["door", "lock", "smart lock"]):
         if action in ["unlock", "open"]:
             if "all doors" in text_check:
                 return (False, format_blocked_response(
@@ -85,13 +91,13 @@ def intent_firewall(command, system_state=None, raw_text=""):
 
     # ====== KITCHEN APPLIANCES ======
     kitchen = ["oven", "stove", "microwave", "pressure cooker", "blender", "food processor"]
-    if device in kitchen and action in ["turn_on", "start", "preheat"]:
+    if not names.isdisjoint(kitchen) and action in ["turn_on", "start", "preheat"]:
         if now.hour >= 23 or now.hour < 6:
             return (False, format_confirmation_response(
                 f"Using {device} at night may be unsafe."
             ), True)
 
-        if device == "oven":
+        if "oven" in names:
             temps = re.findall(r"\b(\d{3})\b", text_check)
             if temps and int(temps[0]) > 250:
                 return (False, format_confirmation_response(
@@ -100,17 +106,17 @@ def intent_firewall(command, system_state=None, raw_text=""):
 
     # ====== CLIMATE CONTROL ======
     climate = ["thermostat", "air conditioning", "heater", "humidifier", "dehumidifier"]
-    if device in climate:
+    if not names.isdisjoint(climate):
         temps = re.findall(r"\b(\d{1,2})\b", text_check)
         if temps:
             t = int(temps[0])
-            if device in ["thermostat", "air conditioning", "heater"]:
+            if not names.isdisjoint(["thermostat", "air conditioning", "heater"]):
                 if t < 10 or t > 32:
                     return (False, format_blocked_response(
                         "Temperature must stay between 10–32°C.",
                         "Choose a safer range."
                     ), False)
-            if device == "humidifier":
+            if "humidifier" in names:
                 hum = re.findall(r"\b(\d{2,3})%?\b", text_check)
                 if hum and int(hum[0]) > 80:
                     return (False, format_confirmation_response(
@@ -118,7 +124,7 @@ def intent_firewall(command, system_state=None, raw_text=""):
                     ), True)
 
     # ====== BATHROOM APPLIANCES ======
-    if device == "water heater" and action in ["turn_on", "set_temperature"]:
+    if "water heater" in names and action in ["turn_on", "set_temperature"]:
         temps = re.findall(r"\b(\d{1,3})\b", text_check)
         if temps and int(temps[0]) > 60:
             return (False, format_blocked_response(
@@ -127,7 +133,7 @@ def intent_firewall(command, system_state=None, raw_text=""):
             ), False)
 
     # ====== SECURITY CAMERAS ======
-    if device in ["security camera", "camera"] and action in ["turn_off", "disable"]:
+    if (device_type == "security" and "camera" in device or not names.isdisjoint(["security camera", "camera"])) and action in ["turn_off", "disable"]:
         if now.hour >= 22 or now.hour < 8:
             return (False, format_blocked_response(
                 "Disabling cameras at night compromises security.",
@@ -136,12 +142,12 @@ def intent_firewall(command, system_state=None, raw_text=""):
 
     # ====== OUTDOOR ======
     outdoor = ["pool pump", "pool heater", "hot tub", "sprinkler system", "outdoor grill"]
-    if device in outdoor and action == "turn_on":
-        if device in ["pool pump", "hot tub"] and (now.hour >= 22 or now.hour < 7):
+    if not names.isdisjoint(outdoor) and action == "turn_on":
+        if not names.isdisjoint(["pool pump", "hot tub"]) and (now.hour >= 22 or now.hour < 7):
             return (False, format_confirmation_response(
                 f"Operating {device} at night may disturb neighbors."
             ), True)
-        if device == "hot tub":
+        if "hot tub" in names:
             temps = re.findall(r"\b(\d{2})\b", text_check)
             if temps and int(temps[0]) > 40:
                 return (False, format_blocked_response(
@@ -150,14 +156,14 @@ def intent_firewall(command, system_state=None, raw_text=""):
                 ), False)
 
     # ====== ROBOTS / LAUNDRY ======
-    if device in ["robot vacuum", "robot lawn mower", "washing machine", "dryer"] and action in ["start", "turn_on"]:
+    if not names.isdisjoint(["robot vacuum", "robot lawn mower", "washing machine", "dryer"]) and action in ["start", "turn_on"]:
         if now.hour >= 22 or now.hour < 7:
             return (False, format_confirmation_response(
                 f"Running {device} during quiet hours may disturb others."
             ), True)
 
     # ====== MEDICINE CABINET ======
-    if device == "medicine cabinet" and action == "open":
+    if "medicine cabinet" in names and action == "open":
         if system_state and system_state.get("child_lock_enabled"):
             return (False, format_confirmation_response(
                 "Medicine cabinet is locked. Adult supervision required."
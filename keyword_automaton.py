@@ -0,0 +1,70 @@
+# keyword_automaton.py
+"""
+Aho-Corasick keyword automaton.
+
+Compiles a fixed set of keywords once - trie, failure links, then a full
+transition table (one dict lookup per character at scan time) - and finds
+every occurrence of every keyword in a text in a single left-to-right pass,
+instead of one substring scan per keyword. Matches are plain substrings (the
+same semantics as ``keyword in text``), overlapping matches included.
+
+    automaton = KeywordAutomaton(["turn on", "on", "tv"])
+    automaton.find("turn on the tv")   # {"turn on", "on", "tv"}
+"""
+
+from collections import deque
+
+
+class KeywordAutomaton:
+    def __init__(self, keywords):
+        self.keywords = list(dict.fromkeys(k for k in keywords if k))
+        # Trie transitions and the keywords ending at each state
+        goto = [{}]
+        out = [()]
+        for keyword in self.keywords:
+            state = 0
+            for ch in keyword:
+                nxt = goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto.append({})
+                    out.append(())
+                    goto[state][ch] = nxt
+                state = nxt
+            out[state] += (keyword,)
+
+        # Breadth-first over the trie: a state's failure target is shallower, so
+        # its transitions are complete by the time they are inherited
+        self._delta = [dict(goto[0])] + [None] * (len(goto) - 1)
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            delta = dict(self._delta[fail[state]])
+            delta.update(goto[state])
+            self._delta[state] = delta
+            for ch, nxt in goto[state].items():
+                fail[nxt] = self._delta[fail[state]].get(ch, 0)
+                out[nxt] += out[fail[nxt]]
+                queue.append(nxt)
+        self._out = out
+
+    def iter_matches(self, text):
+        """(end index, keyword) for every occurrence, in order of end position."""
+        delta, out = self._delta, self._out
+        state = 0
+        for i, ch in enumerate(text):
+            state = delta[state].get(ch, 0)
+            for keyword in out[state]:
+                yield i + 1, keyword
+
+    def find(self, text):
+        """Set of keywords occurring anywhere in text."""
+        delta, out = self._delta, self._out
+        found = set()
+        state = 0
+        for ch in text:
+            state = delta[state].get(ch, 0)
+            if out[state]:
+                found.update(out[state])
+        return found
@@ -0,0 +1,106 @@
+# lazy_loader.py
+"""
+Lazily constructed, background-warmed components.
+
+Heavy components (RAGEngine pulls in langchain, VisionModule pulls in
+ultralytics/torch) are wrapped in a LazyComponent proxy. ``start()`` begins
+importing and constructing the component on a daemon thread at launch, and the
+first attribute access only blocks if that warmup has not finished yet.
+"""
+
+import importlib
+import threading
+import time
+
+
+class LazyComponent:
+    """
+    Proxy for ``getattr(import_module(module), attr)(*args, **kwargs)``.
+
+    Attribute access is forwarded to the real object once it is built.
+    If construction fails, the error is re-raised on every access so callers
+    handle it exactly where they would have used the component.
+    """
+
+    def __init__(self, name, module, attr, *args, **kwargs):
+        self.name = name
+        self._module = module
+        self._attr = attr
+        self._args = args
+        self._kwargs = kwargs
+
+        self._instance = None
+        self._error = None
+        self._thread = None
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+
+        self.import_time = None
+        self.init_time = None
+        self.wait_time = 0.0
+
+    def start(self):
+        """Begin warming on a background thread (idempotent). Returns self."""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._warm, name=f"warmup-{self.name}", daemon=True
+                )
+                self._thread.start()
+        return self
+
+    def _warm(self):
+        try:
+            t0 = time.perf_counter()
+            factory = getattr(importlib.import_module(self._module), self._attr)
+            t1 = time.perf_counter()
+            self.import_time = t1 - t0
+
+            self._instance = factory(*self._args, **self._kwargs)
+            self.init_time = time.perf_counter() - t1
+            print(f"[Startup] {self.name} ready "
+                  f"(import {self.import_time:.2f}s, init {self.init_time:.2f}s)")
+        except Exception as e:
+            self._error = e
+            print(f"[Startup] {self.name} failed to initialize: {e}")
+        finally:
+            self._done.set()
+
+    @property
+    def ready(self):
+        return self._done.is_set() and self._error is None
+
+    def get(self):
+        """Return the real object, blocking only if warmup is still running."""
+        if not self._done.is_set():
+            self.start()
+            t0 = time.perf_counter()
+            self._done.wait()
+            self.wait_time += time.perf_counter() - t0
+        if self._error is not None:
+            raise self._error
+        return self._instance
+
+    def __getattr__(self, item):
+        # Only called for attributes not found on the proxy itself.
+        if item.startswith("_"):
+            raise AttributeError(item)
+        return getattr(self.get(), item)
+
+
+def startup_report(components):
+    """
+    Human-readable import/init timings for each component.
+    Components still warming are reported as such rather than waited on.
+    """
+    lines = ["⏱️ Startup report:"]
+    for comp in components:
+        if not comp._done.is_set():
+            status = "warming..."
+        elif comp._error is not None:
+            status = f"failed ({comp._error})"
+        else:
+            status = (f"import {comp.import_time:.2f}s, init {comp.init_time:.2f}s, "
+                      f"first-use wait {comp.wait_time:.2f}s")
+        lines.append(f"- {comp.name}: {status}")
+    return "\n".join(lines)
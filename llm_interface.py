@@ -5,6 +5,7 @@ import json
 import re
 import sys
 import os
+from aliases import get_aliases, normalize_action, normalize_device, normalize_location
 from smart_home_api import control_device
 
 # -------------------
@@ -13,27 +14,14 @@ from smart_home_api import control_device
 def normalize_command(cmd):
     """Normalize command dictionary"""
     if isinstance(cmd, dict):
-        device = cmd.get("device", "").lower().strip()
-        location = cmd.get("location", "").lower().strip()
-        action = cmd.get("action", "").lower().strip()
-
-        # Normalize device names
-        device_mapping = {
-            "lights": "light", "lamp": "light", "bulb": "light",
-            "thermostat": "thermostat", "temp": "thermostat",
-            "door": "door", "lock": "door",
-            "humidifier": "humidifier", "heater": "heater",
-            "oven": "smart_oven", "microwave": "microwave"
-        }
-        device = device_mapping.get(device, device)
+        # Aliases from aliases.json (shared with the other parsers)
+        device = normalize_device(cmd.get("device", ""))
+        location = normalize_location(cmd.get("location", ""))
+        action = normalize_action(cmd.get("action", ""))
 
         # Normalize locations - map unknown/empty to "all"
-        location_mapping = {
-            "all": "all", "everywhere": "all", "": "all", "unknown": "all",
-            "bedroom": "bedroom", "kitchen": "kitchen",
-            "living room": "living room", "bathroom": "bathroom"
-        }
-        location = location_mapping.get(location, "all")
+        if not location or location not in get_aliases().names("locations"):
+            location = "all"
 
         return {
             "device": device,
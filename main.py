@@ -1,7 +1,7 @@
 # main.py
 
 from llm_interface import query_llm
-from rag_engine import RAGEngine
+from lazy_loader import LazyComponent, startup_report
 from intent_firewall import intent_firewall
 from state_manager import StateManager
 from smart_home_api import control_device
@@ -9,7 +9,8 @@ from smart_home_api import control_device
 
 class SmartHomeAssistantXAI:
     def __init__(self):
-        self.rag = RAGEngine()
+        # Built in the background so device commands don't wait on langchain
+        self.rag = LazyComponent("RAGEngine", "rag_engine", "RAGEngine").start()
         self.state_manager = StateManager()
 
     def generate_rich_explanation(self, device, action, result):
@@ -34,6 +35,10 @@ class SmartHomeAssistantXAI:
                 print("👋 Goodbye!")
                 break
 
+            if user_input.lower() == "startup report":
+                print(startup_report([self.rag]))
+                continue
+
             print("[AI] Processing your request...")
 
             llm_result = query_llm(user_input)
@@ -70,8 +75,14 @@ class SmartHomeAssistantXAI:
 
                 else:
                     print("[LLM] No command recognized, using knowledge base...")
-                    rag_answer = self.rag.query(user_input)
-                    print(f"[AI] RAG Response:\n💡 {rag_answer}")
+                    print("[AI] RAG Response:\n💡 ", end="", flush=True)
+                    try:
+                        for piece in self.rag.query_stream(user_input):
+                            print(piece, end="", flush=True)
+                        print()
+                    except Exception as e:
+                        # Warmup failures (e.g. Ollama down) surface here, not at startup
+                        print(f"\n[RAG] Knowledge base unavailable ({e})")
 
 
 if __name__ == "__main__":
@@ -1,33 +1,16 @@
-import difflib
 import sys
 import os
 
 # Add current directory to path for imports
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
-from smart_home_api import control_device, list_devices
+from aliases import normalize_name
+from fuzzy_matcher import matcher_for
+from smart_home_api import control_device, current_catalog, device_states, list_devices
 
 # ----------------------------
 # Helper Functions
 # ----------------------------
 
-def normalize_name(name: str) -> str:
-    """Normalize device/location names for consistent lookup."""
-    if not name:
-        return ""
-    name = name.lower().strip()
-    replacements = {
-        "smart tv": "tv",
-        "television": "tv",
-        "where the child is standing": "living room",
-        "child standing": "living room",
-        "child is near": "",
-    }
-    for k, v in replacements.items():
-        if k in name:
-            name = name.replace(k, v)
-    return name.strip()
-
-
 def is_query(text: str) -> bool:
     """Detect if input is a query rather than a control command."""
     triggers = ["why", "how", "what", "explain", "reason"]
@@ -47,9 +30,21 @@ def process_commands(commands, original_text):
     }
 
     for cmd in commands:
+        action = cmd.get("action", "")
+
+        # Resolved through the home topology (map_child_location): exact key, no fuzzy search
+        device_key = cmd.get("device_key")
+        if device_key in device_states:
+            location = cmd.get("location", "")
+            responses.append(f"✅ Action executed: {device_key.replace('_', ' ')} ({location}) - {action}")
+            try:
+                control_device(device_key, location, action, context)
+            except TypeError:
+                control_device(device_key, location, action)
+            continue
+
         device = normalize_name(cmd.get("device", ""))
         location = normalize_name(cmd.get("location", ""))
-        action = cmd.get("action", "")
 
         target = f"{device} ({location})".strip()
 
@@ -60,20 +55,17 @@ def process_commands(commands, original_text):
             except TypeError:
                 control_device(device, location, action)
         else:
-            # Try fuzzy match
-            possible = difflib.get_close_matches(target, device_registry, n=1, cutoff=0.5)
-            if possible:
-                match = possible[0]
+            # Try fuzzy match (same best match as difflib.get_close_matches, n=1, cutoff=0.5)
+            match = matcher_for(device_registry).best_match(target, cutoff=0.5)
+            if match:
                 responses.append(f"✅ Action executed through VisionAI: {match} - {action}")
-                if " (" in match and match.endswith(")"):
-                    d, loc = match.split(" (", 1)
-                    loc = loc.rstrip(")")
-                else:
-                    d, loc = match, ""
+                # Registry entries carry the catalog id; control it in the room the catalog places it
+                device_id = device_registry[match]["id"]
+                room = current_catalog().devices[device_id]["location"]
                 try:
-                    control_device(d.strip(), loc.strip(), action, context)
+                    control_device(device_id, room, action, context)
                 except TypeError:
-                    control_device(d.strip(), loc.strip(), action)
+                    control_device(device_id, room, action)
             else:
                 responses.append(f"❌ No such device found: {target}")
 
@@ -0,0 +1,124 @@
+# rag_backends.py
+"""
+Pluggable embedding and answer backends for RAGEngine.
+
+- "ollama":     OllamaEmbeddings / OllamaLLM (needs a running Ollama server)
+- "hashing":    HashingEmbeddings, a deterministic local hashing vectorizer
+- "extractive": ExtractiveAnswerer, answers with the best sentences of the top chunk
+
+The offline backends let RAGEngine be built, tested and benchmarked on a box
+without Ollama (see rag_benchmark.py).
+"""
+
+import math
+import re
+import zlib
+from typing import Iterator, List
+
+from langchain.chains.retrieval_qa.prompt import PROMPT as QA_PROMPT
+from langchain_core.embeddings import Embeddings
+
+from rag_lexical import tokenize
+
+SENTENCE_RE = re.compile(r"[^.!?\n]+[.!?]?")
+
+
+class HashingEmbeddings(Embeddings):
+    """
+    Signed feature hashing over word unigrams and bigrams, L2-normalized.
+    Deterministic across runs and machines (crc32), no model download.
+    """
+
+    def __init__(self, n_features: int = 1024):
+        self.n_features = n_features
+        self.model = f"hashing-{n_features}"
+
+    def _embed(self, text: str) -> List[float]:
+        vector = [0.0] * self.n_features
+        tokens = tokenize(text)
+        features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+        for feature in features:
+            h = zlib.crc32(feature.encode("utf-8"))
+            vector[h % self.n_features] += 1.0 if (h >> 31) & 1 else -1.0
+        norm = math.sqrt(sum(v * v for v in vector))
+        if norm:
+            vector = [v / norm for v in vector]
+        return vector
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed(t) for t in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed(text)
+
+
+class LLMAnswerer:
+    """Stuff the retrieved chunks into the RetrievalQA prompt and ask an LLM."""
+
+    def __init__(self, llm):
+        self.llm = llm
+
+    def _prompt(self, question: str, docs) -> str:
+        context = "\n\n".join(doc.page_content for doc in docs)
+        return QA_PROMPT.format(context=context, question=question)
+
+    def answer(self, question: str, docs) -> str:
+        return self.llm.invoke(self._prompt(question, docs))
+
+    def stream(self, question: str, docs) -> Iterator[str]:
+        return self.llm.stream(self._prompt(question, docs))
+
+
+class ExtractiveAnswerer:
+    """
+    Answer with the sentences of the top-ranked chunk that share the most
+    terms with the question, kept in their original order. No LLM involved.
+    """
+
+    def __init__(self, max_sentences: int = 3):
+        self.max_sentences = max_sentences
+
+    def _select(self, question: str, docs) -> List[str]:
+        if not docs:
+            return []
+        query_terms = set(tokenize(question))
+        sentences = [s.strip() for s in SENTENCE_RE.findall(docs[0].page_content) if s.strip()]
+        scored = sorted(
+            range(len(sentences)),
+            key=lambda i: (-len(query_terms.intersection(tokenize(sentences[i]))), i),
+        )
+        keep = sorted(scored[: self.max_sentences])
+        return [sentences[i] for i in keep]
+
+    def answer(self, question: str, docs) -> str:
+        return " ".join(self._select(question, docs))
+
+    def stream(self, question: str, docs) -> Iterator[str]:
+        for i, sentence in enumerate(self._select(question, docs)):
+            yield sentence if i == 0 else " " + sentence
+
+
+def make_embeddings(backend, model: str):
+    """Return (embeddings, name) where name identifies the vectors for caching."""
+    if not isinstance(backend, str):
+        return backend, getattr(backend, "model", type(backend).__name__)
+    if backend == "ollama":
+        from langchain_ollama import OllamaEmbeddings
+        return OllamaEmbeddings(model=model), model
+    if backend == "hashing":
+        embeddings = HashingEmbeddings()
+        return embeddings, embeddings.model
+    raise ValueError(f"Unknown embedding backend: {backend}")
+
+
+def make_answerer(backend, model: str):
+    """Return (answerer, name) where name identifies its answers for caching."""
+    if not isinstance(backend, str):
+        return backend, getattr(backend, "name", type(backend).__name__)
+    if backend == "ollama":
+        from langchain_ollama import OllamaLLM
+        return LLMAnswerer(OllamaLLM(model=model)), f"ollama:{model}"
+    if backend == "extractive":
+        answerer = ExtractiveAnswerer()
+        return answerer, f"extractive:{answerer.max_sentences}"
+    raise ValueError(f"Unknown answer backend: {backend}")
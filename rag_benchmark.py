@@ -0,0 +1,192 @@
+# rag_benchmark.py - Offline build/query benchmark for RAGEngine
+"""
+Builds RAGEngine over a synthetic device-manual corpus using the offline
+backends (hashing embeddings + extractive answers), so no Ollama server is
+needed, and reports:
+- index build time (load/split + embed + FAISS build)
+- retrieval throughput for the hybrid and the pure-vector retriever
+- retrieval quality: hit@k of the chunk each query was generated from
+
+With --ann it instead compares the FAISS index types (flat/IVF/HNSW/IVF-PQ):
+recall@k against the exact flat index, per-query latency and index memory.
+
+Usage:
+    python rag_benchmark.py                  # 10k and 100k chunks
+    python rag_benchmark.py --sizes 2000 --queries 200
+    python rag_benchmark.py --ann --sizes 100000
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+import faiss
+import numpy as np
+
+from rag_backends import HashingEmbeddings
+from rag_engine import RAGEngine
+from rag_index import INDEX_TYPES, build_faiss_index
+
+ROOMS = ["kitchen", "bedroom", "living room", "bathroom", "garage", "hallway",
+         "kids room", "laundry room", "garden", "front door", "balcony", "office"]
+DEVICES = ["light", "thermostat", "smart lock", "oven", "humidifier", "air purifier",
+           "robot vacuum", "security camera", "sprinkler", "smart tv", "dishwasher",
+           "water heater", "blinds", "doorbell", "ceiling fan", "smart plug"]
+VERBS = ["reset", "pair", "calibrate", "update", "schedule", "mount", "clean",
+         "troubleshoot", "configure", "restart", "inspect", "replace"]
+FILLER = ["the", "device", "settings", "menu", "button", "press", "hold", "seconds",
+          "indicator", "blinks", "green", "app", "wifi", "firmware", "battery",
+          "warranty", "safety", "manual", "section", "model", "power", "cycle"]
+
+
+def make_corpus(n_chunks, seed=0):
+    """
+    n_chunks paragraphs of ~380-460 chars, each with a unique model code plus
+    a topic. The 800-char splitter merges a few adjacent short pairs, so the
+    index holds slightly fewer chunks than paragraphs (see bench_size).
+    """
+    rng = random.Random(seed)
+    paragraphs = []
+    for i in range(n_chunks):
+        device, room, verb = rng.choice(DEVICES), rng.choice(ROOMS), rng.choice(VERBS)
+        code = f"m{i:06d}"
+        words = [rng.choice(FILLER) for _ in range(45)]
+        paragraphs.append(
+            f"To {verb} the {device} model {code} in the {room}, "
+            + " ".join(words)
+            + f". The {device} {code} supports {verb} from the app."
+        )
+    return paragraphs
+
+
+def make_queries(paragraphs, n_queries, seed=1):
+    """(query, source paragraph index) pairs built from each paragraph's topic."""
+    rng = random.Random(seed)
+    queries = []
+    for idx in rng.sample(range(len(paragraphs)), min(n_queries, len(paragraphs))):
+        head = paragraphs[idx].split(",", 1)[0]
+        queries.append((f"how do I {head[3:].strip()}", idx))
+    return queries
+
+
+def run_queries(retriever, queries, paragraphs, k):
+    """(queries/s, hit@k); a hit is a retrieved chunk containing the source paragraph."""
+    hits = 0
+    t0 = time.perf_counter()
+    for query, idx in queries:
+        docs = retriever.invoke(query)[:k]
+        if any(paragraphs[idx] in doc.page_content for doc in docs):
+            hits += 1
+    elapsed = time.perf_counter() - t0
+    return len(queries) / elapsed, hits / len(queries)
+
+
+def bench_size(n_chunks, n_queries, k=5):
+    paragraphs = make_corpus(n_chunks)
+    queries = make_queries(paragraphs, n_queries)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        kb_path = os.path.join(tmp, "manuals.txt")
+        with open(kb_path, "w", encoding="utf-8") as f:
+            f.write("\n\n".join(paragraphs))
+
+        results = {"paragraphs": n_chunks}
+
+        t0 = time.perf_counter()
+        engine = RAGEngine(kb_path=kb_path, cache_dir=os.path.join(tmp, "cache"),
+                           answer_cache_size=0, embedding_backend="hashing",
+                           answer_backend="extractive")
+        results["build_s"] = time.perf_counter() - t0
+        results["chunks"] = engine.index_stats["chunks"]
+
+        t0 = time.perf_counter()
+        RAGEngine(kb_path=kb_path, cache_dir=os.path.join(tmp, "cache"), answer_cache_size=0,
+                  embedding_backend="hashing", answer_backend="extractive")
+        results["cached_load_s"] = time.perf_counter() - t0
+
+        results["hybrid_qps"], results["hybrid_hit"] = run_queries(engine.retriever, queries, paragraphs, k)
+        results["lexical_share"] = engine.retrieval_stats()["lexical_share"]
+
+        vector_retriever = engine.retriever.vectorstore.as_retriever(search_kwargs={"k": k})
+        results["vector_qps"], results["vector_hit"] = run_queries(vector_retriever, queries, paragraphs, k)
+
+        t0 = time.perf_counter()
+        for query, _ in queries:
+            engine.query(query)
+        results["answer_qps"] = len(queries) / (time.perf_counter() - t0)
+    return results
+
+
+def bench_ann(n_chunks, n_queries, k=5):
+    """recall@k vs flat, mean/p95 query latency and serialized size per index type."""
+    paragraphs = make_corpus(n_chunks)
+    queries = make_queries(paragraphs, n_queries)
+    embedder = HashingEmbeddings()
+
+    vectors = np.asarray(embedder.embed_documents(paragraphs), dtype=np.float32)
+    query_vectors = np.asarray(embedder.embed_documents([q for q, _ in queries]), dtype=np.float32)
+
+    rows = []
+    exact = None
+    for index_type in INDEX_TYPES:
+        t0 = time.perf_counter()
+        index = build_faiss_index(vectors, index_type)
+        build_s = time.perf_counter() - t0
+
+        latencies = []
+        found = []
+        for qv in query_vectors:
+            t0 = time.perf_counter()
+            _, ids = index.search(qv.reshape(1, -1), k)
+            latencies.append(time.perf_counter() - t0)
+            found.append(set(ids[0].tolist()))
+
+        if exact is None:  # INDEX_TYPES starts with "flat"
+            exact = found
+        recall = sum(len(f & e) for f, e in zip(found, exact)) / (k * len(found))
+        latencies.sort()
+        rows.append({
+            "index": index_type,
+            "built_as": type(index).__name__,
+            "build_s": build_s,
+            "recall": recall,
+            "mean_ms": 1000 * sum(latencies) / len(latencies),
+            "p95_ms": 1000 * latencies[int(0.95 * (len(latencies) - 1))],
+            "memory_mb": faiss.serialize_index(index).nbytes / 1e6,
+        })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--ann", action="store_true", help="compare FAISS index types")
+    args = parser.parse_args()
+
+    if args.ann:
+        print("📊 ANN index comparison (hashing embeddings, k=5)")
+        print("=" * 60)
+        for size in args.sizes:
+            print(f"{size} chunks:")
+            for r in bench_ann(size, args.queries):
+                print(f"  {r['index']:>6} ({r['built_as']}): build {r['build_s']:.1f}s | "
+                      f"recall@5 {r['recall']:.3f} | {r['mean_ms']:.2f} ms mean, "
+                      f"{r['p95_ms']:.2f} ms p95 | {r['memory_mb']:.1f} MB")
+        return
+
+    print("📊 RAG offline benchmark (hashing embeddings, extractive answers)")
+    print("=" * 60)
+    for size in args.sizes:
+        r = bench_size(size, args.queries)
+        print(f"{r['chunks']:>7} chunks ({r['paragraphs']} paragraphs) | build {r['build_s']:.1f}s | cached load {r['cached_load_s']:.2f}s")
+        print(f"        hybrid: {r['hybrid_qps']:.0f} q/s, hit@5 {r['hybrid_hit']:.3f}, "
+              f"lexical share {r['lexical_share']:.2f}")
+        print(f"        vector: {r['vector_qps']:.0f} q/s, hit@5 {r['vector_hit']:.3f}")
+        print(f"        end-to-end query(): {r['answer_qps']:.0f} q/s")
+
+
+if __name__ == "__main__":
+    main()
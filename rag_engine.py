@@ -1,12 +1,16 @@
 # rag_engine.py
 import os
 import re
-from typing import Optional
-from langchain_community.document_loaders import TextLoader
-from langchain_community.vectorstores import FAISS
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
 from langchain.text_splitter import CharacterTextSplitter
-from langchain_ollama import OllamaEmbeddings, OllamaLLM
-from langchain.chains import RetrievalQA
+from answer_cache import AnswerCache
+from rag_backends import make_answerer, make_embeddings
+from rag_index import (
+    DEFAULT_CACHE_DIR, EmbeddingCache, build_vectorstore, index_key, load_documents,
+    batch_similarity_search, load_index, prune_indexes, save_index, vectorstore_documents,
+)
+from rag_lexical import BM25Index, HybridRetriever
 
 class RAGEngine:
     """
@@ -26,42 +30,240 @@ class RAGEngine:
         "why", "reason", "explain", "show me why", "give me the reasoning"
     ]
 
-    def __init__(self, kb_path: str = "knowledge.txt"):
+    # Verbose AI-style prefixes stripped from answers, and the answer budget
+    PREFIX_RE = re.compile(r"^(As an AI[^\n]*\n?|Sure,|Okay,|Ok,)\s*", re.IGNORECASE)
+    MAX_ANSWER_CHARS = 500
+    FALLBACK_ANSWER = "I'm not sure about that. Could you rephrase?"
+
+    EMBEDDING_MODEL = "nomic-embed-text"
+    LLM_MODEL = "gemma:2b"
+    CHUNK_SIZE = 800
+    CHUNK_OVERLAP = 200
+
+    def __init__(self, kb_path: str = "knowledge.txt", cache_dir: Optional[str] = DEFAULT_CACHE_DIR,
+                 answer_cache_size: int = 256, answer_cache_path: Optional[str] = None,
+                 hybrid: bool = True, embedding_backend="ollama", answer_backend="ollama",
+                 index_type: str = "auto"):
+        """
+        kb_path: knowledge base text file, or a directory of .txt/.md documents
+        cache_dir: where the vector index is persisted between runs (None disables it)
+        answer_cache_size: max answers kept in memory (0 disables answer caching)
+        answer_cache_path: optional JSON file to persist cached answers
+        hybrid: answer keyword queries from BM25 without an embedding call
+        embedding_backend: "ollama", "hashing" (offline) or an Embeddings instance
+        answer_backend: "ollama", "extractive" (offline) or an answerer instance
+        index_type: "auto" (by corpus size), "flat", "ivf", "hnsw" or "ivfpq"
+        """
         self.kb_path = kb_path
-        self.qa_chain = self._load_qa_chain()
+        self.cache_dir = cache_dir
+        self.index_version = None
+        self.index_stats = {}
+        self.answer_cache = AnswerCache(answer_cache_size, answer_cache_path) if answer_cache_size else None
+        self.hybrid = hybrid
+        self.retriever = None
+        self.vectorstore = None
+        self.index_type = index_type
+        self.embeddings, self.embedding_name = make_embeddings(embedding_backend, self.EMBEDDING_MODEL)
+        self.answerer, self.answerer_name = make_answerer(answer_backend, self.LLM_MODEL)
+        self._load_retriever()
 
-    def _load_qa_chain(self):
+    @property
+    def answer_version(self) -> str:
+        """Answer cache version: the index plus the answerer that produced the text."""
+        return f"{self.index_version}|{self.answerer_name}"
+
+    def _load_retriever(self):
         if not os.path.exists(self.kb_path):
             raise FileNotFoundError(f"Knowledge base not found: {self.kb_path}")
+        self._build_retriever()
+
+    def reindex(self):
+        """
+        Rebuild after the knowledge base changed. Only new or edited chunks
+        are embedded; vectors for unchanged chunks come from the cache.
+        """
+        self._build_retriever()
+        if self.answer_cache:
+            self.answer_cache.invalidate(keep_version=self.answer_version)
+        return self.index_stats
+
+    def _build_retriever(self):
+        vectorstore = self._load_vectorstore(self.embeddings)
+        self.index_stats["index"] = type(vectorstore.index).__name__
+        self.vectorstore = vectorstore
+
+        if self.hybrid:
+            documents = [doc for _, doc in vectorstore_documents(vectorstore)]
+            self.retriever = HybridRetriever(
+                vectorstore=vectorstore,
+                bm25=BM25Index([doc.page_content for doc in documents]),
+                documents=documents,
+                k=5,
+            )
+        else:
+            self.retriever = vectorstore.as_retriever(search_kwargs={"k": 5})
+
+    def retrieval_stats(self) -> dict:
+        """How many retrievals were served lexically (no embedding call)."""
+        if not isinstance(self.retriever, HybridRetriever):
+            return {"queries": 0, "lexical_only": 0, "lexical_share": 0.0}
+        return {**self.retriever.stats, "lexical_share": self.retriever.lexical_share()}
+
+    def _load_vectorstore(self, embeddings):
+        """
+        Reuse the persisted index when the knowledge base and embedding model
+        are unchanged; otherwise split the knowledge base, embed only the
+        chunks missing from the embedding cache and save the new index.
+        """
+        self.index_version = index_key(
+            self.kb_path, f"{self.embedding_name}|{self.index_type}", self.CHUNK_SIZE, self.CHUNK_OVERLAP
+        )
+
+        if self.cache_dir:
+            vectorstore = load_index(self.cache_dir, self.index_version, embeddings)
+            if vectorstore is not None:
+                print(f"[INFO] Loaded cached RAG index {self.index_version}")
+                self.index_stats = {"chunks": vectorstore.index.ntotal, "embedded": 0, "cached": True}
+                return vectorstore
 
         # Load and split documents
-        loader = TextLoader(self.kb_path)
-        documents = loader.load()
-        splitter = CharacterTextSplitter(chunk_size=800, chunk_overlap=200)
-        split_docs = splitter.split_documents(documents)
+        splitter = CharacterTextSplitter(chunk_size=self.CHUNK_SIZE, chunk_overlap=self.CHUNK_OVERLAP)
+        split_docs = load_documents(self.kb_path, splitter)
+        texts = [doc.page_content for doc in split_docs]
+        metadatas = [doc.metadata for doc in split_docs]
+
+        if not self.cache_dir:
+            vectors = embeddings.embed_documents(texts)
+            self.index_stats = {"chunks": len(texts), "embedded": len(texts), "cached": False}
+            return build_vectorstore(texts, vectors, metadatas, embeddings, self.index_type)
 
-        # Vectorstore + embeddings
-        embeddings = OllamaEmbeddings(model="nomic-embed-text")
-        vectorstore = FAISS.from_documents(split_docs, embeddings)
+        embedding_cache = EmbeddingCache(self.cache_dir, self.embedding_name)
+        vectors, keys = embedding_cache.embed_documents(texts, embeddings)
+        embedding_cache.prune(keys)
+        embedding_cache.save()
+        self.index_stats = {"chunks": len(texts), "embedded": embedding_cache.misses, "cached": False}
+        print(f"[INFO] Indexed {len(texts)} chunks, embedded {embedding_cache.misses} new/changed")
 
-        retriever = vectorstore.as_retriever(search_kwargs={"k": 5})
-        llm = OllamaLLM(model="gemma:2b")
-        return RetrievalQA.from_chain_type(llm=llm, retriever=retriever)
+        vectorstore = build_vectorstore(texts, vectors, metadatas, embeddings, self.index_type)
+        save_index(vectorstore, self.cache_dir, self.index_version)
+        prune_indexes(self.cache_dir, keep=self.index_version)
+        print(f"[INFO] Saved RAG index {self.index_version} to {self.cache_dir}")
+        return vectorstore
 
     def query(self, query_text: str) -> str:
         """
-        Query the RAG chain. Handles:
+        Retrieve context and answer. Handles:
         1. Device explanations ("why" questions)
         2. Standard KB queries
         """
         processed_query = self._preprocess_query(query_text)
 
+        if self.answer_cache:
+            cached = self.answer_cache.get(self.answer_version, processed_query)
+            if cached is not None:
+                return cached
+
         try:
-            response = self.qa_chain.invoke({"query": processed_query})
-            return self._postprocess_response(response.get("result", ""))
+            docs = self.retriever.invoke(processed_query)
+            answer = self._postprocess_response(self.answerer.answer(processed_query, docs))
+            if self.answer_cache:
+                self.answer_cache.put(self.answer_version, processed_query, answer)
+            return answer
         except Exception as e:
             return f"Error during RAG query: {str(e)}"
 
+    def query_batch(self, questions: List[str], max_workers: int = 4) -> List[Dict]:
+        """
+        Answer many questions at once (evaluation, bulk explanations).
+        All queries are embedded in one call and searched with one FAISS call;
+        answers are generated with at most ``max_workers`` in flight.
+
+        Returns one dict per question, in input order:
+            {"query": str, "answer": str or None, "error": str or None}
+        """
+        results = [{"query": q, "answer": None, "error": None} for q in questions]
+        processed = [self._preprocess_query(q) for q in questions]
+
+        todo = []
+        for i, processed_query in enumerate(processed):
+            cached = self.answer_cache.get(self.answer_version, processed_query) if self.answer_cache else None
+            if cached is not None:
+                results[i]["answer"] = cached
+            else:
+                todo.append(i)
+        if not todo:
+            return results
+
+        try:
+            doc_lists = self._retrieve_batch([processed[i] for i in todo])
+        except Exception as e:
+            # Retrieve one query at a time so only the questions that fail are lost
+            print(f"[WARNING] Batched retrieval failed ({e}), retrieving per query.")
+            doc_lists = []
+            for i in list(todo):
+                try:
+                    doc_lists.append(self.retriever.invoke(processed[i]))
+                except Exception as err:
+                    results[i]["error"] = f"Retrieval failed: {err}"
+                    todo.remove(i)
+
+        def _answer(processed_query, docs):
+            return self._postprocess_response(self.answerer.answer(processed_query, docs))
+
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            futures = [(i, pool.submit(_answer, processed[i], docs)) for i, docs in zip(todo, doc_lists)]
+            for i, future in futures:
+                try:
+                    results[i]["answer"] = future.result()
+                except Exception as e:
+                    results[i]["error"] = f"Generation failed: {e}"
+                    continue
+                if self.answer_cache:
+                    self.answer_cache.put(self.answer_version, processed[i], results[i]["answer"])
+        return results
+
+    def _retrieve_batch(self, queries: List[str]):
+        if isinstance(self.retriever, HybridRetriever):
+            return self.retriever.retrieve_batch(queries)
+        vectors = self.embeddings.embed_documents(queries)
+        return batch_similarity_search(self.vectorstore, vectors, k=5)
+
+    def query_stream(self, query_text: str):
+        """
+        Streaming variant of query(): yields answer text as the backend produces it.
+
+        The same post-processing as _postprocess_response is applied on the
+        fly (prefix stripping, whitespace cleanup, sentence-bounded 500-char
+        budget), so the joined pieces equal what query() would return.
+        Generation is aborted as soon as the budget is reached.
+        """
+        processed_query = self._preprocess_query(query_text)
+
+        if self.answer_cache:
+            cached = self.answer_cache.get(self.answer_version, processed_query)
+            if cached is not None:
+                yield cached
+                return
+
+        pieces = []
+        tokens = None
+        try:
+            docs = self.retriever.invoke(processed_query)
+            tokens = self.answerer.stream(processed_query, docs)
+            for piece in self._stream_postprocess(tokens):
+                pieces.append(piece)
+                yield piece
+        except Exception as e:
+            yield f"Error during RAG query: {str(e)}"
+            return
+        finally:
+            # Stops the underlying generation request if we ended early
+            if tokens is not None and hasattr(tokens, "close"):
+                tokens.close()
+
+        if self.answer_cache:
+            self.answer_cache.put(self.answer_version, processed_query, "".join(pieces))
+
     def _preprocess_query(self, query_text: str) -> str:
         """
         Adds context hints for device-related or explanation queries.
@@ -85,18 +287,79 @@ class RAGEngine:
         Clean response for assistant-friendly output.
         """
         if not response:
-            return "I'm not sure about that. Could you rephrase?"
+            return self.FALLBACK_ANSWER
 
         text = str(response).strip()
         # Remove verbose AI-style prefixes
-        text = re.sub(r"^(As an AI[^\n]*\n?|Sure,|Okay,|Ok,)\s*", "", text, flags=re.IGNORECASE)
+        text = self.PREFIX_RE.sub("", text)
 
         # Limit length to 500 chars while preserving full sentences
-        if len(text) > 500:
-            snippet = text[:500]
-            if "." in snippet:
-                snippet = snippet.rsplit(".", 1)[0] + "."
-            text = snippet
+        if len(text) > self.MAX_ANSWER_CHARS:
+            text = self._truncate(text)
 
         # Clean extra spaces/lines
         return re.sub(r"\s+\n", "\n", text).strip()
+
+    def _truncate(self, text: str) -> str:
+        snippet = text[:self.MAX_ANSWER_CHARS]
+        if "." in snippet:
+            snippet = snippet.rsplit(".", 1)[0] + "."
+        return snippet
+
+    def _strip_prefix(self, raw: str, final: bool) -> Optional[str]:
+        """
+        Apply PREFIX_RE to a partial response. Returns None while the prefix
+        can't be decided yet (too little text, or an unfinished "As an AI" line).
+        """
+        text = raw.lstrip()
+        if not final:
+            if len(text) < 8:
+                return None
+            if text[:8].lower() == "as an ai" and "\n" not in text:
+                return None
+        match = self.PREFIX_RE.match(text)
+        if match is None:
+            return text
+        if match.end() == len(text) and not final:
+            return None
+        return text[match.end():]
+
+    def _stream_postprocess(self, chunks):
+        """
+        Incremental _postprocess_response. Text is released a sentence at a
+        time (up to the last '.'), since everything before the last full stop
+        is kept whether or not the answer later hits the budget.
+        """
+        raw = ""
+        body = None   # response after prefix stripping, once decidable
+        emitted = 0   # chars of body already yielded
+
+        for chunk in chunks:
+            if body is None:
+                raw += chunk
+                body = self._strip_prefix(raw, final=False)
+                if body is None:
+                    continue
+            else:
+                body += chunk
+
+            # Trailing whitespace doesn't count: _postprocess_response strips it first
+            if len(body.rstrip()) > self.MAX_ANSWER_CHARS:
+                # Budget reached: emit the sentence-bounded rest and stop
+                rest = self._truncate(body)[emitted:]
+                yield re.sub(r"\s+\n", "\n", rest).rstrip()
+                return
+
+            cut = body.rfind(".", emitted) + 1
+            if cut > emitted:
+                yield re.sub(r"\s+\n", "\n", body[emitted:cut])
+                emitted = cut
+
+        if body is None:
+            if not raw:
+                yield self.FALLBACK_ANSWER
+                return
+            body = self._strip_prefix(raw, final=True)
+        rest = re.sub(r"\s+\n", "\n", body[emitted:]).rstrip()
+        if rest:
+            yield rest
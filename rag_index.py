@@ -0,0 +1,340 @@
+# rag_index.py
+"""
+On-disk cache for the RAG vector index.
+
+Each cache entry lives in ``<cache_dir>/<key>/`` where ``key`` is a hash of
+the knowledge base content, the embedding model name and the splitter
+settings. An entry holds the raw FAISS index (``index.faiss``) plus the chunk
+texts/metadata (``chunks.json``), so a matching entry can be loaded with a
+memory-mapped read and no embedding calls at all.
+
+When an entry misses (the knowledge base changed), chunk vectors come from a
+content-addressed ``EmbeddingCache`` so only new or edited chunks are sent to
+the embedding model.
+
+The FAISS index type (flat, IVF, HNSW, IVF-PQ) is chosen by corpus size unless
+configured explicitly; see ``choose_index_type``.
+"""
+
+import hashlib
+import json
+import math
+import os
+import shutil
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import faiss
+import numpy as np
+from langchain_community.document_loaders import TextLoader
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+
+DEFAULT_CACHE_DIR = ".rag_cache"
+INDEX_FILE = "index.faiss"
+CHUNKS_FILE = "chunks.json"
+EMBEDDINGS_DIR = "embeddings"
+KB_EXTENSIONS = (".txt", ".md")
+
+INDEX_TYPES = ("flat", "ivf", "hnsw", "ivfpq")
+HNSW_NEIGHBORS = 32
+HNSW_EF_CONSTRUCTION = 80
+HNSW_EF_SEARCH = 64
+PQ_NBITS = 8
+
+
+def kb_files(kb_path: str) -> List[str]:
+    """
+    Files making up the knowledge base: either the single file given, or every
+    .txt/.md file under a directory (device manuals, policies, ...), sorted so
+    hashing and chunk order are deterministic.
+    """
+    if os.path.isfile(kb_path):
+        return [kb_path]
+
+    files = []
+    for root, _dirs, names in os.walk(kb_path):
+        for name in names:
+            if name.lower().endswith(KB_EXTENSIONS):
+                files.append(os.path.join(root, name))
+    return sorted(files)
+
+
+def index_key(kb_path: str, model_name: str, chunk_size: int, chunk_overlap: int) -> str:
+    """
+    Content hash identifying a vector index build.
+    Any change to the knowledge base, embedding model or splitter settings
+    produces a different key (and therefore a fresh build).
+    """
+    digest = hashlib.sha256()
+    for path in kb_files(kb_path):
+        digest.update(os.path.relpath(path, kb_path).encode("utf-8") + b"\0")
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+    digest.update(f"|{model_name}|{chunk_size}|{chunk_overlap}".encode("utf-8"))
+    return digest.hexdigest()[:32]
+
+
+def load_documents(kb_path: str, splitter, max_workers: int = 8):
+    """
+    Load and split every knowledge base file in parallel.
+    Returns the split chunks in file order.
+    """
+    files = kb_files(kb_path)
+
+    def _load_and_split(path):
+        try:
+            return splitter.split_documents(TextLoader(path, autodetect_encoding=True).load())
+        except Exception as e:
+            print(f"[WARNING] Skipping knowledge file {path}: {e}")
+            return []
+
+    if len(files) == 1:
+        return _load_and_split(files[0])
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        per_file = list(pool.map(_load_and_split, files))
+    return [chunk for chunks in per_file for chunk in chunks]
+
+
+def prune_indexes(cache_dir: str, keep: str):
+    """Remove index entries other than ``keep`` (the embedding cache is left alone)."""
+    if not os.path.isdir(cache_dir):
+        return
+    for name in os.listdir(cache_dir):
+        path = os.path.join(cache_dir, name)
+        if name not in (keep, EMBEDDINGS_DIR) and os.path.exists(os.path.join(path, CHUNKS_FILE)):
+            shutil.rmtree(path, ignore_errors=True)
+
+
+class EmbeddingCache:
+    """
+    Chunk-level embedding cache keyed by hash(model, chunk text).
+
+    Stored as one ``.npz`` per embedding model under ``<cache_dir>/embeddings``.
+    ``embed_documents`` only calls the embedding model for chunks it has never
+    seen, and ``prune`` drops vectors for chunks no longer in the corpus.
+    """
+
+    def __init__(self, cache_dir: str, model_name: str):
+        self.model_name = model_name
+        slug = "".join(c if c.isalnum() else "_" for c in model_name)
+        self.path = os.path.join(cache_dir, EMBEDDINGS_DIR, f"{slug}.npz")
+        self.vectors: Dict[str, np.ndarray] = {}
+        self.hits = 0
+        self.misses = 0
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            data = np.load(self.path, allow_pickle=False)
+            self.vectors = dict(zip(data["keys"].tolist(), data["vectors"]))
+        except (OSError, ValueError, KeyError):
+            print(f"[WARNING] Could not read embedding cache {self.path}, starting empty.")
+            self.vectors = {}
+
+    def chunk_key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.model_name}\0{text}".encode("utf-8")).hexdigest()
+
+    def embed_documents(self, texts: List[str], embeddings) -> Tuple[np.ndarray, List[str]]:
+        """
+        Return (vectors, keys) for ``texts``, embedding only the cache misses.
+        """
+        keys = [self.chunk_key(t) for t in texts]
+
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in self.vectors and key not in missing:
+                missing[key] = text
+
+        self.misses += len(missing)
+        self.hits += len(keys) - len(missing)
+
+        if missing:
+            new_vectors = embeddings.embed_documents(list(missing.values()))
+            for key, vector in zip(missing.keys(), new_vectors):
+                self.vectors[key] = np.asarray(vector, dtype=np.float32)
+
+        if not keys:
+            return np.zeros((0, 0), dtype=np.float32), keys
+        return np.stack([self.vectors[k] for k in keys]), keys
+
+    def prune(self, keep_keys):
+        keep_keys = set(keep_keys)
+        for key in [k for k in self.vectors if k not in keep_keys]:
+            del self.vectors[key]
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        keys = list(self.vectors.keys())
+        if keys:
+            vectors = np.stack([self.vectors[k] for k in keys]).astype(np.float32)
+        else:
+            vectors = np.zeros((0, 0), dtype=np.float32)
+        tmp_path = self.path + ".tmp.npz"
+        np.savez(tmp_path, keys=np.array(keys, dtype=str), vectors=vectors)
+        os.replace(tmp_path, self.path)
+
+
+def vectorstore_documents(vectorstore: FAISS) -> List[Tuple[str, Document]]:
+    """(docstore id, Document) pairs in FAISS index order."""
+    pairs = []
+    for position in range(vectorstore.index.ntotal):
+        doc_id = vectorstore.index_to_docstore_id[position]
+        pairs.append((doc_id, vectorstore.docstore.search(doc_id)))
+    return pairs
+
+
+def choose_index_type(n_vectors: int) -> str:
+    """
+    Exact search is cheapest below ~20k chunks; HNSW gives the best latency up
+    to a few hundred thousand; beyond that IVF, and IVF-PQ once the raw
+    vectors stop fitting comfortably in memory.
+    """
+    if n_vectors < 20_000:
+        return "flat"
+    if n_vectors < 300_000:
+        return "hnsw"
+    if n_vectors < 2_000_000:
+        return "ivf"
+    return "ivfpq"
+
+
+def _ivf_nlist(n_vectors: int) -> int:
+    # ~4*sqrt(n) lists, but at least 39 training points per centroid
+    return max(1, min(int(4 * math.sqrt(n_vectors)), n_vectors // 39))
+
+
+def _pq_subquantizers(dim: int) -> int:
+    # Largest divisor of dim giving sub-vectors of at least 4 dimensions (max 64)
+    for m in range(min(64, dim // 4), 0, -1):
+        if dim % m == 0:
+            return m
+    return 1
+
+
+def build_faiss_index(vectors: np.ndarray, index_type: str = "auto", nprobe: int = 16) -> faiss.Index:
+    """
+    Build (and train, for IVF variants) a FAISS index over ``vectors``.
+    Everything uses L2 distance, matching the LangChain FAISS default.
+    Small corpora fall back to flat where training would be meaningless.
+    """
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    n_vectors, dim = vectors.shape
+    if index_type == "auto":
+        index_type = choose_index_type(n_vectors)
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"Unknown index type: {index_type} (expected one of {INDEX_TYPES})")
+
+    if index_type in ("ivf", "ivfpq") and n_vectors < 39 * 2:
+        index_type = "flat"
+    if index_type == "ivfpq" and n_vectors < 39 * (1 << PQ_NBITS):
+        index_type = "ivf"
+
+    if index_type == "flat":
+        index = faiss.IndexFlatL2(dim)
+    elif index_type == "hnsw":
+        index = faiss.IndexHNSWFlat(dim, HNSW_NEIGHBORS)
+        index.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+        index.hnsw.efSearch = HNSW_EF_SEARCH
+    else:
+        nlist = _ivf_nlist(n_vectors)
+        quantizer = faiss.IndexFlatL2(dim)
+        if index_type == "ivf":
+            index = faiss.IndexIVFFlat(quantizer, dim, nlist)
+        else:
+            index = faiss.IndexIVFPQ(quantizer, dim, nlist, _pq_subquantizers(dim), PQ_NBITS)
+        index.train(vectors)
+        index.nprobe = min(nprobe, nlist)
+
+    index.add(vectors)
+    return index
+
+
+def build_vectorstore(texts, vectors, metadatas, embeddings, index_type: str = "auto") -> FAISS:
+    """LangChain FAISS vectorstore around an index from ``build_faiss_index``."""
+    index = build_faiss_index(np.asarray(vectors, dtype=np.float32), index_type)
+    ids = [str(uuid.uuid4()) for _ in texts]
+    docstore = InMemoryDocstore({
+        doc_id: Document(page_content=text, metadata=metadata or {})
+        for doc_id, text, metadata in zip(ids, texts, metadatas)
+    })
+    return FAISS(embeddings, index, docstore, dict(enumerate(ids)))
+
+
+def batch_similarity_search(vectorstore: FAISS, query_vectors, k: int) -> List[List[Document]]:
+    """One FAISS search call for many query vectors; results in query order."""
+    vectors = np.ascontiguousarray(query_vectors, dtype=np.float32)
+    _, ids = vectorstore.index.search(vectors, k)
+    return [
+        [vectorstore.docstore.search(vectorstore.index_to_docstore_id[int(i)]) for i in row if i != -1]
+        for row in ids
+    ]
+
+
+def save_index(vectorstore: FAISS, cache_dir: str, key: str) -> str:
+    """
+    Write the FAISS index and chunk metadata for ``key``.
+    Files are written to temp names first so a crash never leaves a
+    half-written entry that would be picked up on the next start.
+    """
+    entry_dir = os.path.join(cache_dir, key)
+    os.makedirs(entry_dir, exist_ok=True)
+
+    chunks = [
+        {"id": doc_id, "text": doc.page_content, "metadata": doc.metadata}
+        for doc_id, doc in vectorstore_documents(vectorstore)
+    ]
+
+    index_path = os.path.join(entry_dir, INDEX_FILE)
+    chunks_path = os.path.join(entry_dir, CHUNKS_FILE)
+
+    faiss.write_index(vectorstore.index, index_path + ".tmp")
+    with open(chunks_path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump({"key": key, "chunks": chunks}, f)
+
+    os.replace(index_path + ".tmp", index_path)
+    os.replace(chunks_path + ".tmp", chunks_path)
+    return entry_dir
+
+
+def load_index(cache_dir: str, key: str, embeddings) -> Optional[FAISS]:
+    """
+    Load a cached vectorstore for ``key``, or return None on a cache miss.
+    The index is opened memory-mapped where the index type supports it.
+    """
+    entry_dir = os.path.join(cache_dir, key)
+    index_path = os.path.join(entry_dir, INDEX_FILE)
+    chunks_path = os.path.join(entry_dir, CHUNKS_FILE)
+    if not (os.path.exists(index_path) and os.path.exists(chunks_path)):
+        return None
+
+    try:
+        index = faiss.read_index(index_path, faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+    except RuntimeError:
+        # Not every index type can be mmapped; a plain read is still far
+        # cheaper than re-embedding the corpus.
+        index = faiss.read_index(index_path)
+
+    try:
+        with open(chunks_path, "r", encoding="utf-8") as f:
+            chunks = json.load(f)["chunks"]
+    except (json.JSONDecodeError, KeyError):
+        print(f"[WARNING] Corrupt RAG cache entry {entry_dir}, rebuilding.")
+        return None
+
+    if len(chunks) != index.ntotal:
+        print(f"[WARNING] RAG cache entry {entry_dir} is inconsistent, rebuilding.")
+        return None
+
+    docstore = InMemoryDocstore({
+        c["id"]: Document(page_content=c["text"], metadata=c.get("metadata", {}))
+        for c in chunks
+    })
+    index_to_docstore_id = {i: c["id"] for i, c in enumerate(chunks)}
+    return FAISS(embeddings, index, docstore, index_to_docstore_id)
@@ -0,0 +1,186 @@
+# rag_lexical.py
+"""
+BM25 lexical retrieval and a hybrid lexical/vector retriever.
+
+Most assistant queries are short keyword questions ("kitchen light status",
+"unlock front door at night") that a BM25 index over the same chunks answers
+well. HybridRetriever serves those from BM25 alone when the top score clearly
+beats the runner-up, and only falls back to the FAISS vectorstore (one
+embedding call) when the lexical result is ambiguous, fusing both rankings
+with reciprocal rank fusion.
+"""
+
+import math
+import re
+from collections import Counter, defaultdict
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from pydantic import Field
+
+from rag_index import batch_similarity_search
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+STOPWORDS = {
+    "a", "an", "the", "is", "are", "was", "were", "be", "to", "of", "in", "on",
+    "at", "for", "and", "or", "it", "this", "that", "i", "my", "me", "can",
+    "do", "does", "what", "how", "please", "you",
+}
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in TOKEN_RE.findall(text.lower()) if t not in STOPWORDS]
+
+
+class BM25Index:
+    """
+    Okapi BM25 over a fixed list of chunk texts.
+
+    Postings are stored CSR-style - per term a slice of one doc-id array and
+    one array of precomputed document-side weights tf*(k1+1)/(tf+norm) - so a
+    query is a few NumPy scatter-adds into a dense score vector instead of a
+    Python loop over every posting of every query term.
+    """
+
+    def __init__(self, texts: List[str], k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.size = len(texts)
+
+        postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        doc_len = []
+        for doc_idx, text in enumerate(texts):
+            tokens = tokenize(text)
+            doc_len.append(len(tokens))
+            for term, tf in Counter(tokens).items():
+                postings[term].append((doc_idx, tf))
+
+        self.doc_len = np.array(doc_len, dtype=np.float64)
+        self.avg_len = float(self.doc_len.mean()) if self.size else 0.0
+        norm = k1 * (1 - b + b * self.doc_len / (self.avg_len or 1.0))
+
+        # CSR layout: term -> (start, end) into doc_ids / weights
+        self.terms: Dict[str, Tuple[int, int]] = {}
+        self.idf: Dict[str, float] = {}
+        doc_ids, tfs, start = [], [], 0
+        for term, plist in postings.items():
+            self.terms[term] = (start, start + len(plist))
+            self.idf[term] = math.log(1 + (self.size - len(plist) + 0.5) / (len(plist) + 0.5))
+            doc_ids.extend(d for d, _ in plist)
+            tfs.extend(tf for _, tf in plist)
+            start += len(plist)
+        self.doc_ids = np.array(doc_ids, dtype=np.int64)
+        tf = np.array(tfs, dtype=np.float64)
+        self.weights = tf * (k1 + 1) / (tf + norm[self.doc_ids]) if len(tf) else tf
+
+    def search(self, query: str, k: int = 5) -> List[Tuple[int, float]]:
+        """Top-k (doc index, score) pairs; only documents sharing a term are scored."""
+        scores = None
+        for term in set(tokenize(query)):
+            span = self.terms.get(term)
+            if span is None:
+                continue
+            if scores is None:
+                scores = np.zeros(self.size, dtype=np.float64)
+            ids = self.doc_ids[span[0]:span[1]]
+            # A term lists each document once, so a plain fancy-index add is exact
+            scores[ids] += self.idf[term] * self.weights[span[0]:span[1]]
+        if scores is None:
+            return []
+
+        # Everything tied with the k-th best score, then (-score, doc index) like a full sort
+        matched = np.flatnonzero(scores > 0)
+        if len(matched) > k:
+            kth = np.partition(scores[matched], len(matched) - k)[len(matched) - k]
+            matched = matched[scores[matched] >= kth]
+        order = np.lexsort((matched, -scores[matched]))[:k]
+        return [(int(i), float(scores[i])) for i in matched[order]]
+
+
+class HybridRetriever(BaseRetriever):
+    """
+    Route each query to BM25 or the vectorstore.
+
+    lexical_margin: minimum relative gap (top1 - top2) / top1 for BM25 to answer alone
+    min_lexical_score: minimum top BM25 score for BM25 to answer alone
+    fuse: when falling back, merge BM25 and vector rankings (RRF) instead of vector only
+    """
+
+    vectorstore: Any
+    bm25: Any
+    documents: List[Document]
+    k: int = 5
+    lexical_margin: float = 0.25
+    min_lexical_score: float = 2.0
+    fuse: bool = True
+    rrf_k: int = 60
+    stats: Dict[str, int] = Field(default_factory=lambda: {"queries": 0, "lexical_only": 0})
+
+    def _lexical_is_confident(self, hits: List[Tuple[int, float]]) -> bool:
+        if not hits or hits[0][1] < self.min_lexical_score:
+            return False
+        if len(hits) == 1:
+            return True
+        top, second = hits[0][1], hits[1][1]
+        return (top - second) / top >= self.lexical_margin
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        hits = self.bm25.search(query, self.k)
+        self.stats["queries"] += 1
+
+        if self._lexical_is_confident(hits):
+            self.stats["lexical_only"] += 1
+            return [self.documents[i] for i, _ in hits]
+
+        vector_docs = self.vectorstore.similarity_search(query, k=self.k)
+        return self._merge(hits, vector_docs)
+
+    def retrieve_batch(self, queries: List[str]) -> List[List[Document]]:
+        """
+        Retrieve for many queries: lexical routing per query, then a single
+        embedding call and a single FAISS search for all the rest.
+        """
+        results = [None] * len(queries)
+        all_hits = [self.bm25.search(q, self.k) for q in queries]
+        pending = []
+        for i, hits in enumerate(all_hits):
+            self.stats["queries"] += 1
+            if self._lexical_is_confident(hits):
+                self.stats["lexical_only"] += 1
+                results[i] = [self.documents[j] for j, _ in hits]
+            else:
+                pending.append(i)
+
+        if pending:
+            vectors = self.vectorstore.embedding_function.embed_documents([queries[i] for i in pending])
+            for i, vector_docs in zip(pending, batch_similarity_search(self.vectorstore, vectors, self.k)):
+                results[i] = self._merge(all_hits[i], vector_docs)
+        return results
+
+    def _merge(self, hits: List[Tuple[int, float]], vector_docs: List[Document]) -> List[Document]:
+        if not self.fuse or not hits:
+            return vector_docs
+
+        # Reciprocal rank fusion, keyed on chunk text (shared by both indexes)
+        fused = defaultdict(float)
+        by_text = {}
+        for rank, (doc_idx, _) in enumerate(hits):
+            doc = self.documents[doc_idx]
+            fused[doc.page_content] += 1.0 / (self.rrf_k + rank + 1)
+            by_text[doc.page_content] = doc
+        for rank, doc in enumerate(vector_docs):
+            fused[doc.page_content] += 1.0 / (self.rrf_k + rank + 1)
+            by_text.setdefault(doc.page_content, doc)
+
+        ranked = sorted(fused, key=fused.get, reverse=True)[: self.k]
+        return [by_text[text] for text in ranked]
+
+    def lexical_share(self) -> float:
+        """Share of queries answered without an embedding call."""
+        queries = self.stats["queries"]
+        return self.stats["lexical_only"] / queries if queries else 0.0
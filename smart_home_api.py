@@ -1,144 +1,30 @@
 # =========================
-# smart_home_api.py (70 devices + XAI explanations)
+# smart_home_api.py (device catalog + XAI explanations)
 # =========================
 
-device_states = {
-    # Climate Control
-    "smart_thermostat": {"status": "off", "temperature": 22},
-    "air_conditioner": {"status": "off", "temperature": 24},
-    "heater": {"status": "off", "temperature": 20},
-    "humidifier": {"status": "off", "humidity": 45},
-    "dehumidifier": {"status": "off", "humidity": 55},
-    "air_purifier": {"status": "off", "mode": "auto"},
+from device_catalog import get_catalog
 
-    # Lighting
-    "bedroom_light": {"status": "off", "brightness": 100},
-    "kitchen_light": {"status": "off", "brightness": 100},
-    "living_room_light": {"status": "off", "brightness": 100},
-    "bathroom_light": {"status": "off", "brightness": 100},
-    "garden_light": {"status": "off", "brightness": 100},
-    "stair_light": {"status": "off", "brightness": 100},
-    "garage_light": {"status": "off", "brightness": 100},
-    "chandelier": {"status": "off", "brightness": 80},
-    "led_strip": {"status": "off", "color": "white"},
+# Runtime state per device id, seeded from the catalog (devices.json)
+device_states = get_catalog().snapshot().initial_states()
+_states_version = get_catalog().snapshot().version
 
-    # Security
-    "front_door": {"status": "locked"},
-    "back_door": {"status": "locked"},
-    "garage_door": {"status": "closed"},
-    "balcony_door": {"status": "locked"},
-    "security_camera": {"status": "off"},
-    "doorbell_camera": {"status": "off"},
-    "window_sensor": {"status": "armed"},
-    "alarm_system": {"status": "armed"},
-    "motion_detector": {"status": "armed"},
 
-    # Kitchen
-    "smart_oven": {"status": "off"},
-    "stove": {"status": "off"},
-    "microwave": {"status": "off"},
-    "toaster": {"status": "off"},
-    "coffee_machine": {"status": "off"},
-    "blender": {"status": "off"},
-    "food_processor": {"status": "off"},
-    "dishwasher": {"status": "off"},
-    "fridge": {"status": "on", "temperature": 4},
-    "freezer": {"status": "on", "temperature": -18},
-    "pressure_cooker": {"status": "off"},
+def current_catalog():
+    """Current catalog snapshot; device_states gains/loses devices when a new one is published."""
+    global _states_version
+    snapshot = get_catalog().snapshot()
+    if snapshot.version != _states_version:
+        for device_id in [d for d in device_states if d not in snapshot.devices]:
+            del device_states[device_id]
+        for device_id, entry in snapshot.devices.items():
+            device_states.setdefault(device_id, dict(entry["state"]))
+        _states_version = snapshot.version
+    return snapshot
 
-    # Entertainment
-    "smart_tv": {"status": "off", "volume": 20},
-    "gaming_console": {"status": "off"},
-    "projector": {"status": "off"},
-    "smart_speaker": {"status": "off", "volume": 50},
-    "home_theater": {"status": "off", "volume": 30},
 
-    # Cleaning & Laundry
-    "robot_vacuum": {"status": "docked"},
-    "robot_lawn_mower": {"status": "docked"},
-    "washing_machine": {"status": "off"},
-    "dryer": {"status": "off"},
-    "steam_iron": {"status": "off"},
-
-    # Bathroom
-    "water_heater": {"status": "off", "temperature": 45},
-    "smart_shower": {"status": "off", "temperature": 37},
-    "bath_exhaust_fan": {"status": "off"},
-    "toothbrush_sanitizer": {"status": "off"},
-
-    # Outdoor
-    "pool_pump": {"status": "off"},
-    "pool_heater": {"status": "off", "temperature": 28},
-    "hot_tub": {"status": "off", "temperature": 38},
-    "sprinkler_system": {"status": "off"},
-    "outdoor_grill": {"status": "off"},
-    "garden_irrigation": {"status": "off"},
-    "patio_heater": {"status": "off"},
-    "garage_charger": {"status": "off"},
-
-    # Health & Misc
-    "medicine_cabinet": {"status": "locked"},
-    "smart_scale": {"status": "off"},
-    "sleep_tracker": {"status": "off"},
-    "baby_monitor": {"status": "off"},
-    "pet_feeder": {"status": "off"},
-    "smart_blinds": {"status": "closed"},
-    "smart_curtains": {"status": "closed"},
-    "smart_mirror": {"status": "off"},
-    "aroma_diffuser": {"status": "off"},
-    "3d_printer": {"status": "off"},
-    "solar_panel_controller": {"status": "on", "output_kw": 2.5},
-    "backup_generator": {"status": "off"},
-    "smart_meter": {"status": "on", "power_usage": "1.2kW"},
-}
 def list_devices():
-    return {
-        # Lighting
-        "bedroom light": {"type": "lighting", "location": "bedroom"},
-        "living room light": {"type": "lighting", "location": "living room"},
-        "kitchen light": {"type": "lighting", "location": "kitchen"},
-        "bathroom light": {"type": "lighting", "location": "bathroom"},
-        "hallway light": {"type": "lighting", "location": "hallway"},
-
-        # Doors
-        "front door": {"type": "door", "location": "front"},
-        "back door": {"type": "door", "location": "back"},
-        "garage door": {"type": "door", "location": "garage"},
-
-        # Kitchen appliances
-        "microwave": {"type": "appliance", "location": "kitchen"},
-        "oven": {"type": "appliance", "location": "kitchen"},
-        "stove": {"type": "appliance", "location": "kitchen"},
-        "coffee maker": {"type": "appliance", "location": "kitchen"},
-        "kettle": {"type": "appliance", "location": "kitchen"},
-
-        # Climate devices
-        "humidifier": {"type": "climate", "location": "living room"},
-        "air conditioner": {"type": "climate", "location": "bedroom"},
-        "heater": {"type": "climate", "location": "living room"},
-
-        # Bathroom devices
-        "bath fan": {"type": "bathroom", "location": "bathroom"},
-        "shower": {"type": "bathroom", "location": "bathroom"},
-
-        # Security / Cameras
-        "security camera 1": {"type": "security", "location": "front"},
-        "security camera 2": {"type": "security", "location": "back"},
-        "alarm system": {"type": "security", "location": "whole house"},
-
-        # Outdoor
-        "sprinkler": {"type": "outdoor", "location": "garden"},
-        "garage light": {"type": "outdoor", "location": "garage"},
-        "outdoor lights": {"type": "outdoor", "location": "yard"},
-
-        # Robots / Laundry
-        "robot vacuum": {"type": "robot", "location": "whole house"},
-        "washing machine": {"type": "appliance", "location": "laundry room"},
-        "dryer": {"type": "appliance", "location": "laundry room"},
-
-        # Medicine / Cabinet
-        "medicine cabinet": {"type": "medicine", "location": "bathroom"},
-    }
+    # The snapshot's prebuilt view: the same object until devices.json changes, so indexes over it are reused
+    return current_catalog().registry
 
 def extract_device_and_action(command):
     devices = list_devices()
@@ -176,18 +62,27 @@ def control_device(device: str, location: str = "all", action: str = "get_status
     matched_devices = []
     device_lower = device.lower()
     location_lower = location.lower()
-
-    for dev_name in device_states:
-        dev_name_lower = dev_name.lower()
-        device_match = (
-            device_lower == "all"
-            or device_lower in dev_name_lower
-            or (device_lower == "light" and "light" in dev_name_lower)
-            or (device_lower == "thermostat" and "thermostat" in dev_name_lower)
-        )
-        location_match = location_lower == "all" or location_lower in dev_name_lower
-        if device_match and location_match:
-            matched_devices.append(dev_name)
+    catalog = current_catalog()
+
+    # An exact id, name or alias from the catalog (e.g. resolved via the home topology) names one
+    # device - if it is in the requested location; otherwise fall back to the location-aware scan
+    device_id = catalog.resolve(device)
+    if device_id is not None and (
+        location_lower in ("all", catalog.devices[device_id]["location"]) or location_lower in device_id.lower()
+    ):
+        matched_devices.append(device_id)
+    else:
+        for dev_name, dev_name_lower, dev_location, dev_names in catalog.scan_rows:
+            device_match = (
+                device_lower == "all"
+                or device_lower in dev_name_lower
+                or any(device_lower in name for name in dev_names)
+                or (device_lower == "light" and "light" in dev_name_lower)
+                or (device_lower == "thermostat" and "thermostat" in dev_name_lower)
+            )
+            location_match = location_lower in ("all", dev_location) or location_lower in dev_name_lower
+            if device_match and location_match:
+                matched_devices.append(dev_name)
 
     if not matched_devices:
         return f"No devices found matching: device='{device}', location='{location}'"
@@ -1,34 +1,15 @@
  # main.py
 import time
-import difflib
+from aliases import normalize_name
+from fuzzy_matcher import matcher_for
 from process_commands import process_commands
 from llm_interface import query_llm
-from rag_engine import RAGEngine
+from lazy_loader import LazyComponent, startup_report
 from state_manager import StateManager
 from smart_home_api import list_devices, control_device
-from vision_module import VisionModule
 from vision_intents import derive_commands_from_vision, map_child_location
-import difflib
-
-def normalize_name(name: str) -> str:
-    """Normalize device/location names for consistent lookup."""
-    if not name:
-        return ""
-    name = name.lower().strip()
-
-    # Simple keyword-based normalization
-    replacements = {
-        "smart tv": "tv",
-        "television": "tv",
-        "where the child is standing": "living room",  # fallback assumption
-        "child standing": "living room",
-        "child is near": "",
-    }
-    for k, v in replacements.items():
-        if k in name:
-            name = name.replace(k, v)
-
-    return name.strip()
+from vision_events import EventStore, answer_event_question
+from vision_worker import VisionWorker
 
 def execute_action(commands, device_registry):
     """Execute parsed LLM/Vision commands with fuzzy matching + normalization."""
@@ -44,9 +25,8 @@ def execute_action(commands, device_registry):
             print(f"✅ Action executed: {target} - {action}")
         else:
             # Try fuzzy matching
-            possible = difflib.get_close_matches(target, device_registry.keys(), n=1, cutoff=0.5)
-            if possible:
-                match = possible[0]
+            match = matcher_for(device_registry).best_match(target, cutoff=0.5)
+            if match:
                 print(f"✅ Action executed (fuzzy match): {match} - {action}")
             else:
                 print(f"❌ No such device found (even after fuzzy match): {target}")
@@ -55,18 +35,41 @@ def execute_action(commands, device_registry):
 def main():
     print("💡 Smart Home CLI with RAG + Vision AI (Type 'exit' to quit')")
 
-    rag = RAGEngine(kb_path="knowledge.txt")
+    # Heavy components warm up in the background; first use blocks only if not ready yet
+    rag = LazyComponent("RAGEngine", "rag_engine", "RAGEngine", kb_path="knowledge.txt").start()
+    # YOLO runs in worker processes, so camera load never stalls command handling
+    vision = LazyComponent("VisionPool", "vision_pool", "start_pool", workers=2).start()
     state = StateManager(context_file="data/context_summary.json")
-    vision = VisionModule()
 
     # You can periodically update this to your latest CCTV frame
     default_image_path = "frames/latest.jpg"
+    # Every analyzed scene is kept, so "when was someone near the oven?" needs no re-run
+    events = EventStore()
+    # Keeps the default camera's scene fresh in the background
+    vision_worker = VisionWorker(vision, {"default": default_image_path}, events=events).start()
 
     while True:
         user_input = input("\nYou: ").strip()
         if user_input.lower() in ["exit", "quit"]:
+            vision_worker.stop()
+            if vision.ready:
+                vision.close()
             break
 
+        if user_input.lower() == "startup report":
+            print(startup_report([rag, vision]))
+            if vision.ready and vision.cache:
+                print(f"[Vision] Frame cache: {vision.cache.stats()}")
+            if vision.ready and getattr(vision, "controller", None):
+                print(f"[Vision] Adaptive inference: {vision.controller.metrics()}")
+            continue
+
+        # --- "When/where was X" questions, answered from recorded scenes ---
+        event_answer = answer_event_question(events, user_input)
+        if event_answer:
+            print(f"Agent: {event_answer}")
+            continue
+
         # --- Optional: per-command image path override ---
         #   Example: "use frame: frames/livingroom.jpg; turn on the tv where the child is standing"
         image_path = default_image_path
@@ -81,7 +84,11 @@ def main():
 
         # --- Analyze current image frame (non-blocking if missing) ---
         try:
-            image_context = vision.analyze_frame(image_path)
+            if image_path == default_image_path:
+                image_context = vision_worker.get_context("default")
+            else:
+                # Through the worker, so it never runs concurrently with its inference
+                image_context = vision_worker.analyze(image_path)
             print(f"[Vision] {image_path} → {len(image_context.get('detections', []))} detections, "
                   f"{len(image_context.get('relations', []))} relations")
         except Exception as e:
@@ -126,8 +133,14 @@ def main():
 
         if not combined:
             # fallback to RAG if neither LLM nor Vision gave commands
-            answer = rag.query(user_input)
-            print(f"Agent: {answer}")
+            print("Agent: ", end="", flush=True)
+            try:
+                for piece in rag.query_stream(user_input):
+                    print(piece, end="", flush=True)
+                print()
+            except Exception as e:
+                # Warmup failures (e.g. Ollama down) surface here, not at startup
+                print(f"\n[RAG] Knowledge base unavailable ({e})")
             continue   # ✅ still inside while loop
 
         # --- Map child locations to real rooms ---
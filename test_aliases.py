@@ -0,0 +1,129 @@
+# test_aliases.py - Shared alias registry and the parsers built on it
+
+import json
+import os
+import sys
+
+sys.path.insert(0, os.getcwd())
+
+from aliases import AliasRegistry, get_aliases, normalize_name
+
+CONFIG = {
+    "devices": {"light": ["lights", "lamp", "all lights"], "door": ["lock"], "smart_oven": ["oven"]},
+    "locations": {"all": ["unknown"], "living room": ["livingroom", "here"], "front door": []},
+    "actions": {"turn_on": ["turn on"]},
+    "phrases": {
+        "tv": ["smart tv", "television"],
+        "living room": ["where the child is standing", "child standing"],
+        "": ["child is near"],
+    },
+}
+
+
+def _registry(tmp_path, config=CONFIG):
+    path = tmp_path / "aliases.json"
+    path.write_text(json.dumps(config))
+    return AliasRegistry(str(path), check_interval=0)
+
+
+def _old_normalize_name(name):
+    """process_commands.normalize_name before the shared registry."""
+    if not name:
+        return ""
+    name = name.lower().strip()
+    replacements = {
+        "smart tv": "tv",
+        "television": "tv",
+        "where the child is standing": "living room",
+        "child standing": "living room",
+        "child is near": "",
+    }
+    for k, v in replacements.items():
+        if k in name:
+            name = name.replace(k, v)
+    return name.strip()
+
+
+def test_whole_string_lookup(tmp_path):
+    registry = _registry(tmp_path)
+    assert registry.normalize("All_Lights", "devices") == "light"
+    assert registry.normalize("oven", "devices") == "smart_oven"
+    assert registry.normalize("front_door", "locations") == "front door"
+    assert registry.normalize("Turn On", "actions") == "turn_on"
+    # Kinds are separate, and unknown names come back lowercased, underscores kept
+    assert registry.normalize("lamp", "locations") == "lamp"
+    assert registry.normalize("Smart_Meter", "devices") == "smart_meter"
+    assert registry.names("locations") == {"all", "living room", "front door"}
+
+
+def test_canonical_names_are_not_rewritten_piecewise(tmp_path):
+    registry = _registry(tmp_path)
+    assert registry.normalize("door lock", "devices") == "door lock"
+    assert registry.normalize("lamp here", "devices") == "lamp here"
+    assert registry.normalize("start_recording", "actions") == "start_recording"
+
+
+def test_phrases_longest_and_whole_words(tmp_path):
+    registry = _registry(tmp_path)
+    assert registry.rewrite("Smart TV") == "tv"
+    assert registry.rewrite("where the child is standing") == "living room"
+    assert registry.rewrite("child is near the tv") == "the tv"
+    assert registry.rewrite("televisions") == "televisions"
+    assert registry.rewrite("lamp") == "lamp"
+
+
+def test_same_as_old_replacements_for_their_phrases():
+    for name in ["Smart TV", "television", "where the child is standing", "child standing",
+                 "child is near the tv", "tv", "kitchen", "living room", "oven", "lamp", "unknown", ""]:
+        assert normalize_name(name) == _old_normalize_name(name)
+
+
+def test_hot_reload(tmp_path):
+    registry = _registry(tmp_path)
+    version = registry.version
+    assert registry.normalize("telly", "devices") == "telly"
+
+    config = json.loads(json.dumps(CONFIG))
+    config["devices"]["tv"] = ["telly"]
+    path = tmp_path / "aliases.json"
+    path.write_text(json.dumps(config))
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert registry.normalize("telly", "devices") == "tv"
+    assert registry.version == version + 1
+
+    # A broken edit keeps the last good aliases
+    path.write_text("{not json")
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 2_000_000_000))
+    assert registry.normalize("telly", "devices") == "tv"
+
+
+def test_parsers_share_the_registry():
+    import debug_parser
+    import llm_interface
+
+    cmd = {"device": "Lights", "location": "livingroom", "action": "Turn On"}
+    assert llm_interface.normalize_command(dict(cmd)) == {
+        "device": "light", "location": "living room", "action": "turn_on"}
+    assert llm_interface.normalize_command({"device": "lamp", "location": "moon", "action": "off"})["location"] == "all"
+
+    parsed = debug_parser.normalize_command({"device": "all_lights", "location": "kids_room", "action": "turn_on"})
+    assert parsed == {"device": "light", "location": "kids room", "action": "turn_on"}
+    assert debug_parser.normalize_command({"device": "x", "location": "unknown"})["location"] == "all"
+
+    assert "kids room" in get_aliases().names("locations")
+
+
+def test_llm_commands_keep_canonical_names():
+    from llm_interface import normalize_command
+
+    # Regressions: piecewise rewriting used to corrupt these
+    for action in ["start_recording", "status_check", "stop"]:
+        assert normalize_command({"device": "camera", "location": "all", "action": action})["action"] == action
+    for device in ["door lock", "temperature sensor"]:
+        assert normalize_command({"device": device, "location": "all", "action": "turn_on"})["device"] == device
+    # Baseline mappings
+    assert normalize_command({"device": "oven", "location": "kitchen", "action": "turn_on"})["device"] == "smart_oven"
+    assert normalize_command({"device": "temp", "location": "", "action": "get_status"}) == {
+        "device": "thermostat", "location": "all", "action": "get_status"}
+    assert normalize_command({"device": "lock", "location": "unknown", "action": "lock"})["device"] == "door"
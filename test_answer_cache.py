@@ -0,0 +1,75 @@
+# test_answer_cache.py - Cached RAG answers keyed on version and normalized query
+
+import json
+import os
+import sys
+
+sys.path.insert(0, os.getcwd())
+
+from answer_cache import AnswerCache, normalize_query
+from rag_engine import RAGEngine
+
+
+def test_normalized_queries_hit_the_same_entry():
+    assert normalize_query("  Why is the   OVEN hot?? ") == "why is the oven hot"
+    cache = AnswerCache()
+    assert cache.get("v1", "why is the oven hot") is None
+    cache.put("v1", "Why is the oven hot?", "It is preheating.")
+    assert cache.get("v1", "why is the  oven hot") == "It is preheating."
+    # Another index or answerer never sees it
+    assert cache.get("v2", "why is the oven hot") is None
+    assert cache.stats() == {"entries": 1, "hits": 1, "misses": 2, "hit_rate": 1 / 3}
+
+
+def test_lru_bound_and_invalidate():
+    cache = AnswerCache(max_entries=2)
+    cache.put("v1", "a", "A")
+    cache.put("v1", "b", "B")
+    assert cache.get("v1", "a") == "A"  # a becomes most recent
+    cache.put("v2", "c", "C")
+    assert cache.get("v1", "b") is None
+    cache.invalidate(keep_version="v2")
+    assert list(cache.entries) == [("v2", "c")]
+
+
+def test_persistence_is_debounced_and_flushed(tmp_path):
+    path = str(tmp_path / "answers.json")
+    cache = AnswerCache(path=path, save_interval=3600)
+    cache.put("v1", "why", "Because.")
+    assert not os.path.exists(path)  # debounced
+    cache.flush()
+    with open(path, encoding="utf-8") as f:
+        assert json.load(f) == [{"version": "v1", "query": "why", "answer": "Because."}]
+    assert AnswerCache(path=path).get("v1", "Why?") == "Because."
+
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("{broken")
+    assert AnswerCache(path=path).entries == {}
+
+
+class _CountingRetriever:
+    def __init__(self):
+        self.calls = 0
+
+    def invoke(self, query):
+        self.calls += 1
+        return ["doc"]
+
+
+class _EchoAnswerer:
+    def answer(self, query, docs):
+        return f"Answer to {query}"
+
+
+def test_query_serves_repeats_from_the_cache():
+    engine = RAGEngine.__new__(RAGEngine)
+    engine.answer_cache = AnswerCache()
+    engine.retriever = _CountingRetriever()
+    engine.answerer = _EchoAnswerer()
+    engine.index_version, engine.answerer_name = "idx", "extractive"
+
+    first = engine.query("what does the blue light mean")
+    assert engine.query("What does the blue light mean?") == first
+    assert engine.retriever.calls == 1
+    assert "".join(engine.query_stream("what does the blue light mean")) == first
+    assert engine.answer_cache.stats()["hits"] == 2
@@ -0,0 +1,169 @@
+# test_device_catalog.py - One catalog behind list_devices, device_states, control and the firewall
+
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.getcwd())
+
+import device_catalog
+import smart_home_api
+from device_catalog import DeviceCatalog, get_catalog
+from fuzzy_matcher import matcher_for
+from home_topology import get_topology
+from intent_firewall import intent_firewall
+
+CONFIG = {
+    "types": {"lighting": ["turn_on", "turn_off", "get_status"]},
+    "devices": {
+        "kitchen_light": {"type": "lighting", "location": "kitchen", "state": {"status": "off"}},
+        "smart_oven": {"type": "appliance", "location": "kitchen", "aliases": ["oven"],
+                       "capabilities": ["turn_on", "preheat"], "state": {"status": "off"}},
+    },
+    "registry": {
+        "kitchen light": {"id": "kitchen_light", "type": "lighting", "location": "kitchen"},
+        "oven": {"id": "smart_oven", "type": "appliance", "location": "kitchen"},
+        "ghost": {"id": "missing", "type": "appliance", "location": "attic"},
+    },
+}
+
+# list_devices() before the catalog; the curated view must not change
+BASELINE_REGISTRY = {
+    "bedroom light": ("lighting", "bedroom"), "living room light": ("lighting", "living room"),
+    "kitchen light": ("lighting", "kitchen"), "bathroom light": ("lighting", "bathroom"),
+    "hallway light": ("lighting", "hallway"), "front door": ("door", "front"), "back door": ("door", "back"),
+    "garage door": ("door", "garage"), "microwave": ("appliance", "kitchen"), "oven": ("appliance", "kitchen"),
+    "stove": ("appliance", "kitchen"), "coffee maker": ("appliance", "kitchen"), "kettle": ("appliance", "kitchen"),
+    "humidifier": ("climate", "living room"), "air conditioner": ("climate", "bedroom"),
+    "heater": ("climate", "living room"), "bath fan": ("bathroom", "bathroom"), "shower": ("bathroom", "bathroom"),
+    "security camera 1": ("security", "front"), "security camera 2": ("security", "back"),
+    "alarm system": ("security", "whole house"), "sprinkler": ("outdoor", "garden"),
+    "garage light": ("outdoor", "garage"), "outdoor lights": ("outdoor", "yard"),
+    "robot vacuum": ("robot", "whole house"), "washing machine": ("appliance", "laundry room"),
+    "dryer": ("appliance", "laundry room"), "medicine cabinet": ("medicine", "bathroom"),
+}
+
+
+def _write(path, config, bump=0):
+    path.write_text(json.dumps(config))
+    if bump:
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + bump * 1_000_000_000))
+
+
+def test_snapshot_tables(tmp_path):
+    path = tmp_path / "devices.json"
+    _write(path, CONFIG)
+    snapshot = DeviceCatalog(str(path)).snapshot()
+
+    assert snapshot.resolve("smart_oven") == snapshot.resolve("Oven") == snapshot.resolve("smart oven") == "smart_oven"
+    assert snapshot.resolve("kitchen light") == "kitchen_light"
+    assert snapshot.resolve("toaster") is None
+    assert snapshot.by_location["kitchen"] == ("kitchen_light", "smart_oven")
+    assert snapshot.by_type["lighting"] == ("kitchen_light",)
+    assert snapshot.get("oven")["capabilities"] == ("turn_on", "preheat")
+    assert snapshot.get("kitchen_light")["capabilities"] == ("turn_on", "turn_off", "get_status")
+    assert set(snapshot.registry) == {"kitchen light", "oven"}
+    assert snapshot.registry["oven"]["id"] == "smart_oven"
+
+
+def test_snapshots_are_immutable(tmp_path):
+    path = tmp_path / "devices.json"
+    _write(path, CONFIG)
+    snapshot = DeviceCatalog(str(path)).snapshot()
+    with pytest.raises(TypeError):
+        snapshot.devices["smart_oven"]["type"] = "lighting"
+    with pytest.raises(TypeError):
+        snapshot.registry["toaster"] = {}
+    states = snapshot.initial_states()
+    states["smart_oven"]["status"] = "on"
+    assert snapshot.devices["smart_oven"]["state"]["status"] == "off"
+
+
+def test_reload_publishes_new_version(tmp_path):
+    path = tmp_path / "devices.json"
+    _write(path, CONFIG)
+    catalog = DeviceCatalog(str(path), check_interval=0)
+    old = catalog.snapshot()
+    assert catalog.snapshot() is old
+
+    config = json.loads(json.dumps(CONFIG))
+    config["devices"]["toaster"] = {"type": "appliance", "location": "kitchen", "state": {"status": "off"}}
+    config["registry"]["toaster"] = {"id": "toaster", "type": "appliance", "location": "kitchen"}
+    _write(path, config, bump=1)
+    new = catalog.snapshot()
+    assert new.version > old.version
+    assert new.resolve("toaster") == "toaster" and old.resolve("toaster") is None
+    assert matcher_for(new.registry).best_match("tostr") == "toaster"
+
+    # A broken edit keeps the last good snapshot
+    path.write_text("{not json")
+    os.utime(path, ns=(os.stat(path).st_atime_ns, os.stat(path).st_mtime_ns + 2_000_000_000))
+    assert catalog.snapshot() is new
+
+
+def test_device_states_follow_the_catalog(tmp_path, monkeypatch):
+    path = tmp_path / "devices.json"
+    _write(path, CONFIG)
+    original = dict(smart_home_api.device_states)
+    monkeypatch.setattr(device_catalog, "_default", DeviceCatalog(str(path)))
+    try:
+        assert set(smart_home_api.list_devices()) == {"kitchen light", "oven"}
+        assert set(smart_home_api.device_states) == {"kitchen_light", "smart_oven"}
+    finally:
+        monkeypatch.undo()
+        smart_home_api.current_catalog()
+    assert set(smart_home_api.device_states) == set(original)
+
+
+def test_shipped_catalog_is_consistent():
+    snapshot = get_catalog().snapshot()
+    assert set(smart_home_api.device_states) == set(snapshot.devices)
+    assert smart_home_api.list_devices() is snapshot.registry
+    assert list(snapshot.registry) == list(BASELINE_REGISTRY)
+    for name, (device_type, location) in BASELINE_REGISTRY.items():
+        listed = snapshot.registry[name]
+        assert (listed["type"], listed["location"]) == (device_type, location), name
+        assert listed["id"] in smart_home_api.device_states
+    # No name or alias is claimed by two devices
+    owners = {}
+    for device_id, entry in snapshot.devices.items():
+        for name in entry["names"]:
+            assert owners.setdefault(name, device_id) == device_id, name
+    # The home topology places devices where the catalog does
+    for device_id, room in get_topology().device_rooms.items():
+        assert snapshot.devices[device_id]["location"] == room, device_id
+
+
+def test_control_resolves_names_within_the_location():
+    control = smart_home_api.control_device
+    assert "smart tv" in control("tv", "living room", "get_status")
+    assert "smart tv" in control("tv", "all", "get_status")
+    # The name alone must not reach a device in another room
+    assert control("tv", "bedroom", "get_status").startswith("No devices found")
+    backyard = control("security camera", "backyard", "get_status")
+    assert "security camera 2" in backyard and "security camera:" not in backyard
+
+
+def test_control_and_firewall_read_the_catalog():
+    assert "coffee machine" in smart_home_api.control_device("coffee maker", "kitchen", "get_status")
+    assert "smart oven" in smart_home_api.control_device("oven", "kitchen", "get_status")
+
+    # Rules written for "water heater" now also apply to the id and aliases
+    for device in ["water heater", "water_heater", "geyser"]:
+        allowed, msg, confirm = intent_firewall({"device": device, "location": "bathroom", "action": "turn_on"},
+                                                raw_text="turn on water heater to 70")
+        assert not allowed and not confirm, device
+
+
+def test_fuzzy_registry_match_controls_the_catalog_device(monkeypatch):
+    import process_commands
+
+    calls = []
+    monkeypatch.setattr(process_commands, "control_device", lambda *args: calls.append(args[:3]))
+    process_commands.process_commands([{"device": "securty camera 1", "location": "", "action": "get_status"}], "")
+    # Listed at "front", but controlled by id where the catalog puts it
+    assert calls == [("security_camera", "entryway", "get_status")]
+    assert "security camera" in smart_home_api.control_device(*calls[0])
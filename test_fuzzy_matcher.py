@@ -0,0 +1,54 @@
+# test_fuzzy_matcher.py - FuzzyMatcher must agree with difflib.get_close_matches(n=1, cutoff=0.5)
+
+import difflib
+import os
+import random
+import sys
+
+sys.path.insert(0, os.getcwd())
+
+from fuzzy_benchmark import misspell, queries_for, synthetic_registry
+from fuzzy_matcher import FuzzyMatcher, matcher_for
+from smart_home_api import list_devices
+
+
+def _reference(target, names):
+    return difflib.get_close_matches(target, names, n=1, cutoff=0.5)
+
+
+def test_matches_difflib_on_device_registry():
+    names = list(list_devices())
+    matcher = FuzzyMatcher(names)
+    rng = random.Random(0)
+    locations = ["living room", "kitchen", "bedroom", "all", "", "child standing"]
+    targets = [misspell(rng.choice(names), rng) for _ in range(1500)]
+    targets += [f"{misspell(rng.choice(names), rng)} ({rng.choice(locations)})" for _ in range(1500)]
+    targets += ["".join(rng.choice("ab ") for _ in range(rng.randint(0, 6))) for _ in range(300)]
+    for target in targets:
+        assert matcher.close_matches(target) == _reference(target, names), target
+
+
+def test_matches_difflib_on_larger_registry():
+    names = synthetic_registry(500)
+    matcher = FuzzyMatcher(names)
+    for target in queries_for(names, 60):
+        assert matcher.close_matches(target) == _reference(target, names), target
+
+
+def test_ties_and_cutoff():
+    # "ab" vs "ba" share no trigram but still score exactly 0.5
+    assert FuzzyMatcher(["ba"]).best_match("ab") == _reference("ab", ["ba"])[0]
+    # Equal ratios: difflib keeps the larger string
+    names = ["cat", "hat", "bat"]
+    assert FuzzyMatcher(names).best_match("xat") == _reference("xat", names)[0] == "hat"
+    assert FuzzyMatcher(["kitchen light"]).best_match("garage door") is None
+    assert FuzzyMatcher([]).best_match("anything") is None
+    assert FuzzyMatcher(["oven"]).best_match("") is None
+
+
+def test_matcher_is_reused_per_registry():
+    registry = list_devices()
+    assert list_devices() is registry
+    assert matcher_for(registry) is matcher_for(list_devices())
+    other = dict(registry, **{"pool pump": {"type": "outdoor", "location": "garden"}})
+    assert matcher_for(other).best_match("pool pmp") == "pool pump"
@@ -0,0 +1,81 @@
+# test_home_topology.py - Room resolution and exact device keys
+
+import os
+import sys
+
+sys.path.insert(0, os.getcwd())
+
+from home_topology import HomeTopology, get_topology
+from vision_intents import map_child_location
+
+TOPOLOGY = HomeTopology(
+    cameras={"hall_cam": {"room": "entryway"}},
+    objects={"tv": "living room", "oven": "kitchen"},
+    rooms={
+        "living room": {"smart_tv": ["tv"], "living_room_light": ["light", "lamp"]},
+        "kitchen": {"smart_oven": ["oven"], "kitchen_light": ["light"]},
+        "entryway": {"front_door": ["door"]},
+    },
+)
+
+
+def _rel(obj, room=None):
+    rel = {"subject": "person", "relation": "near", "object": obj, "distance": 5.0}
+    if room:
+        rel["room"] = room
+    return rel
+
+
+def test_person_room_precedence():
+    person = [{"label": "person", "confidence": 0.9, "bbox": (0, 0, 1, 1)}]
+    # Zone rooms win, then objects in topology order, then the camera (only with a person in frame)
+    assert TOPOLOGY.person_room({"relations": [_rel("tv"), _rel("oven", room="kitchen")]}) == "kitchen"
+    assert TOPOLOGY.person_room({"relations": [_rel("oven"), _rel("tv")]}) == "living room"
+    assert TOPOLOGY.person_room({"camera": "hall_cam", "detections": person, "relations": []}) == "entryway"
+    assert TOPOLOGY.person_room({"camera": "hall_cam", "detections": [], "relations": []}) is None
+    assert TOPOLOGY.person_room(None) is None
+
+
+def test_resolve_device_aliases():
+    assert TOPOLOGY.resolve_device("kitchen", "light") == "kitchen_light"
+    assert TOPOLOGY.resolve_device("living room", "Lamp") == "living_room_light"
+    assert TOPOLOGY.resolve_device("living room", "smart_tv") == "smart_tv"
+    assert TOPOLOGY.resolve_device("kitchen", "smart oven") == "smart_oven"
+    assert TOPOLOGY.resolve_device("kitchen", "tv") is None
+    assert TOPOLOGY.resolve_device("attic", "light") is None
+
+
+def test_map_child_location_pins_device_key():
+    commands = [
+        {"device": "light", "location": "where the child is standing", "action": "turn_on"},
+        {"device": "tv", "location": "living room", "action": "turn_off"},
+    ]
+    mapped = map_child_location(commands, {"relations": [_rel("oven")]}, TOPOLOGY)
+    assert mapped[0] == {"device": "light", "location": "kitchen", "action": "turn_on", "device_key": "kitchen_light"}
+    assert "device_key" not in mapped[1]
+
+
+def test_resolved_commands_skip_fuzzy_matching(monkeypatch):
+    import process_commands as pc
+
+    def no_fuzzy(*args, **kwargs):
+        raise AssertionError("fuzzy matching used for a resolved command")
+
+    monkeypatch.setattr(pc, "matcher_for", no_fuzzy)
+    commands = map_child_location(
+        [{"device": "oven", "location": "child standing", "action": "turn_off"}],
+        {"relations": [_rel("oven")]},
+    )
+    assert commands[0]["device_key"] == "smart_oven"
+    assert pc.process_commands(commands, "turn off the oven the child is near") == [
+        "✅ Action executed: smart oven (kitchen) - turn_off",
+    ]
+
+
+def test_shipped_topology_covers_vision_rooms():
+    topology = get_topology()
+    for obj in ["tv", "oven", "door", "seating_area"]:
+        assert obj in topology.object_rooms
+    # Every device key in the topology is a real registry key
+    from smart_home_api import device_states
+    assert set(topology.device_rooms) <= set(device_states)
@@ -0,0 +1,98 @@
+# test_lazy_loader.py - Background warmup, blocking first use and failure handling
+
+import os
+import sys
+import threading
+import types
+
+import pytest
+
+sys.path.insert(0, os.getcwd())
+
+from lazy_loader import LazyComponent, startup_report
+
+
+def _fake_module(monkeypatch, name, factory):
+    module = types.ModuleType(name)
+    module.build = factory
+    monkeypatch.setitem(sys.modules, name, module)
+
+
+class _Component:
+    def __init__(self, value):
+        self.value = value
+
+    def query(self, text):
+        return f"{self.value}: {text}"
+
+
+def test_first_use_blocks_until_warmup_finishes(monkeypatch):
+    release = threading.Event()
+    built = []
+
+    def factory(value):
+        release.wait(5)
+        built.append(value)
+        return _Component(value)
+
+    _fake_module(monkeypatch, "fake_heavy", factory)
+    lazy = LazyComponent("Heavy", "fake_heavy", "build", "kb").start()
+    assert not lazy.ready
+    assert "Heavy: warming..." in startup_report([lazy])
+
+    result = []
+    caller = threading.Thread(target=lambda: result.append(lazy.query("why")))
+    caller.start()
+    caller.join(0.1)
+    assert caller.is_alive() and not result  # waiting on the warmup, not building a second copy
+
+    release.set()
+    caller.join(5)
+    assert result == ["kb: why"] and built == ["kb"]
+    assert lazy.ready and lazy.wait_time > 0
+    assert lazy.get() is lazy.get()
+    assert "first-use wait" in startup_report([lazy])
+
+
+def test_get_without_start_builds_in_the_background_thread(monkeypatch):
+    _fake_module(monkeypatch, "fake_light", _Component)
+    lazy = LazyComponent("Light", "fake_light", "build", value=3)
+    assert lazy.value == 3
+    assert lazy._thread is not None
+
+
+def test_construction_errors_are_raised_on_every_use(monkeypatch):
+    def factory():
+        raise ConnectionError("Ollama is not running")
+
+    _fake_module(monkeypatch, "fake_broken", factory)
+    lazy = LazyComponent("Broken", "fake_broken", "build").start()
+    for _ in range(2):
+        with pytest.raises(ConnectionError):
+            lazy.query("why")
+    assert not lazy.ready
+    assert "Broken: failed (Ollama is not running)" in startup_report([lazy])
+
+    missing = LazyComponent("Missing", "no_such_module_here", "build").start()
+    with pytest.raises(ImportError):
+        missing.get()
+
+
+def test_main_keeps_running_when_the_knowledge_base_failed(monkeypatch, capsys):
+    import main
+
+    def factory():
+        raise ConnectionError("Ollama is not running")
+
+    _fake_module(monkeypatch, "fake_rag", factory)
+    assistant = main.SmartHomeAssistantXAI.__new__(main.SmartHomeAssistantXAI)
+    assistant.rag = LazyComponent("RAGEngine", "fake_rag", "build").start()
+
+    inputs = iter(["why is the sky blue", "what is a thermostat", "exit"])
+    monkeypatch.setattr("builtins.input", lambda prompt="": next(inputs))
+    monkeypatch.setattr(main, "query_llm", lambda text: "no command")
+    assistant.run()
+
+    out = capsys.readouterr().out
+    assert out.count("[RAG] Knowledge base unavailable (Ollama is not running)") == 2
+    assert "Goodbye" in out
@@ -0,0 +1,115 @@
+# test_rag_engine.py - Streaming answers match the non-streaming path; query_batch keeps order and per-question errors
+
+import os
+import random
+import sys
+import threading
+
+sys.path.insert(0, os.getcwd())
+
+from rag_engine import RAGEngine
+
+
+def _engine():
+    # Only the post-processing helpers are exercised; skip index/LLM setup
+    return RAGEngine.__new__(RAGEngine)
+
+
+def _chunkings(text, rng, n=20):
+    yield [text]
+    yield list(text)
+    for _ in range(n):
+        cuts = sorted(rng.sample(range(1, len(text)), min(len(text) - 1, rng.randint(1, 12)))) if len(text) > 1 else []
+        bounds = [0] + cuts + [len(text)]
+        yield [text[a:b] for a, b in zip(bounds, bounds[1:])]
+
+
+def test_stream_matches_postprocess_trailing_whitespace():
+    """502-char answer whose last 2 chars are newlines stays under the budget"""
+    engine = _engine()
+    text = "The door is ok. " + "x" * 478 + " Okay,\n\n"
+    assert len(text) == 502
+    expected = engine._postprocess_response(text)
+    for chunks in _chunkings(text, random.Random(0)):
+        assert "".join(engine._stream_postprocess(chunks)) == expected
+
+
+def test_stream_matches_postprocess_randomized():
+    engine = _engine()
+    rng = random.Random(42)
+    words = ["The", "oven", "is", "off.", "Sure,", "Okay,", "As an AI model\n", "light", "\n", "  ", "door.", "x" * 40]
+    for _ in range(300):
+        text = "".join(rng.choice(words) + rng.choice([" ", "", "\n"]) for _ in range(rng.randint(0, 60)))
+        expected = engine._postprocess_response(text)
+        for chunks in _chunkings(text, rng, n=3) if text else [[]]:
+            streamed = "".join(engine._stream_postprocess(chunks))
+            assert streamed == expected, (text, chunks)
+
+
+class _Docs:
+    """Retriever stand-in: one document per query, failing for the given queries."""
+
+    def __init__(self, fail=()):
+        self.fail = set(fail)
+
+    def invoke(self, query):
+        if query in self.fail:
+            raise RuntimeError(f"no index for {query}")
+        return [f"doc:{query}"]
+
+
+class _Answerer:
+    def __init__(self, fail=(), barrier=None):
+        self.fail = set(fail)
+        self.barrier = barrier
+        self.threads = set()
+
+    def answer(self, query, docs):
+        self.threads.add(threading.get_ident())
+        if self.barrier is not None:
+            self.barrier.wait()
+        if query in self.fail:
+            raise RuntimeError("model offline")
+        return f"{query} from {docs[0]}"
+
+
+def _batch_engine(retriever, answerer, batch_error=None):
+    engine = _engine()
+    engine.answer_cache = None
+    engine.retriever = retriever
+    engine.answerer = answerer
+
+    def _retrieve_batch(queries):
+        if batch_error is not None:
+            raise batch_error
+        return [retriever.invoke(q) for q in queries]
+
+    engine._retrieve_batch = _retrieve_batch
+    return engine
+
+
+def test_query_batch_answers_in_input_order_on_a_thread_pool():
+    # Both answers must be in flight at once to get past the barrier
+    answerer = _Answerer(barrier=threading.Barrier(2, timeout=5))
+    engine = _batch_engine(_Docs(), answerer)
+    results = engine.query_batch(["alpha", "beta"], max_workers=2)
+    assert [r["query"] for r in results] == ["alpha", "beta"]
+    assert [r["answer"] for r in results] == ["alpha from doc:alpha", "beta from doc:beta"]
+    assert all(r["error"] is None for r in results)
+    assert len(answerer.threads) == 2
+
+
+def test_query_batch_errors_are_per_question():
+    engine = _batch_engine(_Docs(), _Answerer(fail=["beta"]))
+    results = engine.query_batch(["alpha", "beta", "gamma"])
+    assert [r["answer"] for r in results] == ["alpha from doc:alpha", None, "gamma from doc:gamma"]
+    assert results[1]["error"] == "Generation failed: model offline"
+    assert results[0]["error"] is None and results[2]["error"] is None
+
+
+def test_query_batch_falls_back_to_per_query_retrieval():
+    engine = _batch_engine(_Docs(fail=["beta"]), _Answerer(), batch_error=RuntimeError("search failed"))
+    results = engine.query_batch(["alpha", "beta", "gamma"])
+    assert [r["answer"] for r in results] == ["alpha from doc:alpha", None, "gamma from doc:gamma"]
+    assert results[1]["error"] == "Retrieval failed: no index for beta"
+    assert results[0]["error"] is None and results[2]["error"] is None
@@ -0,0 +1,133 @@
+# test_rag_index.py - Persisted vector index and chunk embedding cache
+
+import os
+import sys
+
+sys.path.insert(0, os.getcwd())
+
+import faiss
+import numpy as np
+import pytest
+
+import rag_index
+from rag_backends import HashingEmbeddings
+from rag_index import EmbeddingCache, build_vectorstore, index_key, load_index, save_index, vectorstore_documents
+
+
+class CountingEmbeddings(HashingEmbeddings):
+    def __init__(self):
+        super().__init__(n_features=64)
+        self.embedded = []
+
+    def embed_documents(self, texts):
+        self.embedded.extend(texts)
+        return super().embed_documents(texts)
+
+
+def test_embedding_cache_hits_and_misses(tmp_path):
+    emb = CountingEmbeddings()
+    cache = EmbeddingCache(str(tmp_path), "hashing-64")
+
+    vectors, keys = cache.embed_documents(["a b", "c d", "a b"], emb)
+    assert vectors.shape == (3, 64)
+    assert emb.embedded == ["a b", "c d"]  # duplicate text embedded once
+    assert (cache.hits, cache.misses) == (1, 2)
+    assert keys[0] == keys[2] != keys[1]
+
+    cache.embed_documents(["c d", "e f"], emb)
+    assert emb.embedded == ["a b", "c d", "e f"]
+    assert (cache.hits, cache.misses) == (2, 3)
+
+
+def test_embedding_cache_prune_and_reload(tmp_path):
+    emb = CountingEmbeddings()
+    cache = EmbeddingCache(str(tmp_path), "hashing-64")
+    _, keys = cache.embed_documents(["old chunk", "kept chunk"], emb)
+    cache.prune([keys[1]])
+    assert list(cache.vectors) == [keys[1]]
+    cache.save()
+
+    reloaded = EmbeddingCache(str(tmp_path), "hashing-64")
+    assert list(reloaded.vectors) == [keys[1]]
+    reloaded.embed_documents(["kept chunk", "old chunk"], emb)
+    assert (reloaded.hits, reloaded.misses) == (1, 1)
+
+
+def test_embedding_cache_is_per_model(tmp_path):
+    a = EmbeddingCache(str(tmp_path), "model-a")
+    b = EmbeddingCache(str(tmp_path), "model-b")
+    assert a.chunk_key("same text") != b.chunk_key("same text")
+    assert a.path != b.path
+
+
+def _vectorstore(texts, emb):
+    return build_vectorstore(texts, emb.embed_documents(texts), [{"n": i} for i in range(len(texts))], emb, "flat")
+
+
+def test_index_key_tracks_content_model_and_splitter(tmp_path):
+    kb = tmp_path / "kb.txt"
+    kb.write_text("thermostat manual")
+    key = index_key(str(kb), "model-a", 800, 200)
+    assert index_key(str(kb), "model-a", 800, 200) == key
+    os.utime(kb, (0, 0))  # mtime alone does not change the content hash
+    assert index_key(str(kb), "model-a", 800, 200) == key
+    assert index_key(str(kb), "model-b", 800, 200) != key
+    assert index_key(str(kb), "model-a", 400, 200) != key
+    kb.write_text("thermostat manual v2")
+    assert index_key(str(kb), "model-a", 800, 200) != key
+
+
+def test_save_and_load_index_round_trip(tmp_path):
+    emb = HashingEmbeddings(n_features=64)
+    texts = ["reset the thermostat", "dim the kitchen light", "lock the front door"]
+    vectorstore = _vectorstore(texts, emb)
+    save_index(vectorstore, str(tmp_path), "k1")
+
+    assert load_index(str(tmp_path), "missing", emb) is None
+    loaded = load_index(str(tmp_path), "k1", emb)
+    assert [(d.page_content, d.metadata) for _, d in vectorstore_documents(loaded)] == [
+        (t, {"n": i}) for i, t in enumerate(texts)]
+    query = "front door lock"
+    assert [d.page_content for d in loaded.similarity_search(query, k=2)] == [
+        d.page_content for d in vectorstore.similarity_search(query, k=2)]
+
+    # A chunks file that disagrees with the index is a miss, not a crash
+    with open(tmp_path / "k1" / rag_index.CHUNKS_FILE, "w") as f:
+        f.write('{"key": "k1", "chunks": []}')
+    assert load_index(str(tmp_path), "k1", emb) is None
+
+
+def test_load_index_falls_back_when_mmap_is_unsupported(tmp_path, monkeypatch):
+    emb = HashingEmbeddings(n_features=64)
+    save_index(_vectorstore(["a chunk", "another chunk"], emb), str(tmp_path), "k1")
+
+    read_index = faiss.read_index
+    flags = []
+
+    def no_mmap(path, *args):
+        flags.append(args)
+        if args:
+            raise RuntimeError("mmap not supported for this index type")
+        return read_index(path)
+
+    monkeypatch.setattr(rag_index.faiss, "read_index", no_mmap)
+    loaded = load_index(str(tmp_path), "k1", emb)
+    assert flags == [(faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY,), ()]
+    assert loaded.index.ntotal == 2
+    assert np.isfinite(loaded.index.reconstruct(0)).all()
+
+
+def test_choose_index_type_thresholds():
+    cases = {0: "flat", 19_999: "flat", 20_000: "hnsw", 299_999: "hnsw", 300_000: "ivf",
+             1_999_999: "ivf", 2_000_000: "ivfpq"}
+    assert {n: rag_index.choose_index_type(n) for n in cases} == cases
+
+
+def test_small_corpora_fall_back_from_trained_indexes():
+    vectors = np.random.default_rng(0).standard_normal((100, 16)).astype(np.float32)
+    assert isinstance(rag_index.build_faiss_index(vectors[:50], "ivf"), faiss.IndexFlatL2)
+    # IVF-PQ needs 39 points per PQ centroid; below that it is built as plain IVF
+    assert isinstance(rag_index.build_faiss_index(vectors, "ivfpq"), faiss.IndexIVFFlat)
+    assert isinstance(rag_index.build_faiss_index(vectors, "auto"), faiss.IndexFlatL2)
+    with pytest.raises(ValueError):
+        rag_index.build_faiss_index(vectors, "lsh")
@@ -0,0 +1,108 @@
+# test_rag_lexical.py - BM25 scoring and hybrid lexical/vector routing
+
+import math
+import os
+import random
+import sys
+from collections import Counter
+
+sys.path.insert(0, os.getcwd())
+
+from langchain_core.documents import Document
+
+from rag_lexical import BM25Index, HybridRetriever, tokenize
+
+TEXTS = [
+    "To reset the smart thermostat hold the button for ten seconds.",
+    "The kitchen light supports dimming from the app.",
+    "Lock the front door at night from the security menu.",
+    "The kitchen oven preheats in about ten minutes.",
+]
+
+
+class FakeVectorstore:
+    def __init__(self, docs):
+        self.docs = docs
+        self.calls = []
+
+    def similarity_search(self, query, k=5):
+        self.calls.append(query)
+        return self.docs[::-1][:k]
+
+
+def _retriever(**kwargs):
+    docs = [Document(page_content=t) for t in TEXTS]
+    vs = FakeVectorstore(docs)
+    return HybridRetriever(vectorstore=vs, bm25=BM25Index(TEXTS), documents=docs, k=2, **kwargs), vs
+
+
+def test_tokenize_drops_stopwords():
+    assert tokenize("How do I reset the Thermostat?") == ["reset", "thermostat"]
+
+
+def test_bm25_ranks_matching_chunk_first():
+    bm25 = BM25Index(TEXTS)
+    hits = bm25.search("reset thermostat", k=3)
+    assert hits[0][0] == 0
+    assert len(hits) == 1  # only chunks sharing a term are scored
+    assert bm25.search("unknownword") == []
+    # Shared term "kitchen": both kitchen chunks, ties broken by index
+    assert [i for i, _ in bm25.search("kitchen", k=5)] == [1, 3]
+
+
+def _reference_search(texts, query, k, k1=1.5, b=0.75):
+    """The per-posting loop BM25Index.search replaced."""
+    docs = [Counter(tokenize(t)) for t in texts]
+    lengths = [sum(d.values()) for d in docs]
+    avg = sum(lengths) / len(lengths)
+    scores = {}
+    for term in set(tokenize(query)):
+        df = sum(1 for d in docs if term in d)
+        if not df:
+            continue
+        idf = math.log(1 + (len(docs) - df + 0.5) / (df + 0.5))
+        for i, d in enumerate(docs):
+            if term in d:
+                norm = k1 * (1 - b + b * lengths[i] / avg)
+                scores[i] = scores.get(i, 0.0) + idf * d[term] * (k1 + 1) / (d[term] + norm)
+    return sorted(scores.items(), key=lambda kv: (-kv[1], kv[0]))[:k]
+
+
+def test_bm25_matches_reference_scoring():
+    rng = random.Random(0)
+    vocab = ["reset", "thermostat", "kitchen", "light", "door", "lock", "oven", "app", "wifi", "night"]
+    texts = [" ".join(rng.choice(vocab) for _ in range(rng.randint(1, 12))) for _ in range(300)]
+    bm25 = BM25Index(texts)
+    for _ in range(200):
+        query = " ".join(rng.choice(vocab + ["missing"]) for _ in range(rng.randint(1, 4)))
+        k = rng.randint(1, 20)
+        got, expected = bm25.search(query, k), _reference_search(texts, query, k)
+        assert [round(s, 9) for _, s in got] == [round(s, 9) for _, s in expected], query
+        # Same documents, up to the order of (float-)equal scores
+        assert sorted((round(s, 9), i) for i, s in got) == sorted((round(s, 9), i) for i, s in expected), query
+
+
+def test_hybrid_answers_confident_queries_lexically():
+    retriever, vs = _retriever(min_lexical_score=0.5)
+    docs = retriever.invoke("reset thermostat")
+    assert docs[0].page_content == TEXTS[0]
+    assert vs.calls == []
+    assert retriever.lexical_share() == 1.0
+
+
+def test_hybrid_falls_back_to_vectors_when_ambiguous():
+    retriever, vs = _retriever(min_lexical_score=0.5)
+    docs = retriever.invoke("kitchen")  # two chunks tie on BM25
+    assert vs.calls == ["kitchen"]
+    assert len(docs) == 2
+    assert retriever.lexical_share() == 0.0
+
+    retriever, vs = _retriever(min_lexical_score=0.5, fuse=False)
+    docs = retriever.invoke("kitchen")
+    assert [d.page_content for d in docs] == TEXTS[::-1][:2]
+
+
+def test_hybrid_without_lexical_hits_uses_vectors():
+    retriever, vs = _retriever()
+    docs = retriever.invoke("completely unrelated words")
+    assert vs.calls and [d.page_content for d in docs] == TEXTS[::-1][:2]
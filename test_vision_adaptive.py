@@ -0,0 +1,85 @@
+# test_vision_adaptive.py - Latency-budgeted model/size switching
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.getcwd())
+
+import vision_module
+from vision_adaptive import AdaptiveController
+from vision_module import VisionModule
+
+
+def _run(controller, ms, calls=1):
+    for _ in range(calls):
+        settings = controller.choose()
+        controller.record(ms / 1000.0)
+    return settings
+
+
+def test_downgrades_to_the_largest_level_that_fits():
+    # Levels by cost: n@320, s@320, n@640, s@640
+    controller = AdaptiveController(100, models=("yolov8n.pt", "yolov8s.pt"), sizes=(320, 640),
+                                    start=("yolov8s.pt", 640), alpha=1.0)
+    assert _run(controller, 300) == {"model": "yolov8s.pt", "imgsz": 640}
+    assert controller.choose() == {"model": "yolov8n.pt", "imgsz": 640}
+    assert controller.ewma_ms == pytest.approx(300 * 8.7 / 28.6)
+    assert controller.counts["downgrades"] == 1
+
+    # Far over budget: nothing fits, so the cheapest level
+    _run(controller, 5000)
+    assert controller.choose() == {"model": "yolov8n.pt", "imgsz": 320}
+
+
+def test_upgrades_one_level_after_enough_calls_under_budget():
+    controller = AdaptiveController(100, models=("yolov8n.pt", "yolov8s.pt"), sizes=(320, 640),
+                                    start=("yolov8n.pt", 320), alpha=1.0, upgrade_after=3)
+    _run(controller, 10, calls=3)
+    assert controller.current == {"model": "yolov8n.pt", "imgsz": 320}
+    assert controller.choose() == {"model": "yolov8s.pt", "imgsz": 320}
+    assert controller.counts["upgrades"] == 1
+
+    # No upgrade when the next level's estimate leaves no headroom
+    controller = AdaptiveController(100, models=("yolov8n.pt",), sizes=(320, 640),
+                                    start=("yolov8n.pt", 320), alpha=1.0, upgrade_after=3)
+    _run(controller, 25, calls=5)  # n@640 is 4x the pixels: 100 ms > 80 ms
+    assert controller.current == {"model": "yolov8n.pt", "imgsz": 320}
+
+
+def test_failed_upgrade_doubles_the_wait_and_a_held_one_resets_it():
+    controller = AdaptiveController(100, models=("yolov8n.pt",), sizes=(320, 640),
+                                    start=("yolov8n.pt", 320), alpha=1.0, upgrade_after=2)
+    _run(controller, 20, calls=2)
+    assert _run(controller, 150)["imgsz"] == 640  # upgraded (estimate 80 ms), then overshot
+    assert controller.choose()["imgsz"] == 320
+    assert controller.upgrade_after == 4
+
+    _run(controller, 20, calls=3)
+    assert controller.choose()["imgsz"] == 320
+    controller.record(0.02)
+    assert controller.choose()["imgsz"] == 640
+
+    # Four calls under budget at the new level: the upgrade held
+    _run(controller, 70, calls=4)
+    assert controller.current["imgsz"] == 640
+    assert controller.upgrade_after == 2 and controller.counts["downgrades"] == 1
+
+
+def test_batched_inference_is_charged_per_image(monkeypatch):
+    clock = [0.0]
+    monkeypatch.setattr(vision_module.time, "perf_counter", lambda: clock[0])
+
+    def model(source, imgsz=None, **kwargs):
+        clock[0] += 0.04 * (len(source) if isinstance(source, list) else 1)
+        return []
+
+    vision = VisionModule.__new__(VisionModule)
+    vision.controller = AdaptiveController(100, models=("yolov8n.pt",), sizes=(640,))
+    vision.models = {"yolov8n.pt": model}
+
+    vision._infer(["a.jpg", "b.jpg", "c.jpg", "d.jpg"])
+    vision._infer("a.jpg")
+    assert list(vision.controller.history) == pytest.approx([40.0, 40.0])
+    assert vision.controller.counts["over_budget"] == 0
@@ -0,0 +1,53 @@
+# test_vision_cache.py - Frame cache keys and LRU behaviour
+
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.getcwd())
+
+from vision_cache import FrameCache, frame_key
+
+
+def test_frame_key_for_files_tracks_mtime_and_size(tmp_path):
+    path = tmp_path / "latest.jpg"
+    path.write_bytes(b"frame-1")
+    key = frame_key(str(path))
+    assert frame_key(str(path)) == key
+
+    path.write_bytes(b"frame-22")
+    assert frame_key(str(path)) != key
+
+    # Same bytes rewritten: content_hash keys stay equal even though mtime moves
+    hashed = frame_key(str(path), content_hash=True)
+    time.sleep(0.01)
+    path.write_bytes(b"frame-22")
+    os.utime(path, (time.time() + 5, time.time() + 5))
+    assert frame_key(str(path), content_hash=True) == hashed
+
+
+def test_frame_key_for_arrays_uses_content():
+    a = np.zeros((4, 4, 3), dtype=np.uint8)
+    b = a.copy()
+    assert frame_key(a) == frame_key(b)
+    b[0, 0, 0] = 1
+    assert frame_key(a) != frame_key(b)
+    assert frame_key(a) != frame_key(a.reshape(8, 2, 3))
+
+
+def test_frame_cache_lru_and_copies():
+    cache = FrameCache(max_entries=2)
+    result = {"detections": [{"label": "person"}], "relations": []}
+    cache.put("a", result)
+    cache.put("b", result)
+    assert cache.get("a") is not None  # a becomes most recent
+    cache.put("c", result)
+    assert cache.get("b") is None
+    assert cache.get("c") is not None
+
+    got = cache.get("a")
+    got["detections"].append({"label": "tv"})
+    assert len(cache.get("a")["detections"]) == 1
+    assert cache.stats()["hits"] == 4 and cache.stats()["misses"] == 1
@@ -0,0 +1,195 @@
+# test_vision_events.py - Partitioned detection/relation event store
+
+import datetime
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.getcwd())
+
+from vision_events import EventStore, answer_event_question
+
+DAY = 86400.0
+# 2026-10-01 00:00 UTC
+T0 = datetime.datetime(2026, 10, 1, tzinfo=datetime.timezone.utc).timestamp()
+
+
+def _context(*objects, room=None):
+    return {
+        "detections": [{"label": "person", "confidence": 0.91, "bbox": (10.4, 20.6, 110.0, 300.2)}],
+        "relations": [
+            {"subject": "person", "relation": "near", "object": obj, "distance": 42.5, "room": room}
+            for obj in objects
+        ],
+    }
+
+
+def test_query_by_object_and_time_range_across_days(tmp_path):
+    store = EventStore(str(tmp_path))
+    store.record("kitchen", _context("oven", room="kitchen"), T0 + 100)
+    store.record("kitchen", _context("oven"), T0 + DAY + 50)
+    store.record("hall", _context("door"), T0 + DAY + 60)
+    store.record("kitchen", _context("oven", "tv"), T0 + 2 * DAY + 10)
+
+    events = store.query("oven", start=T0, end=T0 + 3 * DAY)
+    assert [e["time"] for e in events] == [T0 + 100, T0 + DAY + 50, T0 + 2 * DAY + 10]
+    assert events[0]["room"] == "kitchen" and events[1]["room"] is None
+    assert events[0]["distance"] == 42.5 and events[0]["camera"] == "kitchen"
+
+    assert [e["time"] for e in store.query("oven", start=T0 + DAY, end=T0 + 2 * DAY)] == [T0 + DAY + 50]
+    assert store.count("oven", start=T0, end=T0 + 3 * DAY) == 3
+    assert store.count("oven", start=T0, end=T0 + 3 * DAY, camera_id="hall") == 0
+    assert store.query("oven", start=T0, end=T0 + 3 * DAY, limit=1)[0]["time"] == T0 + 2 * DAY + 10
+    assert store.query("sofa", start=T0, end=T0 + 3 * DAY) == []
+    assert sorted(os.listdir(tmp_path / "kitchen")) == ["2026-10-01", "2026-10-02", "2026-10-03"]
+
+
+def test_last_and_reload_from_disk(tmp_path):
+    store = EventStore(str(tmp_path))
+    store.record("hall", _context("door"), T0 + 10)
+    store.record("hall", _context("door"), T0 + 20)
+    store.record("hall", _context("tv"), T0 + 5 * DAY)
+
+    # A fresh store reads the files and vocabulary back
+    reopened = EventStore(str(tmp_path))
+    assert reopened.last("door", before=T0 + 6 * DAY)["time"] == T0 + 20
+    assert reopened.last("door", before=T0 + 15)["time"] == T0 + 10
+    assert reopened.last("door", before=T0 + 5) is None
+
+    # Appends after the first query extend the index incrementally
+    store.record("hall", _context("door"), T0 + 5 * DAY + 1)
+    assert reopened.last("door", before=T0 + 6 * DAY)["time"] == T0 + 5 * DAY + 1
+
+
+def test_detections_are_quantized(tmp_path):
+    store = EventStore(str(tmp_path))
+    store.record("hall", _context(), T0 + 1)
+    (det,) = store.detections("person", start=T0, end=T0 + 2)
+    assert det["bbox"] == (10, 21, 110, 300)
+    assert abs(det["confidence"] - 0.91) < 1 / 255
+
+
+def test_prune_drops_old_partitions(tmp_path):
+    store = EventStore(str(tmp_path))
+    store.record("hall", _context("door"), T0)
+    store.record("hall", _context("door"), T0 + 40 * DAY)
+    store.prune(keep_days=30, now=T0 + 40 * DAY)
+    assert store.count("door", start=T0 - DAY, end=T0 + 41 * DAY) == 1
+
+
+def test_answer_event_question(tmp_path):
+    store = EventStore(str(tmp_path))
+    now = T0 + 3 * DAY
+    store.record("kitchen", _context("oven", room="kitchen"), now - 3600)
+
+    assert "person near oven in the kitchen" in answer_event_question(
+        store, "When was someone last near the oven?", now=now)
+    assert answer_event_question(store, "when was anyone near the door", now=now).startswith("I have no record")
+    assert answer_event_question(store, "turn off the oven", now=now) is None
+
+
+def test_device_questions_are_left_to_the_command_pipeline(tmp_path):
+    store = EventStore(str(tmp_path))
+    now = T0 + 3 * DAY
+    # Neither with an empty store nor with events for those objects
+    for _ in range(2):
+        for text in ["was the tv turned off?", "did the door get locked", "has the oven been turned off",
+                     "when did i turn on the tv"]:
+            assert answer_event_question(store, text, now=now) is None, text
+        store.record("kitchen", _context("oven", "tv", "door"), now - 60)
+    assert answer_event_question(store, "was anyone near the tv?", now=now).startswith("Last seen")
+    assert answer_event_question(store, "has the door been approached today", now=now) is not None
+
+
+class _SceneVision:
+    """Stands in for VisionModule: returns whatever scene is set."""
+
+    def __init__(self, context):
+        self.context = context
+
+    def analyze_frame(self, frame, camera_id=None):
+        return self.context
+
+
+def test_worker_records_scene_changes_not_every_refresh(tmp_path, monkeypatch):
+    import vision_worker
+    from vision_worker import VisionWorker
+
+    clock = [T0]
+    monkeypatch.setattr(vision_worker.time, "time", lambda: clock[0])
+    store = EventStore(str(tmp_path))
+    vision = _SceneVision(_context("oven"))
+    worker = VisionWorker(vision, {"kitchen": "frame.jpg"}, events=store, record_every=60.0)
+
+    # Same scene once a second (cache hits, a person standing still): one write, then a heartbeat
+    for _ in range(90):
+        worker.refresh("kitchen")
+        clock[0] += 1.0
+    assert store.count("oven", start=T0 - 1, end=clock[0]) == 2
+
+    # A new relation is written at once
+    vision.context = _context("oven", "tv")
+    worker.refresh("kitchen")
+    assert store.count("tv", start=T0 - 1, end=clock[0]) == 1
+    assert store.count("oven", start=T0 - 1, end=clock[0]) == 3
+
+
+class _CountingVision:
+    def __init__(self):
+        self.calls = 0
+        self.error = None
+
+    def analyze_frame(self, frame, camera_id=None):
+        self.calls += 1
+        if self.error is not None:
+            raise self.error
+        return _context("oven")
+
+
+def test_worker_refreshes_only_stale_contexts(monkeypatch):
+    import vision_worker
+    from vision_worker import VisionWorker
+
+    clock = [T0]
+    monkeypatch.setattr(vision_worker.time, "time", lambda: clock[0])
+    vision = _CountingVision()
+    worker = VisionWorker(vision, {"kitchen": "frame.jpg"}, max_age=5.0)
+
+    assert worker.context_age("kitchen") is None
+    first = worker.get_context("kitchen")  # missing: analyzed synchronously
+    assert first["camera"] == "kitchen" and vision.calls == 1
+    clock[0] += 5.0
+    assert worker.get_context("kitchen") is first and worker.context_age("kitchen") == 5.0
+    assert worker.get_context("kitchen", max_age=2.0) is not first  # per-call bound
+    assert vision.calls == 2
+
+    clock[0] += 6.0
+    vision.error = RuntimeError("camera offline")
+    with pytest.raises(RuntimeError):
+        worker.get_context("kitchen")
+
+
+def test_worker_thread_keeps_refreshing_until_stopped():
+    from vision_worker import VisionWorker
+
+    vision = _CountingVision()
+    worker = VisionWorker(vision, {"kitchen": "frame.jpg", "hall": "hall.jpg"}, interval=0.01).start()
+    deadline = time.monotonic() + 5
+    while vision.calls < 6 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert worker.get_context("kitchen", max_age=60)["camera"] == "kitchen"
+
+    # A failing camera is recorded and the thread keeps going
+    vision.error = RuntimeError("camera offline")
+    calls = vision.calls
+    while vision.calls < calls + 4 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert worker.last_errors == {"kitchen": "camera offline", "hall": "camera offline"}
+
+    worker.stop(timeout=2)
+    assert worker._thread is None
+    calls = vision.calls
+    time.sleep(0.05)
+    assert vision.calls == calls
@@ -0,0 +1,231 @@
+# test_vision_intents.py - Rule-table vision intents vs the original substring checks
+
+import itertools
+import os
+import random
+import sys
+
+sys.path.insert(0, os.getcwd())
+
+from keyword_automaton import KeywordAutomaton
+from vision_intents import _cmd, derive_commands_from_vision
+
+
+def _any_near(image_context, object_name):
+    return any(rel.get("subject") == "person" and
+               rel.get("relation") == "near" and
+               rel.get("object") == object_name
+               for rel in image_context.get("relations", []))
+
+def _reference_derive(user_text, image_context):
+    """Pre-rule-table implementation (dedup fixed to return its result)."""
+    if not image_context:
+        return []
+
+    text = (user_text or "").lower()
+    rels = image_context.get("relations", [])
+    dets = image_context.get("detections", [])
+
+    commands = []
+
+    # 1) TV: “turn on the tv where the child/person is standing”, “play”, “mute if nobody there”
+    if "tv" in text or "television" in text or "screen" in text:
+        if _any_near(image_context, "tv"):
+            # Person near TV → operate living room TV (assumption)
+            if any(k in text for k in ["turn on", "switch on", "play"]):
+                commands.append(_cmd("smart_tv", "living room", "turn_on"))
+            if "mute" in text:
+                commands.append(_cmd("smart_tv", "living room", "set_volume", 0))
+            if "turn off" in text or "switch off" in text:
+                commands.append(_cmd("smart_tv", "living room", "turn_off"))
+
+    # If a person near TV but user asked generic “turn on tv where child is standing”
+    if ("turn on" in text and "tv" in text and "where" in text) and _any_near(image_context, "tv"):
+        commands.append(_cmd("smart_tv", "living room", "turn_on"))
+
+    # 2) Oven/Stove: “child near oven, turn it off” / “preheat if someone is in kitchen”
+    if "oven" in text or "stove" in text or "microwave" in text:
+        if _any_near(image_context, "oven"):
+            if any(k in text for k in ["turn off", "switch off", "stop"]):
+                commands.append(_cmd("smart_oven", "kitchen", "turn_off"))
+            if any(k in text for k in ["turn on", "preheat", "start"]):
+                commands.append(_cmd("smart_oven", "kitchen", "turn_on"))
+
+    # “child is near oven, turn it off” even if not explicitly saying oven in text
+    if ("child" in text or "kid" in text or "person" in text) and _any_near(image_context, "oven"):
+        if any(k in text for k in ["turn off", "switch off", "stop", "make safe", "shut"]):
+            commands.append(_cmd("smart_oven", "kitchen", "turn_off"))
+
+    # 3) Lights: “lights where the person is → on”, “dim if nobody around screen/sofa”
+    if "light" in text or "lights" in text or "lamp" in text:
+        if _any_near(image_context, "seating_area") or _any_near(image_context, "tv"):
+            if any(k in text for k in ["turn on", "switch on"]):
+                commands.append(_cmd("livingroom_light", "living room", "turn_on"))
+            if "dim" in text:
+                commands.append(_cmd("livingroom_light", "living room", "set_brightness", 40))
+            if "turn off" in text:
+                commands.append(_cmd("livingroom_light", "living room", "turn_off"))
+
+    # 4) Thermostat: presence-based tweaks
+    if "thermostat" in text or "temperature" in text:
+        if any(r["subject"] == "person" for r in rels):
+            # If people present, a gentle comfort nudge if user asks
+            if any(k in text for k in ["warmer", "increase", "raise", "heat"]):
+                commands.append(_cmd("smart_thermostat", "hallway", "set_temperature", 24))
+            if any(k in text for k in ["cooler", "decrease", "lower", "ac"]):
+                commands.append(_cmd("smart_thermostat", "hallway", "set_temperature", 20))
+
+    # 5) Robot vacuum: avoid if people in seating area; start if user asks and no one near seating
+    if "vacuum" in text or "robot" in text or "clean" in text:
+        if "start" in text or "begin" in text:
+            if not _any_near(image_context, "seating_area"):
+                commands.append(_cmd("robot_vacuum", "living room", "start"))
+        if "dock" in text or "stop" in text or "pause" in text:
+            commands.append(_cmd("robot_vacuum", "living room", "dock"))
+
+    # 6) Sprinklers: don’t run if people detected on lawn (if your camera watches lawn)
+    if "sprinkler" in text or "sprinklers" in text or "water lawn" in text:
+        # If people are in frame and user says start, choose not to add start (pure vision logic)
+        if "start" in text or "run" in text or "turn on" in text:
+            if not any(d["label"] == "person" for d in dets):
+                commands.append(_cmd("sprinkler_system", "front yard", "start"))
+        if "stop" in text or "turn off" in text:
+            commands.append(_cmd("sprinkler_system", "front yard", "stop"))
+
+    # 7) Security camera: if user mentions “where person is” → focus, record, snapshot
+    if "camera" in text or "security" in text:
+        if any(d["label"] == "person" for d in dets):
+            if "record" in text or "start recording" in text:
+                commands.append(_cmd("security_camera", "entryway", "start_recording"))
+            if "snapshot" in text or "photo" in text or "snap" in text:
+                commands.append(_cmd("security_camera", "entryway", "snapshot"))
+            if "on" in text or "enable" in text:
+                commands.append(_cmd("security_camera", "entryway", "turn_on"))
+            if "off" in text or "disable" in text:
+                commands.append(_cmd("security_camera", "entryway", "turn_off"))
+
+    # 8) Door/Lock: “open/lock the door where the person is”
+    if "door" in text or "lock" in text:
+        if _any_near(image_context, "door"):
+            if "unlock" in text or "open" in text:
+                commands.append(_cmd("smart_lock", "front door", "unlock"))
+            if "lock" in text or "close" in text:
+                commands.append(_cmd("smart_lock", "front door", "lock"))
+
+    # Dedup (device+location+action)
+    seen = set()
+    deduped = []
+    for c in commands:
+        key = (c.get("device"), c.get("location"), c.get("action"), c.get("value"))
+        if key not in seen:
+            seen.add(key)
+            deduped.append(c)
+    return deduped
+
+
+UTTERANCES = [
+    "turn on the tv where the child is standing",
+    "Switch on the TV and mute it",
+    "play something on the screen",
+    "turn off the television",
+    "the child is near the oven, turn it off",
+    "kid near stove, make safe",
+    "preheat the oven",
+    "stop the microwave",
+    "person in kitchen, shut it",
+    "turn on the lights where I am",
+    "dim the lamp",
+    "turn off the light",
+    "make it warmer on the thermostat",
+    "lower the temperature, the ac is weak",
+    "start the robot vacuum",
+    "begin cleaning",
+    "dock the vacuum",
+    "start the sprinklers",
+    "water lawn now, run it",
+    "stop sprinkler",
+    "security camera start recording",
+    "take a snapshot with the camera",
+    "turn the camera on",
+    "disable the security camera",
+    "unlock the door where the person is",
+    "lock the front door",
+    "close the door and open the lock",
+    "what is the weather",
+    "",
+]
+
+KEYWORDS = sorted({
+    "tv", "television", "screen", "turn on", "switch on", "play", "mute", "turn off", "switch off", "where",
+    "oven", "stove", "microwave", "stop", "preheat", "start", "child", "kid", "person", "make safe", "shut",
+    "light", "lights", "lamp", "dim", "thermostat", "temperature", "warmer", "increase", "raise", "heat",
+    "cooler", "decrease", "lower", "ac", "vacuum", "robot", "clean", "begin", "dock", "pause", "sprinkler",
+    "sprinklers", "water lawn", "run", "camera", "security", "record", "start recording", "snapshot", "photo",
+    "snap", "on", "enable", "off", "disable", "door", "lock", "unlock", "open", "close",
+})
+
+
+def _context(near, person_detected):
+    return {
+        "detections": [{"label": "person" if person_detected else "cat", "confidence": 0.9, "bbox": (0, 0, 1, 1)}],
+        "relations": [{"subject": "person", "relation": "near", "object": obj, "distance": 10.0} for obj in near],
+    }
+
+
+def _contexts():
+    objects = ["tv", "oven", "seating_area", "door"]
+    for n in range(len(objects) + 1):
+        for near in itertools.combinations(objects, n):
+            for person_detected in (False, True):
+                yield _context(near, person_detected)
+
+
+def test_matches_reference_on_utterances():
+    for context in _contexts():
+        for text in UTTERANCES:
+            assert derive_commands_from_vision(text, context) == _reference_derive(text, context), text
+
+
+def test_matches_reference_on_random_keyword_mixes():
+    rng = random.Random(0)
+    contexts = list(_contexts())
+    for _ in range(3000):
+        words = rng.sample(KEYWORDS, rng.randint(1, 5))
+        text = " ".join(w.upper() if rng.random() < 0.2 else w for w in words)
+        context = rng.choice(contexts)
+        assert derive_commands_from_vision(text, context) == _reference_derive(text, context), text
+
+
+def test_pinned_outputs():
+    context = _context(["tv", "oven"], person_detected=True)
+    assert derive_commands_from_vision("turn on the tv where the child is standing", context) == [
+        _cmd("smart_tv", "living room", "turn_on"),
+    ]
+    assert derive_commands_from_vision("child near the oven, turn off everything and mute the tv", context) == [
+        _cmd("smart_tv", "living room", "set_volume", 0),
+        _cmd("smart_tv", "living room", "turn_off"),
+        _cmd("smart_oven", "kitchen", "turn_off"),
+    ]
+    assert derive_commands_from_vision("start the vacuum", _context(["seating_area"], True)) == []
+    assert derive_commands_from_vision("start the vacuum", _context([], False)) == [
+        _cmd("robot_vacuum", "living room", "start"),
+    ]
+    assert derive_commands_from_vision("turn on the tv", None) == []
+
+
+def test_returned_commands_are_independent_copies():
+    context = _context(["tv"], person_detected=True)
+    first = derive_commands_from_vision("turn on the tv", context)
+    first[0]["location"] = "kitchen"
+    assert derive_commands_from_vision("turn on the tv", context)[0]["location"] == "living room"
+
+
+def test_automaton_finds_every_substring_occurrence():
+    rng = random.Random(1)
+    for _ in range(2000):
+        keywords = list({"".join(rng.choice("ab ") for _ in range(rng.randint(1, 4))) for _ in range(6)})
+        text = "".join(rng.choice("abc ") for _ in range(rng.randint(0, 20)))
+        automaton = KeywordAutomaton(keywords)
+        assert automaton.find(text) == {k for k in keywords if k in text}
+        ends = sorted(end for end, _ in automaton.iter_matches(text))
+        assert ends == sorted(i + len(k) for k in keywords for i in range(len(text)) if text.startswith(k, i))
@@ -0,0 +1,92 @@
+# test_vision_module.py - Vectorized relation building vs the pairwise loop; batched analyze_frames
+
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.getcwd())
+
+from vision_benchmark import loop_relations, synthetic_detections
+from vision_cache import FrameCache
+from vision_module import VisionModule, build_relations, near_pairs
+
+
+def _summary(relations):
+    return [(r["object"], round(r["distance"], 6)) for r in relations]
+
+
+def test_build_relations_matches_loop_reference():
+    for n_persons, n_objects, seed in [(0, 5, 0), (1, 1, 1), (3, 10, 2), (20, 80, 3), (50, 200, 4)]:
+        labels, boxes = synthetic_detections(n_persons, n_objects, seed=seed)
+        expected = loop_relations(labels, boxes)
+        got = build_relations(np.array(labels, dtype=object), np.array(boxes, dtype=np.float64))
+        assert _summary(got) == _summary(expected)
+
+
+def test_near_pairs_indices_and_threshold():
+    labels = np.array(["person", "stove", "tv", "person", "cup"], dtype=object)
+    boxes = np.array([
+        [0, 0, 10, 10],        # person at (5, 5)
+        [100, 0, 110, 10],     # stove at (105, 5): 100 px from person 0
+        [300, 0, 310, 10],     # tv far from everyone
+        [290, 0, 300, 10],     # person next to the tv
+        [0, 0, 10, 10],        # cup: not a relation object
+    ], dtype=np.float64)
+    pairs = near_pairs(labels, boxes, near_thresh=120.0)
+    assert [(name, p, o) for name, p, o, _ in pairs] == [("oven", 0, 1), ("tv", 3, 2)]
+    assert pairs[0][3] == 100.0
+    assert near_pairs(labels, boxes, near_thresh=50.0) == [("tv", 3, 2, 10.0)]
+    assert build_relations(np.array([], dtype=object), np.zeros((0, 4))) == []
+
+
+class _BatchModel:
+    """ONNX-style model: one (labels, confs, boxes) tuple per image, sized by its pixel value."""
+
+    def __init__(self):
+        self.batches = []
+
+    def __call__(self, source, **kwargs):
+        images = source if isinstance(source, list) else [source]
+        self.batches.append(len(images))
+        return [(np.array(["person"], dtype=object), np.array([0.9]),
+                 np.array([[0.0, 0.0, float(image[0, 0, 0]), 10.0]])) for image in images]
+
+
+def _batch_vision(cache_size=2):
+    vision = VisionModule.__new__(VisionModule)
+    vision.model = _BatchModel()
+    vision.controller = None
+    vision.cache = FrameCache(cache_size) if cache_size else None
+    vision.zones = {}
+    return vision
+
+
+def _image(value):
+    return np.full((4, 4, 3), value, dtype=np.uint8)
+
+
+def test_analyze_frames_is_one_batch_in_input_shape():
+    vision = _batch_vision(cache_size=0)
+    results = vision.analyze_frames({"kitchen": _image(5), "hall": _image(7), "garage": _image(9)})
+    assert list(results) == ["kitchen", "hall", "garage"]
+    assert [r["detections"][0]["bbox"][2] for r in results.values()] == [5.0, 7.0, 9.0]
+    assert vision.model.batches == [3]
+    assert vision.last_batch_stats["frames"] == vision.last_batch_stats["crops"] == 3
+
+    listed = vision.analyze_frames([_image(3), _image(4)])
+    assert [r["detections"][0]["bbox"][2] for r in listed] == [3.0, 4.0]
+
+
+def test_analyze_frames_only_infers_uncached_frames():
+    vision = _batch_vision(cache_size=2)
+    vision.analyze_frames({"kitchen": _image(5), "hall": _image(7), "garage": _image(9)})
+    # The LRU kept the last two frames; only the evicted one is inferred again
+    results = vision.analyze_frames({"hall": _image(7), "garage": _image(9), "kitchen": _image(5)})
+    assert vision.model.batches == [3, 1]
+    assert [r["detections"][0]["bbox"][2] for r in results.values()] == [7.0, 9.0, 5.0]
+    assert vision.last_batch_stats["frames"] == 1
+
+    # Fully cached: no model call at all
+    vision.analyze_frames({"garage": _image(9), "kitchen": _image(5)})
+    assert vision.model.batches == [3, 1]
@@ -0,0 +1,51 @@
+# test_vision_onnx.py - NumPy YOLOv8 decoding, NMS and letterbox
+
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.getcwd())
+
+from vision_onnx import decode, letterbox, nms
+
+
+def _output(preds, num_classes=80, anchors=50):
+    out = np.zeros((4 + num_classes, anchors), dtype=np.float32)
+    for i, (cx, cy, w, h, cls, score) in enumerate(preds):
+        out[:4, i] = (cx, cy, w, h)
+        out[4 + cls, i] = score
+    return out
+
+
+def test_nms_suppresses_overlaps_only():
+    boxes = np.array([[0, 0, 10, 10], [1, 0, 11, 10], [20, 20, 30, 30]], dtype=np.float64)
+    scores = np.array([0.8, 0.9, 0.7])
+    assert nms(boxes, scores, 0.5).tolist() == [1, 2]
+    assert nms(boxes, scores, 0.9).tolist() == [1, 0, 2]
+
+
+def test_decode_thresholds_and_class_aware_nms():
+    out = _output([
+        (100, 100, 40, 80, 0, 0.9),    # person
+        (102, 100, 40, 80, 0, 0.8),    # duplicate person -> suppressed
+        (101, 100, 40, 80, 62, 0.7),   # tv on the same spot: other class, kept
+        (300, 300, 10, 10, 69, 0.1),   # below conf_thresh
+    ])
+    class_ids, confs, boxes = decode(out)
+    assert class_ids.tolist() == [0, 62]
+    assert np.allclose(confs, [0.9, 0.7])
+    assert np.allclose(boxes[0], [80, 60, 120, 140])
+
+    # IoU of the two persons is ~0.905: the ultralytics default (0.7) suppresses it
+    assert decode(out, iou_thresh=0.95)[0].tolist() == [0, 0, 62]
+    empty = decode(_output([]))
+    assert empty[0].size == 0 and empty[2].shape == (0, 4)
+
+
+def test_letterbox_pads_to_square():
+    image = np.full((480, 640, 3), 255, dtype=np.uint8)
+    padded, scale, (pad_x, pad_y) = letterbox(image, 320)
+    assert padded.shape == (320, 320, 3)
+    assert scale == 0.5 and (pad_x, pad_y) == (0, 40)
+    assert padded[0, 0, 0] == 114 and padded[40, 0, 0] == 255
@@ -0,0 +1,76 @@
+# test_vision_pool.py - Compact context encoding and the worker pool round trip
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.getcwd())
+
+from vision_pool import VisionPool, decode_context, encode_context
+
+RELATIONS = [{"subject": "person", "relation": "near", "object": "stove", "distance": 42.5}]
+
+
+class _FakeVision:
+    """Stands in for VisionModule in the workers: one detection sized by the frame's mean."""
+
+    def __init__(self, cache_size=0, **model_kwargs):
+        pass
+
+    def analyze_frame(self, frame, camera_id=None):
+        if camera_id == "crash":
+            os._exit(3)
+        size = float(np.asarray(frame).mean()) if isinstance(frame, np.ndarray) else float(len(frame))
+        return {"detections": [{"label": "person", "confidence": 0.5, "bbox": (0.0, 0.0, size, size)}],
+                "relations": RELATIONS}
+
+
+def test_encode_decode_round_trip():
+    context = {
+        "detections": [
+            {"label": "person", "confidence": 0.75, "bbox": (1.0, 2.0, 30.0, 40.0)},
+            {"label": "stove", "confidence": 0.5, "bbox": (10.0, 20.0, 50.0, 60.0)},
+            {"label": "person", "confidence": 0.25, "bbox": (5.0, 5.0, 15.0, 25.0)},
+        ],
+        "relations": RELATIONS,
+    }
+    packed = encode_context(context)
+    assert packed["names"] == ("person", "stove")
+    assert packed["ids"].dtype == np.uint16 and packed["boxes"].shape == (3, 4)
+    assert decode_context(packed) == context
+
+    empty = {"detections": [], "relations": []}
+    assert decode_context(encode_context(empty)) == empty
+
+
+@pytest.fixture
+def pool():
+    pool = VisionPool(workers=1, zones_path=None, max_frame_shape=(8, 8, 3), cache_size=0,
+                      health_interval=0.05, vision_factory=_FakeVision).start()
+    yield pool
+    pool.close()
+
+
+def test_pool_round_trip(pool):
+    frame = np.full((8, 8, 3), 4, dtype=np.uint8)
+    context = pool.analyze_frame(frame, camera_id="cam0", timeout=10)
+    assert context == {"detections": [{"label": "person", "confidence": 0.5, "bbox": (0.0, 0.0, 4.0, 4.0)}],
+                       "relations": RELATIONS}
+    assert pool.analyze_frames({"front": "frames/a.jpg"}, timeout=10)["front"]["detections"][0]["bbox"][2] == 12.0
+    assert pool.stats["shm_frames"] == 1 and pool.stats["path_frames"] == 1 and pool.stats["completed"] == 2
+    with pytest.raises(ValueError):
+        pool.submit(np.zeros((16, 16, 3), dtype=np.uint8))
+
+
+def test_crashed_worker_fails_its_frames_and_is_replaced(pool):
+    frame = np.full((8, 8, 3), 2, dtype=np.uint8)
+    crashed = pool.submit(frame, camera_id="crash")
+    error = crashed.exception(timeout=10)
+    assert isinstance(error, RuntimeError) and "died" in str(error)
+
+    # The replacement serves new frames and every slot is free again
+    assert pool.analyze_frame(frame, camera_id="cam0", timeout=30)["detections"][0]["bbox"][2] == 2.0
+    assert pool.stats["worker_restarts"] == 1 and pool.stats["errors"] == 1
+    assert pool._free_slots.qsize() == pool.n_slots
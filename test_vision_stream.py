@@ -0,0 +1,86 @@
+# test_vision_stream.py - Motion gate decisions and frame sampling on synthetic video
+
+import os
+import sys
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.getcwd())
+
+from vision_stream import MotionGate, VideoMonitor
+
+
+def _frame(value=0, half=None):
+    frame = np.full((90, 160, 3), value, dtype=np.uint8)
+    if half is not None:
+        frame[:, :80] = half
+    return frame
+
+
+def test_gate_threshold():
+    gate = MotionGate(pixel_thresh=25, min_changed=0.1, heartbeat_s=None)
+    assert gate.is_active(_frame(), 0.0)  # first frame is always analyzed
+    assert not gate.is_active(_frame(), 1.0)
+    assert not gate.is_active(_frame(10), 2.0)  # every pixel changed, but under pixel_thresh
+    small = _frame()
+    small[:10, :10] = 255  # ~0.7% of the thumbnail
+    assert not gate.is_active(small, 3.0)
+    assert gate.is_active(_frame(half=255), 4.0)
+    assert not gate.is_active(_frame(half=255), 5.0)  # the analyzed frame is the new reference
+
+
+def test_gate_slow_drift_adds_up_against_the_last_analyzed_frame():
+    gate = MotionGate(pixel_thresh=25, min_changed=0.1, heartbeat_s=None)
+    assert gate.is_active(_frame(0), 0.0)
+    assert not gate.is_active(_frame(10), 1.0)
+    assert not gate.is_active(_frame(20), 2.0)
+    assert gate.is_active(_frame(30), 3.0)
+    assert not gate.is_active(_frame(40), 4.0)
+
+
+def test_gate_heartbeat_forces_a_refresh():
+    gate = MotionGate(heartbeat_s=5.0)
+    assert [gate.is_active(_frame(), t) for t in (0.0, 4.0, 5.0, 6.0, 9.9, 10.0)] == [
+        True, False, True, False, False, True]
+
+
+class _RecordingVision:
+    def __init__(self):
+        self.calls = []
+
+    def analyze_frame(self, frame, camera_id=None):
+        self.calls.append((frame.shape, camera_id))
+        return {"detections": [{"label": "person", "confidence": 0.9, "bbox": (0, 0, 1, 1)}], "relations": []}
+
+
+def _write_video(path, frames, fps=10):
+    height, width = frames[0].shape[:2]
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"MJPG"), fps, (width, height))
+    for frame in frames:
+        writer.write(frame)
+    writer.release()
+
+
+def test_monitor_samples_and_skips_static_frames(tmp_path):
+    # 2 s at 10 fps: static for 1 s, then half the picture turns white
+    path = tmp_path / "kitchen.avi"
+    _write_video(path, [_frame()] * 10 + [_frame(half=255)] * 10)
+    vision, sunk = _RecordingVision(), []
+    monitor = VideoMonitor(vision, str(path), camera_id="kitchen", sample_fps=2.0, sinks=[sunk.append])
+
+    events = list(monitor)
+    assert [e["frame_index"] for e in events] == [0, 10]
+    assert [e["timestamp"] for e in events] == [0.0, 1.0]
+    assert sunk == events and events[0]["camera"] == "kitchen"
+    assert vision.calls == [((90, 160, 3), "kitchen")] * 2
+    assert {k: monitor.stats[k] for k in ("frames", "sampled", "analyzed", "skipped_static")} == {
+        "frames": 20, "sampled": 4, "analyzed": 2, "skipped_static": 2}
+
+
+def test_monitor_without_gate_analyzes_every_sampled_frame(tmp_path):
+    path = tmp_path / "hall.avi"
+    _write_video(path, [_frame()] * 10)
+    monitor = VideoMonitor(_RecordingVision(), str(path), sample_fps=None, motion_gate=None)
+    assert [e["frame_index"] for e in monitor] == list(range(10))
+    assert monitor.stats["skipped_static"] == 0
@@ -0,0 +1,82 @@
+# test_vision_tracker.py - IoU association, track ids and detection skipping
+
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.getcwd())
+
+from vision_tracker import IoUTracker, TrackedVision, iou_matrix
+
+
+def _det(label, x, y, w=40, h=80):
+    return {"label": label, "confidence": 0.9, "bbox": (x, y, x + w, y + h)}
+
+
+def test_iou_matrix():
+    ious = iou_matrix([[0, 0, 10, 10]], [[0, 0, 10, 10], [5, 0, 15, 10], [20, 20, 30, 30]])
+    assert np.allclose(ious, [[1.0, 1 / 3, 0.0]])
+
+
+def test_tracker_keeps_ids_across_frames():
+    tracker = IoUTracker()
+    tracks = tracker.update([_det("person", 0, 0), _det("oven", 200, 0)], 0.0)
+    ids = {t.label: t.id for t in tracks}
+    assert tracker.unstable  # births
+
+    tracks = tracker.update([_det("oven", 202, 0), _det("person", 5, 0)], 0.1)
+    assert {t.label: t.id for t in tracks} == ids
+    assert not tracker.unstable
+
+
+def test_tracker_does_not_match_across_labels_and_uses_centroid_fallback():
+    tracker = IoUTracker(max_center_dist=80.0)
+    first = tracker.update([_det("person", 0, 0, w=10, h=10)], 0.0)[0].id
+    # No overlap with the old box, but the centroid moved only 30 px
+    tracks = tracker.update([_det("person", 30, 0, w=10, h=10), _det("tv", 0, 0, w=10, h=10)], 0.1)
+    by_label = {t.label: t.id for t in tracks}
+    assert by_label["person"] == first
+    assert by_label["tv"] != first
+
+
+def test_track_ids_are_per_tracker():
+    kitchen, hallway = IoUTracker(), IoUTracker()
+    assert [t.id for t in kitchen.update([_det("person", 0, 0), _det("oven", 200, 0)], 0.0)] == [1, 2]
+    # Another camera's tracker numbers its own tracks from 1
+    assert [t.id for t in hallway.update([_det("person", 0, 0)], 0.0)] == [1]
+    assert [t.id for t in kitchen.update([_det("person", 0, 0), _det("oven", 200, 0), _det("tv", 500, 0)], 0.1)] == [
+        1, 2, 3]
+
+
+def test_tracker_drops_tracks_after_max_misses():
+    tracker = IoUTracker(max_misses=1)
+    tracker.update([_det("person", 0, 0)], 0.0)
+    assert len(tracker.update([], 0.1)) == 1
+    assert tracker.update([], 0.2) == []
+
+
+class FakeVision:
+    def __init__(self):
+        self.calls = 0
+
+    def analyze_frame(self, frame, camera_id=None):
+        self.calls += 1
+        x = 10 + 5 * frame
+        return {"detections": [_det("person", x, 100, 50, 100), _det("oven", 100, 100, 80, 100)],
+                "relations": []}
+
+
+def test_tracked_vision_skips_detection_and_tracks_dwell():
+    vision = FakeVision()
+    tracked = TrackedVision(vision, detect_every=5, min_dwell=0.3)
+    results = [tracked.analyze(t, timestamp=t * 0.1) for t in range(20)]
+    # Track births force detection on the second frame too, then every 5th frame
+    assert vision.calls == tracked.stats["inferred"] < 20 // 2
+    assert results[0]["inferred"] and not results[3]["inferred"]
+
+    ids = {d["track_id"] for r in results for d in r["detections"]}
+    assert len(ids) == 2
+    assert results[0]["relations"] == []  # debounced until min_dwell
+    rel = results[-1]["relations"][0]
+    assert rel["object"] == "oven" and abs(rel["dwell"] - 1.9) < 1e-9
@@ -0,0 +1,54 @@
+# test_vision_zones.py - Zone crops and room-level relations
+
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.getcwd())
+
+from vision_zones import CameraZones, load_zones, merge_rects, points_in_polygon
+
+ZONES = [
+    {"name": "stove_area", "room": "kitchen", "object": "oven",
+     "polygon": [[0.0, 0.5], [0.25, 0.5], [0.25, 1.0], [0.0, 1.0]]},
+    {"name": "entryway", "room": "entryway", "object": "door",
+     "polygon": [[0.75, 0.0], [1.0, 0.0], [1.0, 1.0], [0.75, 1.0]]},
+]
+
+
+def test_points_in_polygon():
+    triangle = [[0, 0], [1, 0], [0, 1]]
+    inside = points_in_polygon([[0.2, 0.2], [0.8, 0.8], [0.5, 0.4], [-0.1, 0.1]], triangle)
+    assert inside.tolist() == [True, False, True, False]
+
+
+def test_relations_use_feet_position():
+    zones = CameraZones(ZONES, padding=0.0)
+    labels = np.array(["person", "person", "person", "tv"], dtype=object)
+    boxes = np.array([
+        [10, 100, 50, 380],    # feet (30, 380) -> stove area
+        [500, 0, 560, 100],    # feet (530, 100) -> entryway
+        [300, 10, 340, 200],   # middle of the room: no zone
+        [10, 300, 50, 380],    # not a person
+    ], dtype=np.float64)
+    relations = zones.relations(labels, boxes, 640, 400)
+    assert [(r["object"], r["zone"], r["room"]) for r in relations] == [
+        ("oven", "stove_area", "kitchen"),
+        ("door", "entryway", "entryway"),
+    ]
+    assert [p for _, p in zones.zone_pairs(labels, boxes, 640, 400)] == [0, 1]
+    assert zones.relations(np.array(["tv"], dtype=object), boxes[:1], 640, 400) == []
+
+
+def test_crop_rects_are_padded_and_merged():
+    zones = CameraZones(ZONES, padding=0.05)
+    assert zones.crop_rects(100, 100) == [(0, 45, 30, 100), (70, 0, 100, 100)]
+    assert merge_rects([(0, 0, 10, 10), (5, 5, 20, 20), (30, 30, 40, 40)]) == [(0, 0, 20, 20), (30, 30, 40, 40)]
+    assert abs(zones.crop_fraction(100, 100) - (30 * 55 + 30 * 100) / 10000.0) < 1e-9
+
+
+def test_load_zones_missing_file_means_no_zones(tmp_path):
+    assert load_zones(str(tmp_path / "camera_zones.json")) == {}
+    zones = load_zones("camera_zones.example.json")
+    assert "default" in zones and len(zones["default"].zones) == 4
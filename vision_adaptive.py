@@ -0,0 +1,134 @@
+# vision_adaptive.py
+"""
+Latency-budgeted choice of YOLO model variant and input resolution.
+
+Each (model, imgsz) pair is a "level", ordered by estimated cost (published
+GFLOPs at 640 px, scaled by the pixel count). The controller measures every
+inference call and:
+
+- degrades right away when the smoothed latency of the current level exceeds
+  the budget (CPU busy, bigger frames, ...), to the largest level whose
+  scaled estimate fits;
+- upgrades one level at a time after ``upgrade_after`` calls comfortably
+  under budget, if the next level's estimate still fits with headroom.
+  An upgrade that immediately overshoots doubles the wait before the next
+  attempt, so the controller does not oscillate around the budget.
+
+Usage:
+    vision = VisionModule(latency_budget_ms=150)
+    vision.analyze_frame("frames/latest.jpg")
+    print(vision.controller.metrics())
+"""
+
+from collections import deque
+
+import numpy as np
+
+# Ultralytics' published GFLOPs at 640 px; relative cost is all that matters here
+MODEL_GFLOPS = {
+    "yolov8n.pt": 8.7,
+    "yolov8s.pt": 28.6,
+    "yolov8m.pt": 78.9,
+    "yolov8l.pt": 165.2,
+    "yolov8x.pt": 257.8,
+}
+DEFAULT_SIZES = (320, 416, 512, 640)
+
+
+class AdaptiveController:
+    def __init__(self, budget_ms=150.0, models=("yolov8n.pt", "yolov8s.pt"), sizes=DEFAULT_SIZES,
+                 start=None, alpha=0.3, headroom=0.8, upgrade_after=10, window=50):
+        """
+        budget_ms: target inference latency per image (a batch call is divided by its size)
+        models / sizes: candidate model weights and input sizes (multiples of 32);
+            sizes may be {model: sizes} when models support different sizes
+        start: initial (model, imgsz); default is the first model at its largest size
+        alpha: EWMA weight of the newest measurement
+        headroom: upgrade only if the next level is estimated under budget * headroom
+        upgrade_after: calls under budget before trying the next level up
+        window: measurements kept for the latency percentiles in metrics()
+        """
+        self.budget_ms = float(budget_ms)
+        self.alpha = alpha
+        self.headroom = headroom
+        self.base_upgrade_after = upgrade_after
+        self.upgrade_after = upgrade_after
+
+        model_sizes = sizes if isinstance(sizes, dict) else {m: sizes for m in models}
+        fallback = max(MODEL_GFLOPS.get(m, 0.0) for m in models) or 1.0
+        self.levels = sorted(
+            ({"model": m, "imgsz": s, "cost": MODEL_GFLOPS.get(m, fallback) * (s / 640.0) ** 2}
+             for m in models for s in model_sizes[m]),
+            key=lambda level: level["cost"],
+        )
+        start = start or (models[0], max(model_sizes[models[0]]))
+        self.level = next(i for i, l in enumerate(self.levels) if (l["model"], l["imgsz"]) == tuple(start))
+
+        self.ewma_ms = None
+        self.calls_at_level = 0
+        self.history = deque(maxlen=window)
+        self.counts = {"calls": 0, "over_budget": 0, "upgrades": 0, "downgrades": 0}
+        self._just_upgraded = False
+
+    @property
+    def current(self):
+        level = self.levels[self.level]
+        return {"model": level["model"], "imgsz": level["imgsz"]}
+
+    def estimate_ms(self, index):
+        """Latency estimate for a level, scaled from the current level's fresh EWMA."""
+        if self.ewma_ms is None:
+            return None
+        return self.ewma_ms * self.levels[index]["cost"] / self.levels[self.level]["cost"]
+
+    def _set_level(self, index):
+        self.ewma_ms = self.estimate_ms(index)
+        self.level = index
+        self.calls_at_level = 0
+
+    def choose(self):
+        """Settings for the next inference call: {"model", "imgsz"}."""
+        if self.ewma_ms is None:
+            return self.current
+
+        if self.ewma_ms > self.budget_ms and self.level > 0:
+            fits = [i for i in range(self.level) if self.estimate_ms(i) <= self.budget_ms]
+            if self._just_upgraded:
+                # The last step up didn't hold; wait longer before trying again
+                self.upgrade_after *= 2
+            self._set_level(fits[-1] if fits else 0)
+            self.counts["downgrades"] += 1
+            self._just_upgraded = False
+        elif (self.calls_at_level >= self.upgrade_after and self.level + 1 < len(self.levels)
+              and self.estimate_ms(self.level + 1) <= self.budget_ms * self.headroom):
+            self._set_level(self.level + 1)
+            self.counts["upgrades"] += 1
+            self._just_upgraded = True
+        return self.current
+
+    def record(self, seconds):
+        """Feed back the measured duration of one image inferred with choose()'s settings."""
+        ms = seconds * 1000.0
+        self.ewma_ms = ms if self.ewma_ms is None else self.alpha * ms + (1 - self.alpha) * self.ewma_ms
+        self.history.append(ms)
+        self.calls_at_level += 1
+        self.counts["calls"] += 1
+        if ms > self.budget_ms:
+            self.counts["over_budget"] += 1
+        if self._just_upgraded and self.calls_at_level >= self.upgrade_after:
+            # The upgrade held up: back to the normal upgrade pace
+            self._just_upgraded = False
+            self.upgrade_after = self.base_upgrade_after
+
+    def metrics(self):
+        history = np.array(self.history) if self.history else None
+        return {
+            **self.current,
+            "budget_ms": self.budget_ms,
+            "last_ms": self.history[-1] if self.history else None,
+            "ewma_ms": self.ewma_ms,
+            "p50_ms": float(np.percentile(history, 50)) if history is not None else None,
+            "p95_ms": float(np.percentile(history, 95)) if history is not None else None,
+            **self.counts,
+        }
+
@@ -0,0 +1,278 @@
+# vision_benchmark.py - Micro-benchmarks for the vision path
+"""
+Benchmarks for VisionModule helpers that do not need a camera.
+
+- relations: vectorized build_relations vs the original per-pair Python loops
+  on a crowded synthetic frame (default 50 persons x 200 objects)
+- batch: analyze_frames (one batched call for all cameras) vs sequential
+  analyze_frame calls, in frames/sec on the current device (CPU by default)
+- backends: cold startup (fresh interpreter: imports + model load) and
+  single-frame frames/sec for the ultralytics backend vs exported ONNX models
+- control: p50/p99 latency of control_device + intent_firewall while every
+  camera is analyzed back to back, with inference in-process (threads) vs in
+  a VisionPool of worker processes
+
+Usage:
+    python vision_benchmark.py relations
+    python vision_benchmark.py relations --persons 50 --objects 200
+    python vision_benchmark.py batch --cameras 8 [--frames-dir frames/]
+    python vision_benchmark.py backends --onnx yolov8n.onnx yolov8n-int8.onnx
+    python vision_benchmark.py control --cameras 4 --workers 2 [--model yolov8n.onnx --backend onnx]
+"""
+
+import argparse
+import contextlib
+import glob
+import io
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from intent_firewall import intent_firewall
+from smart_home_api import control_device
+from vision_module import NEAR_THRESH, RELATION_GROUPS, VisionModule, build_relations
+from vision_pool import VisionPool
+
+
+def synthetic_detections(n_persons, n_objects, width=1920, height=1080, seed=0):
+    rng = random.Random(seed)
+    object_labels = [label for _, group in RELATION_GROUPS for label in group] + ["chair", "cup"]
+    labels = ["person"] * n_persons + [rng.choice(object_labels) for _ in range(n_objects)]
+    rng.shuffle(labels)
+    boxes = []
+    for _ in labels:
+        x, y = rng.uniform(0, width - 200), rng.uniform(0, height - 200)
+        boxes.append((x, y, x + rng.uniform(20, 200), y + rng.uniform(20, 200)))
+    return labels, boxes
+
+
+def loop_relations(labels, boxes, near_thresh=NEAR_THRESH):
+    """The original pairwise implementation, kept as the reference."""
+    def center(box):
+        x1, y1, x2, y2 = box
+        return ((x1 + x2) / 2.0, (y1 + y2) / 2.0)
+
+    def dist(a, b):
+        ax, ay = center(a)
+        bx, by = center(b)
+        return ((ax - bx) ** 2 + (ay - by) ** 2) ** 0.5
+
+    people = [b for l, b in zip(labels, boxes) if l == "person"]
+    relations = []
+    for obj_name, group in RELATION_GROUPS:
+        objects = [b for l, b in zip(labels, boxes) if l in group]
+        for s in people:
+            for o in objects:
+                d = dist(s, o)
+                if d <= near_thresh:
+                    relations.append({"subject": "person", "relation": "near",
+                                      "object": obj_name, "distance": float(d)})
+    return relations
+
+
+def _time(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def bench_relations(n_persons, n_objects, repeat=20):
+    labels, boxes = synthetic_detections(n_persons, n_objects)
+    label_arr = np.array(labels, dtype=object)
+    box_arr = np.array(boxes, dtype=np.float64)
+
+    expected = loop_relations(labels, boxes)
+    got = build_relations(label_arr, box_arr)
+    same = [(r["object"], round(r["distance"], 6)) for r in expected] == \
+           [(r["object"], round(r["distance"], 6)) for r in got]
+
+    loop_s = _time(lambda: loop_relations(labels, boxes), repeat)
+    vec_s = _time(lambda: build_relations(label_arr, box_arr), repeat)
+    print(f"🧮 Relations: {n_persons} persons x {n_objects} objects -> {len(got)} relations")
+    print(f"   loops:      {loop_s * 1000:.2f} ms")
+    print(f"   vectorized: {vec_s * 1000:.2f} ms ({loop_s / vec_s:.1f}x)")
+    print(f"   same output: {'✅' if same else '❌'}")
+
+
+def camera_frames(n_cameras, frames_dir=None, size=(640, 480), seed=0):
+    """BGR frames for n cameras: images from frames_dir if given, else noise."""
+    if frames_dir:
+        paths = sorted(glob.glob(os.path.join(frames_dir, "*.jpg")) + glob.glob(os.path.join(frames_dir, "*.png")))
+        if paths:
+            return [cv2.imread(paths[i % len(paths)]) for i in range(n_cameras)]
+    rng = np.random.default_rng(seed)
+    return [rng.integers(0, 255, (size[1], size[0], 3), dtype=np.uint8) for _ in range(n_cameras)]
+
+
+def bench_batch(n_cameras, rounds=5, frames_dir=None, model_path="yolov8n.pt"):
+    # No frame cache: repeated rounds over the same frames must really run inference
+    vision = VisionModule(model_path, cache_size=0, zones_path=None)
+    frames = {f"cam{i}": f for i, f in enumerate(camera_frames(n_cameras, frames_dir))}
+
+    # Warm-up (model fuse, first allocation)
+    vision.analyze_frames(frames)
+
+    t0 = time.perf_counter()
+    for _ in range(rounds):
+        for frame in frames.values():
+            vision.analyze_frame(frame)
+    sequential_s = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    for _ in range(rounds):
+        vision.analyze_frames(frames)
+    batched_s = time.perf_counter() - t0
+
+    total = n_cameras * rounds
+    print(f"📷 {n_cameras} cameras x {rounds} rounds")
+    print(f"   sequential analyze_frame: {total / sequential_s:.1f} frames/sec")
+    print(f"   batched analyze_frames:   {total / batched_s:.1f} frames/sec "
+          f"({sequential_s / batched_s:.2f}x)")
+
+
+STARTUP_SNIPPET = """
+import time
+t0 = time.perf_counter()
+from vision_module import VisionModule
+vision = VisionModule({model!r}, cache_size=0, zones_path=None, backend={backend!r})
+print(time.perf_counter() - t0)
+"""
+
+
+def cold_startup(model_path, backend):
+    """Seconds to import VisionModule and load the model in a fresh interpreter."""
+    out = subprocess.run([sys.executable, "-c", STARTUP_SNIPPET.format(model=model_path, backend=backend)],
+                         capture_output=True, text=True, check=True)
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def bench_backends(pt_model, onnx_models, n_frames=50, frames_dir=None):
+    frames = camera_frames(n_frames, frames_dir)
+    candidates = [("ultralytics", pt_model)] if pt_model else []
+    candidates += [("onnx", path) for path in onnx_models]
+
+    print("| backend | model | startup (s) | frames/sec | ms/frame |")
+    print("|---|---|---|---|---|")
+    for backend, model_path in candidates:
+        startup_s = cold_startup(model_path, backend)
+        vision = VisionModule(model_path, cache_size=0, zones_path=None, backend=backend)
+        vision.analyze_frame(frames[0])  # warm-up
+        t0 = time.perf_counter()
+        for frame in frames:
+            vision.analyze_frame(frame)
+        elapsed = time.perf_counter() - t0
+        print(f"| {backend} | {os.path.basename(model_path)} | {startup_s:.2f} | "
+              f"{n_frames / elapsed:.1f} | {elapsed / n_frames * 1000:.1f} |")
+
+
+def control_latencies(seconds, interval=0.005):
+    """Time control_device + intent_firewall calls (ms) for `seconds`, one every `interval`."""
+    command = {"device": "light", "location": "living room", "action": "turn_on"}
+    latencies = []
+    deadline = time.perf_counter() + seconds
+    with contextlib.redirect_stdout(io.StringIO()):
+        while time.perf_counter() < deadline:
+            t0 = time.perf_counter()
+            control_device(command["device"], command["location"], command["action"])
+            intent_firewall(command, raw_text="turn on the living room light")
+            latencies.append((time.perf_counter() - t0) * 1000.0)
+            time.sleep(interval)
+    return np.array(latencies)
+
+
+def _saturate(analyze, frames, stop, counter):
+    """Analyze every camera frame back to back until stopped (one thread per camera)."""
+    def loop(camera_id, frame):
+        while not stop.is_set():
+            analyze(frame, camera_id)
+            counter.append(1)
+
+    threads = [threading.Thread(target=loop, args=item, daemon=True) for item in frames.items()]
+    for thread in threads:
+        thread.start()
+    return threads
+
+
+def bench_control(n_cameras, seconds=10.0, workers=2, frames_dir=None, model_path="yolov8n.pt",
+                  backend="ultralytics"):
+    frames = {f"cam{i}": f for i, f in enumerate(camera_frames(n_cameras, frames_dir))}
+    vision = VisionModule(model_path, cache_size=0, zones_path=None, backend=backend)
+    vision_lock = threading.Lock()  # one model, one inference at a time (as VisionWorker does)
+
+    def in_process(frame, camera_id):
+        with vision_lock:
+            vision.analyze_frame(frame)
+
+    pool = VisionPool(workers=workers, model_path=model_path, backend=backend, zones_path=None,
+                      max_frame_shape=max(f.shape for f in frames.values()), cache_size=0).start()
+    modes = [("idle", None), ("threads", in_process),
+             (f"pool x{workers}", lambda frame, camera_id: pool.analyze_frame(frame))]
+
+    print(f"🎛️ Control path under {n_cameras} saturated cameras ({seconds:.0f}s per mode)")
+    print("| vision | frames/sec | control p50 (ms) | control p99 (ms) | max (ms) |")
+    print("|---|---|---|---|---|")
+    try:
+        for name, analyze in modes:
+            stop, counter, threads = threading.Event(), [], []
+            if analyze is not None:
+                analyze(next(iter(frames.values())), None)  # warm-up
+                threads = _saturate(analyze, frames, stop, counter)
+            t0 = time.perf_counter()
+            latencies = control_latencies(seconds)
+            elapsed = time.perf_counter() - t0
+            stop.set()
+            for thread in threads:
+                thread.join()
+            fps = f"{len(counter) / elapsed:.1f}" if analyze is not None else "-"
+            print(f"| {name} | {fps} | {np.percentile(latencies, 50):.2f} | "
+                  f"{np.percentile(latencies, 99):.2f} | {latencies.max():.2f} |")
+    finally:
+        pool.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="bench", required=True)
+    rel = sub.add_parser("relations", help="relation building on a crowded frame")
+    rel.add_argument("--persons", type=int, default=50)
+    rel.add_argument("--objects", type=int, default=200)
+    batch = sub.add_parser("batch", help="multi-camera batched inference")
+    batch.add_argument("--cameras", type=int, default=8)
+    batch.add_argument("--rounds", type=int, default=5)
+    batch.add_argument("--frames-dir", default=None)
+    batch.add_argument("--model", default="yolov8n.pt")
+    backends = sub.add_parser("backends", help="ultralytics vs ONNX startup and frames/sec")
+    backends.add_argument("--pt", default="yolov8n.pt", help="ultralytics weights ('' to skip)")
+    backends.add_argument("--onnx", nargs="*", default=["yolov8n.onnx"])
+    backends.add_argument("--frames", type=int, default=50)
+    backends.add_argument("--frames-dir", default=None)
+    control = sub.add_parser("control", help="control-path p99 latency with in-process vs pooled vision")
+    control.add_argument("--cameras", type=int, default=4)
+    control.add_argument("--workers", type=int, default=2)
+    control.add_argument("--seconds", type=float, default=10.0)
+    control.add_argument("--frames-dir", default=None)
+    control.add_argument("--model", default="yolov8n.pt")
+    control.add_argument("--backend", default="ultralytics", choices=["ultralytics", "onnx"])
+    args = parser.parse_args()
+
+    if args.bench == "relations":
+        bench_relations(args.persons, args.objects)
+    elif args.bench == "batch":
+        bench_batch(args.cameras, args.rounds, args.frames_dir, args.model)
+    elif args.bench == "backends":
+        bench_backends(args.pt, args.onnx, args.frames, args.frames_dir)
+    elif args.bench == "control":
+        bench_control(args.cameras, args.seconds, args.workers, args.frames_dir, args.model, args.backend)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+# vision_cache.py
+"""
+Bounded cache of frame analysis results.
+
+The interactive loop re-analyzes frames/latest.jpg on every utterance even
+though the camera only refreshes it every few seconds. Frames are keyed by
+(path, mtime, size) for files - a stat() call, no read - or by a content hash
+for in-memory arrays, so an unchanged frame returns the previous detections
+and relations without running YOLO.
+"""
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+
+def frame_key(frame, content_hash=False):
+    """
+    Cache key for an image path or array.
+    content_hash=True hashes file bytes instead of trusting mtime/size.
+    """
+    if isinstance(frame, np.ndarray):
+        digest = hashlib.blake2b(np.ascontiguousarray(frame).data, digest_size=16).hexdigest()
+        return ("array", frame.shape, str(frame.dtype), digest)
+
+    path = os.path.abspath(str(frame))
+    if content_hash:
+        with open(path, "rb") as f:
+            return ("file", hashlib.blake2b(f.read(), digest_size=16).hexdigest())
+    st = os.stat(path)
+    return ("path", path, st.st_mtime_ns, st.st_size)
+
+
+class FrameCache:
+    def __init__(self, max_entries=32, content_hash=False):
+        """
+        max_entries: LRU bound on cached frame results
+        content_hash: key files by their bytes rather than path+mtime+size
+        """
+        self.max_entries = max_entries
+        self.content_hash = content_hash
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def key(self, frame):
+        return frame_key(frame, self.content_hash)
+
+    def get(self, key):
+        with self._lock:
+            result = self.entries.get(key)
+            if result is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+        # Fresh lists so callers can't mutate the cached entry
+        return {"detections": list(result["detections"]), "relations": list(result["relations"])}
+
+    def put(self, key, result):
+        with self._lock:
+            self.entries[key] = {
+                "detections": list(result.get("detections", [])),
+                "relations": list(result.get("relations", [])),
+            }
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
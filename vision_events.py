@@ -0,0 +1,362 @@
+# vision_events.py
+"""
+Append-only store of past detections and relations, for "when/where was X"
+questions ("when was someone last near the oven", "was the door approached
+overnight") without re-running vision.
+
+Events are partitioned per camera and per UTC day:
+
+    data/vision_events/vocab.json                      # id -> name table
+    data/vision_events/<camera>/<YYYY-MM-DD>/relations.bin
+    data/vision_events/<camera>/<YYYY-MM-DD>/detections.bin
+
+Rows are fixed-size NumPy records - names as uint16 ids into the vocabulary,
+boxes quantized to whole pixels (uint16), confidences to 1/255 - so a frame
+costs a few dozen bytes. Each partition keeps an in-memory index
+{(object, relation): sorted timestamps} built on first query and extended
+incrementally as the file grows, so a query is a dict lookup plus a binary
+search per day touched.
+
+    store = EventStore()
+    store.record("default", image_context)
+    store.last("oven")                                  # most recent person-near-oven event
+    store.query("door", start=t0, end=t1)               # every door approach in a window
+"""
+
+import datetime
+import json
+import os
+import re
+import shutil
+import threading
+import time
+
+import numpy as np
+
+from vision_module import RELATION_GROUPS
+
+DEFAULT_EVENTS_DIR = "data/vision_events"
+
+RELATION_DTYPE = np.dtype([
+    ("t", "<f8"), ("subject", "<u2"), ("relation", "<u2"), ("object", "<u2"), ("room", "<u2"), ("dist", "<f2"),
+])
+DETECTION_DTYPE = np.dtype([
+    ("t", "<f8"), ("label", "<u2"), ("conf", "u1"), ("box", "<u2", (4,)),
+])
+
+
+def day_of(timestamp):
+    return datetime.datetime.fromtimestamp(timestamp, datetime.timezone.utc).strftime("%Y-%m-%d")
+
+
+def days_between(start, end):
+    """UTC day partitions covering [start, end]."""
+    day = datetime.datetime.fromtimestamp(start, datetime.timezone.utc).date()
+    last = datetime.datetime.fromtimestamp(end, datetime.timezone.utc).date()
+    days = []
+    while day <= last:
+        days.append(day.isoformat())
+        day += datetime.timedelta(days=1)
+    return days
+
+
+class _Partition:
+    """One append-only record file plus its (key fields) -> sorted timestamps index."""
+
+    def __init__(self, path, dtype, key_fields):
+        self.path = path
+        self.dtype = dtype
+        self.key_fields = key_fields
+        self.rows = np.zeros(0, dtype=dtype)
+        self.index = {}
+
+    def append(self, records):
+        with open(self.path, "ab") as f:
+            f.write(records.tobytes())
+
+    def refresh(self):
+        """Read rows appended since the last query and fold them into the index."""
+        size = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        done = len(self.rows) * self.dtype.itemsize
+        if size - done < self.dtype.itemsize:
+            return
+        new = np.fromfile(self.path, dtype=self.dtype, offset=done, count=(size - done) // self.dtype.itemsize)
+        first = len(self.rows)
+        self.rows = np.concatenate([self.rows, new])
+
+        keys = np.stack([new[f].astype(np.int64) for f in self.key_fields], axis=1)
+        uniq, inverse = np.unique(keys, axis=0, return_inverse=True)
+        for k, key in enumerate(map(tuple, uniq.tolist())):
+            rows = first + np.flatnonzero(inverse.ravel() == k)
+            old = self.index.get(key)
+            if old is not None:
+                rows = np.concatenate([old, rows])
+            # Cameras append in time order; only re-sort if a late frame arrived
+            times = self.rows["t"][rows]
+            if len(times) > 1 and (np.diff(times) < 0).any():
+                rows = rows[np.argsort(times, kind="stable")]
+            self.index[key] = rows
+
+    def select(self, key, start, end):
+        """Rows for key with start <= t <= end, in time order."""
+        self.refresh()
+        rows = self.index.get(key)
+        if rows is None:
+            return self.rows[:0]
+        times = self.rows["t"][rows]
+        lo, hi = np.searchsorted(times, start, "left"), np.searchsorted(times, end, "right")
+        return self.rows[rows[lo:hi]]
+
+
+class EventStore:
+    def __init__(self, root=DEFAULT_EVENTS_DIR, record_detections=True):
+        """
+        root: directory holding the vocabulary and per-camera/day partitions
+        record_detections: also keep every detection box (relations are always kept)
+        """
+        self.root = root
+        self.record_detections = record_detections
+        self._lock = threading.Lock()
+        self._partitions = {}
+        os.makedirs(root, exist_ok=True)
+
+        self._vocab_path = os.path.join(root, "vocab.json")
+        self.names = [""]  # id 0 = none (e.g. relations without a room)
+        if os.path.exists(self._vocab_path):
+            try:
+                with open(self._vocab_path, "r") as f:
+                    self.names = json.load(f) or [""]
+            except json.JSONDecodeError:
+                print(f"[WARNING] Could not parse {self._vocab_path}, event names may be lost.")
+        self.ids = {name: i for i, name in enumerate(self.names)}
+
+    # -------- writing --------
+    def _id(self, name):
+        """Vocabulary id for a name, adding (and persisting) it on first sight."""
+        name = name or ""
+        if name not in self.ids:
+            self.ids[name] = len(self.names)
+            self.names.append(name)
+            tmp = self._vocab_path + ".tmp"
+            with open(tmp, "w") as f:
+                json.dump(self.names, f)
+            os.replace(tmp, self._vocab_path)
+        return self.ids[name]
+
+    def _partition(self, camera_id, day, kind):
+        key = (camera_id, day, kind)
+        part = self._partitions.get(key)
+        if part is None:
+            folder = os.path.join(self.root, camera_id, day)
+            if kind == "relations":
+                part = _Partition(os.path.join(folder, "relations.bin"), RELATION_DTYPE, ("object", "relation"))
+            else:
+                part = _Partition(os.path.join(folder, "detections.bin"), DETECTION_DTYPE, ("label",))
+            self._partitions[key] = part
+        return part
+
+    def record(self, camera_id, context, timestamp=None):
+        """Append one analyze_frame result (detections + relations) for a camera."""
+        timestamp = context.get("timestamp", time.time()) if timestamp is None else timestamp
+        camera_id = camera_id or "default"
+        rels = context.get("relations", [])
+        dets = context.get("detections", []) if self.record_detections else []
+        if not rels and not dets:
+            return
+
+        with self._lock:
+            day = day_of(timestamp)
+            os.makedirs(os.path.join(self.root, camera_id, day), exist_ok=True)
+            if rels:
+                rows = np.zeros(len(rels), dtype=RELATION_DTYPE)
+                rows["t"] = timestamp
+                rows["subject"] = [self._id(r.get("subject")) for r in rels]
+                rows["relation"] = [self._id(r.get("relation")) for r in rels]
+                rows["object"] = [self._id(r.get("object")) for r in rels]
+                rows["room"] = [self._id(r.get("room")) for r in rels]
+                rows["dist"] = [r.get("distance", 0.0) for r in rels]
+                self._partition(camera_id, day, "relations").append(rows)
+            if dets:
+                rows = np.zeros(len(dets), dtype=DETECTION_DTYPE)
+                rows["t"] = timestamp
+                rows["label"] = [self._id(d["label"]) for d in dets]
+                rows["conf"] = np.clip(np.round([d["confidence"] * 255 for d in dets]), 0, 255)
+                rows["box"] = np.clip(np.round([d["bbox"] for d in dets]), 0, 65535)
+                self._partition(camera_id, day, "detections").append(rows)
+
+    # -------- reading --------
+    def cameras(self):
+        return sorted(d for d in os.listdir(self.root) if os.path.isdir(os.path.join(self.root, d)))
+
+    def _chunks(self, kind, key, start, end, camera_id):
+        """[(camera, rows)] per partition for key within [start, end]."""
+        start = 0.0 if start is None else start
+        end = time.time() if end is None else end
+        cameras = [camera_id] if camera_id else self.cameras()
+        chunks = []
+        with self._lock:
+            for cam in cameras:
+                for day in days_between(max(start, self._first_time(cam)), end):
+                    if os.path.isdir(os.path.join(self.root, cam, day)):
+                        rows = self._partition(cam, day, kind).select(key, start, end)
+                        if len(rows):
+                            chunks.append((cam, rows))
+        return chunks
+
+    def _select(self, kind, key, start, end, camera_id):
+        """(camera per row, rows) for key within [start, end], oldest first."""
+        chunks = self._chunks(kind, key, start, end, camera_id)
+        if not chunks:
+            return [], np.zeros(0, dtype=RELATION_DTYPE if kind == "relations" else DETECTION_DTYPE)
+        cams = [cam for cam, rows in chunks for _ in range(len(rows))]
+        rows = np.concatenate([rows for _, rows in chunks])
+        order = np.argsort(rows["t"], kind="stable")
+        return [cams[i] for i in order], rows[order]
+
+    def _first_time(self, camera_id):
+        """Start of the camera's oldest partition (so open-ended queries don't walk from 1970)."""
+        days = sorted(os.listdir(os.path.join(self.root, camera_id)))
+        if not days:
+            return time.time()
+        first = datetime.datetime.strptime(days[0], "%Y-%m-%d").replace(tzinfo=datetime.timezone.utc)
+        return first.timestamp()
+
+    def _relation_rows(self, obj, relation, start, end, camera_id, subject):
+        if obj not in self.ids or relation not in self.ids or (subject and subject not in self.ids):
+            return [], np.zeros(0, dtype=RELATION_DTYPE)
+        cams, rows = self._select("relations", (self.ids[obj], self.ids[relation]), start, end, camera_id)
+        if subject:
+            keep = np.flatnonzero(rows["subject"] == self.ids[subject])
+            cams, rows = [cams[i] for i in keep], rows[keep]
+        return cams, rows
+
+    def count(self, obj, relation="near", start=None, end=None, camera_id=None, subject="person"):
+        """Number of matching relation events (frames) in [start, end]."""
+        if obj not in self.ids or relation not in self.ids or (subject and subject not in self.ids):
+            return 0
+        chunks = self._chunks("relations", (self.ids[obj], self.ids[relation]), start, end, camera_id)
+        if subject:
+            return sum(int((rows["subject"] == self.ids[subject]).sum()) for _, rows in chunks)
+        return sum(len(rows) for _, rows in chunks)
+
+    def query(self, obj, relation="near", start=None, end=None, camera_id=None, subject="person", limit=None):
+        """
+        Relation events ({"time", "camera", "subject", "relation", "object",
+        "room", "distance"}) for obj within [start, end], oldest first;
+        limit keeps only the newest events.
+        """
+        cams, rows = self._relation_rows(obj, relation, start, end, camera_id, subject)
+        if limit is not None:
+            first = max(0, len(rows) - limit)
+            cams, rows = cams[first:], rows[first:]
+        return [
+            {
+                "time": float(row["t"]),
+                "camera": cam,
+                "subject": self.names[row["subject"]],
+                "relation": relation,
+                "object": obj,
+                "room": self.names[row["room"]] or None,
+                "distance": float(row["dist"]),
+            }
+            for cam, row in zip(cams, rows)
+        ]
+
+    def last(self, obj, relation="near", before=None, camera_id=None, subject="person"):
+        """Most recent matching relation event, or None. Walks back one day at a time."""
+        end = time.time() if before is None else before
+        cameras = [camera_id] if camera_id else self.cameras()
+        if not cameras:
+            return None
+        oldest = min(self._first_time(cam) for cam in cameras)
+        day_end = end
+        while day_end >= oldest:
+            day_start = datetime.datetime.fromtimestamp(day_end, datetime.timezone.utc).replace(
+                hour=0, minute=0, second=0, microsecond=0).timestamp()
+            events = self.query(obj, relation, day_start, day_end, camera_id, subject, limit=1)
+            if events:
+                return events[0]
+            day_end = day_start - 1e-6
+        return None
+
+    def detections(self, label, start=None, end=None, camera_id=None):
+        """Detection events ({"time", "camera", "label", "confidence", "bbox"}) for a label."""
+        if label not in self.ids:
+            return []
+        cams, rows = self._select("detections", (self.ids[label],), start, end, camera_id)
+        return [
+            {"time": float(row["t"]), "camera": cam, "label": label,
+             "confidence": row["conf"] / 255.0, "bbox": tuple(int(v) for v in row["box"])}
+            for cam, row in zip(cams, rows)
+        ]
+
+    def prune(self, keep_days=30, now=None):
+        """Delete partitions older than keep_days (whole days, per camera)."""
+        cutoff = day_of((time.time() if now is None else now) - keep_days * 86400)
+        with self._lock:
+            for cam in self.cameras():
+                for day in os.listdir(os.path.join(self.root, cam)):
+                    if day < cutoff:
+                        shutil.rmtree(os.path.join(self.root, cam, day))
+                        for kind in ("relations", "detections"):
+                            self._partitions.pop((cam, day, kind), None)
+
+
+def describe(events, limit=5):
+    """Short text lines for prompts/explanations, newest first."""
+    lines = []
+    for event in sorted(events, key=lambda e: e["time"], reverse=True)[:limit]:
+        when = datetime.datetime.fromtimestamp(event["time"]).strftime("%Y-%m-%d %H:%M:%S")
+        where = f" in the {event['room']}" if event.get("room") else ""
+        lines.append(f"{when}: {event['subject']} {event['relation']} {event['object']}{where} "
+                     f"(camera {event['camera']})")
+    return "\n".join(lines)
+
+
+_PRESENCE = re.compile(r"\b(near|someone|somebody|anyone|anybody|approached|seen|was there|been there)\b")
+
+
+def answer_event_question(store, text, now=None):
+    """
+    Answer "when was someone last near the oven" / "was the door approached
+    overnight" style questions from the store; None if the text isn't one.
+    """
+    text = (text or "").lower()
+    if not re.match(r"^\s*(when|was|has|did|how many times)\b", text):
+        return None
+    # "was the tv turned off?" is a device question for the command pipeline
+    if not _PRESENCE.search(text):
+        return None
+    now = time.time() if now is None else now
+    candidates = [name for name, _ in RELATION_GROUPS] + store.names
+    objects = [
+        name for name in dict.fromkeys(candidates)
+        if name and name not in ("person", "near") and re.search(rf"\b{re.escape(name.replace('_', ' '))}\b", text)
+    ]
+    if not objects:
+        return None
+    # Prefer the object mentioned that actually has events
+    obj = next((name for name in objects if store.last(name, before=now)), objects[0])
+
+    if "overnight" in text or "last night" in text:
+        local_now = datetime.datetime.fromtimestamp(now)
+        night_end = local_now.replace(hour=6, minute=0, second=0, microsecond=0)
+        if local_now < night_end:
+            night_end -= datetime.timedelta(days=1)
+        start, end = (night_end - datetime.timedelta(hours=8)).timestamp(), night_end.timestamp()
+        count = store.count(obj, start=start, end=end)
+        if not count:
+            return f"No one was near the {obj.replace('_', ' ')} overnight."
+        return f"Yes, seen {count} time(s) overnight; latest:\n" + describe(store.query(obj, start=start, end=end, limit=5))
+
+    if "today" in text:
+        start = datetime.datetime.fromtimestamp(now).replace(hour=0, minute=0, second=0, microsecond=0)
+        count = store.count(obj, start=start.timestamp(), end=now)
+        if not count:
+            return f"No one has been near the {obj.replace('_', ' ')} today."
+        return f"Seen {count} time(s) today; latest:\n" + describe(store.query(obj, start=start.timestamp(), end=now, limit=5))
+
+    event = store.last(obj, before=now)
+    if event is None:
+        return f"I have no record of anyone near the {obj.replace('_', ' ')}."
+    return "Last seen: " + describe([event])
@@ -13,17 +13,118 @@ Supported devices via vision:
 - (optional) smart_lock / front_door via 'door' proximity
 """
 
+from home_topology import get_topology
+from keyword_automaton import KeywordAutomaton
+
+
 def _cmd(device, location, action, value=None):
     c = {"device": device, "location": location, "action": action}
     if value is not None:
         c["value"] = value
     return c
 
-def _any_near(image_context, object_name):
-    return any(rel.get("subject") == "person" and
-               rel.get("relation") == "near" and
-               rel.get("object") == object_name
-               for rel in image_context.get("relations", []))
+TV = ("tv", "television", "screen")
+OVEN = ("oven", "stove", "microwave")
+TURN_ON = ("turn on", "switch on")
+TURN_OFF = ("turn off", "switch off")
+
+# Rule table, evaluated top to bottom (command order = row order):
+#   (keyword groups - every group needs one of its keywords in the text,
+#    scene facts - any one must hold ("!" negates),
+#    command)
+# Keywords match as substrings, like the `in` checks they replace.
+# Facts: "near:<object>" (person near object), "person_relation", "person_detected".
+RULES = [
+    # 1) TV: "turn on the tv where the child/person is standing", "play", "mute if nobody there"
+    ((TV, TURN_ON + ("play",)), ("near:tv",), _cmd("smart_tv", "living room", "turn_on")),
+    ((TV, ("mute",)), ("near:tv",), _cmd("smart_tv", "living room", "set_volume", 0)),
+    ((TV, TURN_OFF), ("near:tv",), _cmd("smart_tv", "living room", "turn_off")),
+    # Generic "turn on tv where child is standing"
+    ((("turn on",), ("tv",), ("where",)), ("near:tv",), _cmd("smart_tv", "living room", "turn_on")),
+
+    # 2) Oven/Stove: "child near oven, turn it off" / "preheat if someone is in kitchen"
+    ((OVEN, TURN_OFF + ("stop",)), ("near:oven",), _cmd("smart_oven", "kitchen", "turn_off")),
+    ((OVEN, ("turn on", "preheat", "start")), ("near:oven",), _cmd("smart_oven", "kitchen", "turn_on")),
+    # "child is near oven, turn it off" even if not explicitly saying oven in text
+    ((("child", "kid", "person"), TURN_OFF + ("stop", "make safe", "shut")), ("near:oven",),
+     _cmd("smart_oven", "kitchen", "turn_off")),
+
+    # 3) Lights: "lights where the person is -> on", "dim if nobody around screen/sofa"
+    ((("light", "lamp"), TURN_ON), ("near:seating_area", "near:tv"), _cmd("livingroom_light", "living room", "turn_on")),
+    ((("light", "lamp"), ("dim",)), ("near:seating_area", "near:tv"),
+     _cmd("livingroom_light", "living room", "set_brightness", 40)),
+    ((("light", "lamp"), ("turn off",)), ("near:seating_area", "near:tv"),
+     _cmd("livingroom_light", "living room", "turn_off")),
+
+    # 4) Thermostat: presence-based comfort nudge if the user asks
+    ((("thermostat", "temperature"), ("warmer", "increase", "raise", "heat")), ("person_relation",),
+     _cmd("smart_thermostat", "hallway", "set_temperature", 24)),
+    ((("thermostat", "temperature"), ("cooler", "decrease", "lower", "ac")), ("person_relation",),
+     _cmd("smart_thermostat", "hallway", "set_temperature", 20)),
+
+    # 5) Robot vacuum: don't start while people are in the seating area
+    ((("vacuum", "robot", "clean"), ("start", "begin")), ("!near:seating_area",),
+     _cmd("robot_vacuum", "living room", "start")),
+    ((("vacuum", "robot", "clean"), ("dock", "stop", "pause")), (), _cmd("robot_vacuum", "living room", "dock")),
+
+    # 6) Sprinklers: don't run if people are in frame (if your camera watches the lawn)
+    ((("sprinkler", "water lawn"), ("start", "run", "turn on")), ("!person_detected",),
+     _cmd("sprinkler_system", "front yard", "start")),
+    ((("sprinkler", "water lawn"), ("stop", "turn off")), (), _cmd("sprinkler_system", "front yard", "stop")),
+
+    # 7) Security camera: record / snapshot / toggle where a person is
+    ((("camera", "security"), ("record",)), ("person_detected",), _cmd("security_camera", "entryway", "start_recording")),
+    ((("camera", "security"), ("snapshot", "photo", "snap")), ("person_detected",),
+     _cmd("security_camera", "entryway", "snapshot")),
+    ((("camera", "security"), ("on", "enable")), ("person_detected",), _cmd("security_camera", "entryway", "turn_on")),
+    ((("camera", "security"), ("off", "disable")), ("person_detected",), _cmd("security_camera", "entryway", "turn_off")),
+
+    # 8) Door/Lock: "open/lock the door where the person is"
+    ((("door", "lock"), ("unlock", "open")), ("near:door",), _cmd("smart_lock", "front door", "unlock")),
+    ((("door", "lock"), ("lock", "close")), ("near:door",), _cmd("smart_lock", "front door", "lock")),
+]
+
+_AUTOMATON = KeywordAutomaton(kw for groups, _, _ in RULES for group in groups for kw in group)
+
+def _compile(groups, needs, command):
+    """(remaining keyword groups, required facts, negated facts, command, dedup key) for one row."""
+    positive = frozenset(fact for fact in needs if not fact.startswith("!"))
+    negative = frozenset(fact[1:] for fact in needs if fact.startswith("!"))
+    key = (command["device"], command["location"], command["action"], command.get("value"))
+    return tuple(frozenset(group) for group in groups[1:]), positive, negative, command, key
+
+
+_COMPILED = [_compile(*rule) for rule in RULES]
+# Rules are only checked when a keyword of their first group occurs in the text
+_RULES_BY_KEYWORD = {
+    kw: [i for i, (groups, _, _) in enumerate(RULES) if kw in groups[0]]
+    for groups, _, _ in RULES for kw in groups[0]
+}
+_last_index = (None, None)
+
+
+def scene_facts(image_context):
+    """
+    Set of facts the rules test: "near:<object>" for person-near-object
+    relations, plus "person_relation" / "person_detected". Relations are
+    indexed once per frame: utterances on the same context reuse the set.
+    """
+    global _last_index
+    rels = image_context.get("relations", [])
+    cached_rels, facts = _last_index
+    if cached_rels is not rels:
+        facts = set()
+        for rel in rels:
+            if rel.get("subject") == "person":
+                facts.add("person_relation")
+                if rel.get("relation") == "near":
+                    facts.add("near:" + rel.get("object", ""))
+        facts = frozenset(facts)
+        _last_index = (rels, facts)
+    if any(d.get("label") == "person" for d in image_context.get("detections", [])):
+        return facts | {"person_detected"}
+    return facts
+
 
 def derive_commands_from_vision(user_text, image_context):
     """
@@ -34,127 +135,40 @@ def derive_commands_from_vision(user_text, image_context):
     if not image_context:
         return []
 
-    text = (user_text or "").lower()
-    rels = image_context.get("relations", [])
-    dets = image_context.get("detections", [])
+    found = _AUTOMATON.find((user_text or "").lower())
+    candidates = sorted({i for kw in found for i in _RULES_BY_KEYWORD.get(kw, ())})
+    if not candidates:
+        return []
+    facts = scene_facts(image_context)
 
     commands = []
-
-    # 1) TV: “turn on the tv where the child/person is standing”, “play”, “mute if nobody there”
-    if "tv" in text or "television" in text or "screen" in text:
-        if _any_near(image_context, "tv"):
-            # Person near TV → operate living room TV (assumption)
-            if any(k in text for k in ["turn on", "switch on", "play"]):
-                commands.append(_cmd("smart_tv", "living room", "turn_on"))
-            if "mute" in text:
-                commands.append(_cmd("smart_tv", "living room", "set_volume", 0))
-            if "turn off" in text or "switch off" in text:
-                commands.append(_cmd("smart_tv", "living room", "turn_off"))
-
-    # If a person near TV but user asked generic “turn on tv where child is standing”
-    if ("turn on" in text and "tv" in text and "where" in text) and _any_near(image_context, "tv"):
-        commands.append(_cmd("smart_tv", "living room", "turn_on"))
-
-    # 2) Oven/Stove: “child near oven, turn it off” / “preheat if someone is in kitchen”
-    if "oven" in text or "stove" in text or "microwave" in text:
-        if _any_near(image_context, "oven"):
-            if any(k in text for k in ["turn off", "switch off", "stop"]):
-                commands.append(_cmd("smart_oven", "kitchen", "turn_off"))
-            if any(k in text for k in ["turn on", "preheat", "start"]):
-                commands.append(_cmd("smart_oven", "kitchen", "turn_on"))
-
-    # “child is near oven, turn it off” even if not explicitly saying oven in text
-    if ("child" in text or "kid" in text or "person" in text) and _any_near(image_context, "oven"):
-        if any(k in text for k in ["turn off", "switch off", "stop", "make safe", "shut"]):
-            commands.append(_cmd("smart_oven", "kitchen", "turn_off"))
-
-    # 3) Lights: “lights where the person is → on”, “dim if nobody around screen/sofa”
-    if "light" in text or "lights" in text or "lamp" in text:
-        if _any_near(image_context, "seating_area") or _any_near(image_context, "tv"):
-            if any(k in text for k in ["turn on", "switch on"]):
-                commands.append(_cmd("livingroom_light", "living room", "turn_on"))
-            if "dim" in text:
-                commands.append(_cmd("livingroom_light", "living room", "set_brightness", 40))
-            if "turn off" in text:
-                commands.append(_cmd("livingroom_light", "living room", "turn_off"))
-
-    # 4) Thermostat: presence-based tweaks
-    if "thermostat" in text or "temperature" in text:
-        if any(r["subject"] == "person" for r in rels):
-            # If people present, a gentle comfort nudge if user asks
-            if any(k in text for k in ["warmer", "increase", "raise", "heat"]):
-                commands.append(_cmd("smart_thermostat", "hallway", "set_temperature", 24))
-            if any(k in text for k in ["cooler", "decrease", "lower", "ac"]):
-                commands.append(_cmd("smart_thermostat", "hallway", "set_temperature", 20))
-
-    # 5) Robot vacuum: avoid if people in seating area; start if user asks and no one near seating
-    if "vacuum" in text or "robot" in text or "clean" in text:
-        if "start" in text or "begin" in text:
-            if not _any_near(image_context, "seating_area"):
-                commands.append(_cmd("robot_vacuum", "living room", "start"))
-        if "dock" in text or "stop" in text or "pause" in text:
-            commands.append(_cmd("robot_vacuum", "living room", "dock"))
-
-    # 6) Sprinklers: don’t run if people detected on lawn (if your camera watches lawn)
-    if "sprinkler" in text or "sprinklers" in text or "water lawn" in text:
-        # If people are in frame and user says start, choose not to add start (pure vision logic)
-        if "start" in text or "run" in text or "turn on" in text:
-            if not any(d["label"] == "person" for d in dets):
-                commands.append(_cmd("sprinkler_system", "front yard", "start"))
-        if "stop" in text or "turn off" in text:
-            commands.append(_cmd("sprinkler_system", "front yard", "stop"))
-
-    # 7) Security camera: if user mentions “where person is” → focus, record, snapshot
-    if "camera" in text or "security" in text:
-        if any(d["label"] == "person" for d in dets):
-            if "record" in text or "start recording" in text:
-                commands.append(_cmd("security_camera", "entryway", "start_recording"))
-            if "snapshot" in text or "photo" in text or "snap" in text:
-                commands.append(_cmd("security_camera", "entryway", "snapshot"))
-            if "on" in text or "enable" in text:
-                commands.append(_cmd("security_camera", "entryway", "turn_on"))
-            if "off" in text or "disable" in text:
-                commands.append(_cmd("security_camera", "entryway", "turn_off"))
-
-    # 8) Door/Lock: “open/lock the door where the person is”
-    if "door" in text or "lock" in text:
-        if _any_near(image_context, "door"):
-            if "unlock" in text or "open" in text:
-                commands.append(_cmd("smart_lock", "front door", "unlock"))
-            if "lock" in text or "close" in text:
-                commands.append(_cmd("smart_lock", "front door", "lock"))
-
-    # Dedup (device+location+action)
     seen = set()
-    deduped = []
-    for c in commands:
-        key = (c.get("device"), c.get("location"), c.get("action"), c.get("value"))
+    for i in candidates:
+        groups, positive, negative, command, key = _COMPILED[i]
+        if any(found.isdisjoint(group) for group in groups):
+            continue
+        # Any one fact may hold: a present positive or an absent negated one
+        if (positive or negative) and positive.isdisjoint(facts) and negative <= facts:
+            continue
+        # Dedup (device+location+action+value)
         if key not in seen:
             seen.add(key)
-            deduped.append(c)
-            
+            commands.append(dict(command))
+    return commands
+
+
             # --- New helper: map "child/person standing" → actual room from vision ---
-def map_child_location(commands, image_context):
+def map_child_location(commands, image_context, topology=None):
     """
-    Replace fake locations like 'child standing' with actual rooms (living room, kitchen, etc.)
-    based on vision detections/relations.
+    Replace fake locations like 'child standing' with the room the person is
+    actually in (home topology: zone, nearby object or camera), and pin the
+    command to that room's exact device key ("device_key") when it has one.
     """
     if not image_context:
         return commands
 
-    dets = image_context.get("detections", [])
-    rels = image_context.get("relations", [])
-
-    # Simple heuristic: check if person near a known object → assign that room
-    room_guess = None
-    if any(r["subject"] == "person" and r["object"] == "tv" for r in rels):
-        room_guess = "living room"
-    elif any(r["subject"] == "person" and r["object"] == "oven" for r in rels):
-        room_guess = "kitchen"
-    elif any(r["subject"] == "person" and r["object"] == "door" for r in rels):
-        room_guess = "entryway"
-    elif any(r["subject"] == "person" and r["object"] == "seating_area" for r in rels):
-        room_guess = "living room"
+    topology = topology or get_topology()
+    room_guess = topology.person_room(image_context)
 
     updated = []
     for cmd in commands:
@@ -162,6 +176,9 @@ def map_child_location(commands, image_context):
         if "child" in loc or "person" in loc:
             if room_guess:
                 cmd["location"] = room_guess
+                device_key = topology.resolve_device(room_guess, cmd.get("device", ""))
+                if device_key:
+                    cmd["device_key"] = device_key
         updated.append(cmd)
     return updated
 
@@ -1,80 +1,276 @@
 # vision_module.py
-from ultralytics import YOLO
+import os
+import time
+
+import cv2
+import numpy as np
+
+from vision_adaptive import DEFAULT_SIZES, AdaptiveController
+from vision_cache import FrameCache
+from vision_zones import DEFAULT_ZONES_PATH, load_zones
+
+NEAR_THRESH = 120.0
+
+# (relation object name, detection labels that count as that object)
+RELATION_GROUPS = [
+    ("oven", ["oven", "microwave", "stove"]),
+    ("tv", ["tv", "monitor", "laptop"]),
+    ("door", ["door", "door handle"]),
+    ("remote", ["remote", "cell phone"]),
+    ("seating_area", ["dining table", "couch", "sofa"]),
+]
+PERSON_GROUP = -2
+GROUP_OF_LABEL = {label: i for i, (_, group) in enumerate(RELATION_GROUPS) for label in group}
+GROUP_OF_LABEL["person"] = PERSON_GROUP
 
 class VisionModule:
     """
     Lightweight wrapper around YOLOv8 for single-frame object detection
     and simple proximity (nearby) relationships.
     """
-    def __init__(self, model_path="yolov8n.pt"):
+    def __init__(self, model_path="yolov8n.pt", cache_size=32, zones_path=DEFAULT_ZONES_PATH,
+                 latency_budget_ms=None, adaptive_models=("yolov8n.pt", "yolov8s.pt"), backend="ultralytics"):
+        """
+        latency_budget_ms: if set, an AdaptiveController picks the model variant
+        (from adaptive_models) and input size per call to stay within it.
+        backend: "ultralytics" (PyTorch) or "onnx" (exported model on onnxruntime;
+        "yolov8n.pt" resolves to "yolov8n.onnx", see vision_onnx.py)
+        """
+        if backend not in ("ultralytics", "onnx"):
+            raise ValueError(f"Unknown vision backend: {backend}")
+        self.backend = backend
         # Auto-downloads the first time. Small + fast.
-        self.model = YOLO(model_path)
+        self.model = self._load_model(model_path)
+        self.models = {model_path: self.model}
+        self.controller = None
+        if latency_budget_ms:
+            models = (model_path,) + tuple(m for m in adaptive_models if m != model_path)
+            # Load every variant now so a switch never stalls the command path
+            for m in models[1:]:
+                self.models[m] = self._load_model(m)
+            # Static ONNX exports only run at their export size; offer just that one
+            sizes = {
+                m: (self.models[m].fixed_size,) if getattr(self.models[m], "fixed_size", None) else DEFAULT_SIZES
+                for m in models
+            }
+            self.controller = AdaptiveController(latency_budget_ms, models=models, sizes=sizes)
+        self.last_batch_stats = {}
+        # Unchanged frames (same file mtime/size, same array bytes) skip inference
+        self.cache = FrameCache(cache_size) if cache_size else None
+        # {camera_id: CameraZones}; cameras listed there are cropped to their zones
+        self.zones = load_zones(zones_path) if zones_path else {}
 
-    def analyze_frame(self, image_path):
+    def _load_model(self, model_path):
+        if self.backend == "onnx":
+            # onnxruntime only: no torch/ultralytics import on this path
+            from vision_onnx import OnnxDetector
+            if model_path.endswith(".pt"):
+                model_path = os.path.splitext(model_path)[0] + ".onnx"
+            return OnnxDetector(model_path)
+        from ultralytics import YOLO
+        return YOLO(model_path)
+
+    def analyze_frame(self, image_path, camera_id=None):
         """
-        Run detection on a single image file.
+        Run detection on a single image file (or BGR array).
+        If camera_id has zones configured, only the zone regions are inferred
+        and relations are the zones' room-level relations.
         Returns:
             {
               "detections": [{"label": str, "confidence": float, "bbox": (x1,y1,x2,y2)}...],
               "relations": [{"subject":"person","relation":"near","object":"oven", "distance": float}, ...]
             }
         """
-        results = self.model(image_path)
-        if not results or not results[0].boxes:
+        if camera_id in self.zones:
+            return self.analyze_frames({camera_id: image_path})[camera_id]
+
+        key = self.cache.key(image_path) if self.cache else None
+        if key is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+
+        results = self._infer(image_path, verbose=False)
+        if not results:
             return {"detections": [], "relations": []}
+        parsed = self._parse_result(results[0])
+        if key is not None:
+            self.cache.put(key, parsed)
+        return parsed
 
-        names = results[0].names
-        boxes = results[0].boxes.data.tolist()
+    def analyze_frames(self, frames):
+        """
+        Run detection on frames from several cameras in one batched model call.
 
-        dets = []
-        for x1, y1, x2, y2, conf, cls_id in boxes:
-            label = names[int(cls_id)]
-            dets.append({
-                "label": label,
-                "confidence": float(conf),
-                "bbox": (float(x1), float(y1), float(x2), float(y2))
-            })
+        frames: {camera_id: image path or BGR array} or a list of paths/arrays
+        Returns the same shape: {camera_id: analyze_frame-style dict} or a list.
+        Cameras with zones contribute one crop per (merged) zone region.
+        self.last_batch_stats holds {"frames", "crops", "seconds", "fps"} for the call.
+        """
+        keys = list(frames.keys()) if isinstance(frames, dict) else None
+        sources = list(frames.values()) if keys is not None else list(frames)
+        zones = [self.zones.get(k) for k in keys] if keys is not None else [None] * len(sources)
 
-        relations = self._build_relations(dets)
-        return {"detections": dets, "relations": relations}
+        parsed = [None] * len(sources)
+        pending = []
+        cache_keys = {}
+        for i, src in enumerate(sources):
+            if self.cache:
+                cache_keys[i] = self.cache.key(src)
+                if zones[i] is not None:
+                    # Zoned results depend on the camera, not just the pixels
+                    cache_keys[i] = (keys[i],) + cache_keys[i]
+                parsed[i] = self.cache.get(cache_keys[i])
+            if parsed[i] is None:
+                pending.append(i)
 
-    # -------- helpers --------
-    def _center(self, box):
-        x1, y1, x2, y2 = box
-        return ((x1 + x2) / 2.0, (y1 + y2) / 2.0)
+        # Decode paths up front so every uncached frame (or zone crop) goes
+        # through a single forward pass; owners maps each image back to its frame
+        images = []
+        owners = []
+        frame_sizes = {}
+        for i in pending:
+            image = sources[i]
+            if not isinstance(image, np.ndarray):
+                image = cv2.imread(str(sources[i]))
+                if image is None:
+                    raise FileNotFoundError(f"Could not read frame: {sources[i]}")
+            height, width = image.shape[:2]
+            frame_sizes[i] = (width, height)
+            if zones[i] is None:
+                images.append(image)
+                owners.append((i, 0, 0))
+                continue
+            for x1, y1, x2, y2 in zones[i].crop_rects(width, height):
+                if x2 > x1 and y2 > y1:
+                    images.append(image[y1:y2, x1:x2])
+                    owners.append((i, x1, y1))
+
+        t0 = time.perf_counter()
+        results = self._infer(images, verbose=False) if images else []
+        elapsed = time.perf_counter() - t0
+        self.last_batch_stats = {
+            "frames": len(pending),
+            "crops": len(images),
+            "seconds": elapsed,
+            "fps": len(pending) / elapsed if elapsed > 0 else 0.0,
+        }
+        if self.controller is not None:
+            self.last_batch_stats.update(self.controller.current)
+
+        per_frame = {i: [] for i in pending}
+        for (i, dx, dy), result in zip(owners, results):
+            labels, confs, boxes = self._result_arrays(result)
+            # Crop coordinates back to full-frame pixels
+            boxes += (dx, dy, dx, dy)
+            per_frame[i].append((labels, confs, boxes))
+
+        for i in pending:
+            chunks = per_frame[i]
+            labels = np.concatenate([c[0] for c in chunks]) if chunks else np.array([], dtype=object)
+            confs = np.concatenate([c[1] for c in chunks]) if chunks else np.zeros(0)
+            boxes = np.concatenate([c[2] for c in chunks]) if chunks else np.zeros((0, 4))
+            parsed[i] = self._build_context(labels, confs, boxes, zones[i], frame_sizes[i])
+            if self.cache:
+                self.cache.put(cache_keys[i], parsed[i])
+        return dict(zip(keys, parsed)) if keys is not None else parsed
 
-    def _dist(self, a, b):
-        ax, ay = self._center(a)
-        bx, by = self._center(b)
-        return ((ax - bx) ** 2 + (ay - by) ** 2) ** 0.5
+    def _infer(self, source, **kwargs):
+        """One model call, at the controller's model and input size when adaptive."""
+        if self.controller is None:
+            return self.model(source, **kwargs)
+        settings = self.controller.choose()
+        t0 = time.perf_counter()
+        results = self.models[settings["model"]](source, imgsz=settings["imgsz"], **kwargs)
+        # The budget is per image: a batch of N frames/crops is charged 1/N of its time
+        images = len(source) if isinstance(source, list) else 1
+        self.controller.record((time.perf_counter() - t0) / max(1, images))
+        return results
 
-    def _build_relations(self, dets, near_thresh=120.0):
+    def _parse_result(self, result):
+        """Detections + relations dict from one ultralytics Results object."""
+        return self._build_context(*self._result_arrays(result))
+
+    def _result_arrays(self, result):
+        """(labels, confidences, boxes) arrays from one model result."""
+        if isinstance(result, tuple):
+            # The ONNX backend already returns arrays
+            return result
+        if not result.boxes:
+            return np.array([], dtype=object), np.zeros(0), np.zeros((0, 4))
+        names = result.names
+        data = result.boxes.data.cpu().numpy()
+        boxes = data[:, :4].astype(np.float64)
+        confs = data[:, 4].astype(np.float64)
+        labels = np.array([names[int(c)] for c in data[:, 5]], dtype=object)
+        return labels, confs, boxes
+
+    def _build_context(self, labels, confs, boxes, camera_zones=None, frame_size=None):
+        if len(labels) == 0:
+            return {"detections": [], "relations": []}
+        dets = [
+            {"label": label, "confidence": float(conf), "bbox": tuple(float(v) for v in box)}
+            for label, conf, box in zip(labels, confs, boxes)
+        ]
+        if camera_zones is not None:
+            relations = camera_zones.relations(labels, boxes, *frame_size)
+        else:
+            relations = build_relations(labels, boxes)
+        return {"detections": dets, "relations": relations}
+
+    # -------- helpers --------
+    def _build_relations(self, dets, near_thresh=NEAR_THRESH):
         """
         Build simple 'near' relations between key objects.
         """
-        people = [d for d in dets if d["label"] == "person"]
-        ovens  = [d for d in dets if d["label"] in ["oven", "microwave", "stove"]]
-        tvs    = [d for d in dets if d["label"] in ["tv", "monitor", "laptop"]]
-        locks  = [d for d in dets if d["label"] in ["door", "door handle"]]
-        remotes= [d for d in dets if d["label"] in ["remote", "cell phone"]]
-        tables = [d for d in dets if d["label"] in ["dining table", "couch", "sofa"]]
-
-        relations = []
-        def add_near(subjects, objects, obj_name):
-            for s in subjects:
-                for o in objects:
-                    d = self._dist(s["bbox"], o["bbox"])
-                    if d <= near_thresh:
-                        relations.append({
-                            "subject": "person",
-                            "relation": "near",
-                            "object": obj_name,
-                            "distance": float(d)
-                        })
-        add_near(people, ovens, "oven")
-        add_near(people, tvs, "tv")
-        add_near(people, locks, "door")
-        add_near(people, remotes, "remote")
-        add_near(people, tables, "seating_area")
-
-        return relations
+        if not dets:
+            return []
+        labels = np.array([d["label"] for d in dets], dtype=object)
+        boxes = np.array([d["bbox"] for d in dets], dtype=np.float64)
+        return build_relations(labels, boxes, near_thresh)
+
+
+def near_pairs(labels, boxes, near_thresh=NEAR_THRESH):
+    """
+    (object name, person index, object index, distance) for every person
+    within near_thresh of a key object, using detection indices into labels.
+
+    labels: (N,) array of class names, boxes: (N, 4) array of x1,y1,x2,y2.
+    For each object group, person-to-object center distances are computed in
+    one broadcasted operation instead of a Python double loop. Pairs come out
+    in the same order as the pairwise loop (group, person, object).
+    """
+    group_ids = np.fromiter((GROUP_OF_LABEL.get(label, -1) for label in labels), dtype=np.int64)
+    boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+    centers = (boxes[:, :2] + boxes[:, 2:]) / 2.0
+
+    person_idx = np.flatnonzero(group_ids == PERSON_GROUP)
+    if len(person_idx) == 0:
+        return []
+    people = centers[person_idx]
+
+    pairs = []
+    for group_id, (obj_name, _) in enumerate(RELATION_GROUPS):
+        object_idx = np.flatnonzero(group_ids == group_id)
+        if len(object_idx) == 0:
+            continue
+        diff = people[:, None, :] - centers[object_idx][None, :, :]
+        dist = np.sqrt((diff ** 2).sum(axis=2))
+        for p, o in zip(*np.nonzero(dist <= near_thresh)):
+            pairs.append((obj_name, int(person_idx[p]), int(object_idx[o]), float(dist[p, o])))
+    return pairs
+
+
+def build_relations(labels, boxes, near_thresh=NEAR_THRESH):
+    """
+    'near' relations from detections held as arrays (see near_pairs).
+    """
+    return [
+        {
+            "subject": "person",
+            "relation": "near",
+            "object": obj_name,
+            "distance": d
+        }
+        for obj_name, _, _, d in near_pairs(labels, boxes, near_thresh)
+    ]
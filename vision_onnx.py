@@ -0,0 +1,242 @@
+# vision_onnx.py
+"""
+CPU inference backend for exported YOLOv8 ONNX models.
+
+Runs the model through onnxruntime (no torch/ultralytics import at runtime)
+with letterbox preprocessing, box decoding and NMS in NumPy. Used by
+VisionModule(backend="onnx"); detections come out in the same schema as the
+ultralytics path.
+
+One-time model preparation (needs ultralytics / the onnx package):
+    python vision_onnx.py export yolov8n.pt                  # -> yolov8n.onnx
+    python vision_onnx.py export yolov8n.pt --dynamic        # variable input size
+    python vision_onnx.py quantize yolov8n.onnx yolov8n-int8.onnx [--calib frames/]
+
+Without --calib, weights are quantized dynamically; with a folder of sample
+frames, activations are calibrated too (static QDQ int8), which is usually
+both faster and more accurate for conv nets.
+"""
+
+import argparse
+import ast
+import glob
+import os
+import time
+
+import cv2
+import numpy as np
+import onnxruntime as ort
+
+# Class names for models exported without metadata (YOLOv8 COCO order)
+COCO_NAMES = [
+    "person", "bicycle", "car", "motorcycle", "airplane", "bus", "train", "truck", "boat",
+    "traffic light", "fire hydrant", "stop sign", "parking meter", "bench", "bird", "cat", "dog",
+    "horse", "sheep", "cow", "elephant", "bear", "zebra", "giraffe", "backpack", "umbrella",
+    "handbag", "tie", "suitcase", "frisbee", "skis", "snowboard", "sports ball", "kite",
+    "baseball bat", "baseball glove", "skateboard", "surfboard", "tennis racket", "bottle",
+    "wine glass", "cup", "fork", "knife", "spoon", "bowl", "banana", "apple", "sandwich", "orange",
+    "broccoli", "carrot", "hot dog", "pizza", "donut", "cake", "chair", "couch", "potted plant",
+    "bed", "dining table", "toilet", "tv", "laptop", "mouse", "remote", "keyboard", "cell phone",
+    "microwave", "oven", "toaster", "sink", "refrigerator", "book", "clock", "vase", "scissors",
+    "teddy bear", "hair drier", "toothbrush",
+]
+
+
+def letterbox(image, size, color=114):
+    """
+    Resize keeping aspect ratio and pad to size x size (ultralytics' default
+    preprocessing). Returns (padded image, scale, (pad_x, pad_y)).
+    """
+    height, width = image.shape[:2]
+    scale = min(size / height, size / width)
+    new_w, new_h = int(round(width * scale)), int(round(height * scale))
+    if (new_w, new_h) != (width, height):
+        image = cv2.resize(image, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+    pad_x, pad_y = (size - new_w) / 2.0, (size - new_h) / 2.0
+    top, left = int(round(pad_y - 0.1)), int(round(pad_x - 0.1))
+    padded = cv2.copyMakeBorder(image, top, size - new_h - top, left, size - new_w - left,
+                                cv2.BORDER_CONSTANT, value=(color, color, color))
+    return padded, scale, (left, top)
+
+
+def nms(boxes, scores, iou_thresh):
+    """Indices kept by greedy non-maximum suppression, highest score first."""
+    x1, y1, x2, y2 = boxes.T
+    areas = (x2 - x1) * (y2 - y1)
+    order = scores.argsort()[::-1]
+    keep = []
+    while order.size:
+        i = order[0]
+        keep.append(i)
+        rest = order[1:]
+        w = np.clip(np.minimum(x2[i], x2[rest]) - np.maximum(x1[i], x1[rest]), 0, None)
+        h = np.clip(np.minimum(y2[i], y2[rest]) - np.maximum(y1[i], y1[rest]), 0, None)
+        inter = w * h
+        iou = inter / (areas[i] + areas[rest] - inter + 1e-9)
+        order = rest[iou <= iou_thresh]
+    return np.array(keep, dtype=np.int64)
+
+
+def decode(output, conf_thresh=0.25, iou_thresh=0.7, max_det=300):
+    """
+    (class ids, confidences, xyxy boxes) from one raw YOLOv8 output of shape
+    (4 + num_classes, num_anchors): cx, cy, w, h then per-class scores.
+    """
+    preds = output.T
+    scores = preds[:, 4:]
+    class_ids = scores.argmax(axis=1)
+    confs = scores[np.arange(len(scores)), class_ids]
+    mask = confs >= conf_thresh
+    if not mask.any():
+        return np.zeros(0, dtype=np.int64), np.zeros(0), np.zeros((0, 4))
+    preds, class_ids, confs = preds[mask], class_ids[mask], confs[mask]
+
+    cx, cy, w, h = preds[:, 0], preds[:, 1], preds[:, 2], preds[:, 3]
+    boxes = np.stack([cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2], axis=1)
+    # Offset boxes per class so one NMS pass never suppresses across classes
+    offsets = class_ids[:, None] * (boxes.max() + 1.0)
+    keep = nms(boxes + offsets, confs, iou_thresh)[:max_det]
+    return class_ids[keep], confs[keep].astype(np.float64), boxes[keep].astype(np.float64)
+
+
+def _model_names(session):
+    meta = session.get_modelmeta().custom_metadata_map
+    if "names" in meta:
+        names = ast.literal_eval(meta["names"])
+        return [names[i] for i in sorted(names)] if isinstance(names, dict) else list(names)
+    return COCO_NAMES
+
+
+class OnnxDetector:
+    """
+    Callable like an ultralytics model: detector(source or [sources]) returns
+    one (labels, confidences, boxes) tuple of arrays per image.
+    Thresholds default to the ultralytics predictor's (conf 0.25, iou 0.7).
+    Static exports ignore imgsz and use their fixed input size (fixed_size).
+    """
+
+    def __init__(self, model_path="yolov8n.onnx", conf_thresh=0.25, iou_thresh=0.7, threads=None):
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        self.input = self.session.get_inputs()[0]
+        self.names = np.array(_model_names(self.session), dtype=object)
+        self.conf_thresh = conf_thresh
+        self.iou_thresh = iou_thresh
+        # Static exports fix the input size (and sometimes the batch size)
+        shape = self.input.shape
+        self.fixed_size = shape[2] if isinstance(shape[2], int) else None
+        self.fixed_batch = shape[0] if isinstance(shape[0], int) else None
+
+    def __call__(self, source, imgsz=640, verbose=False):
+        sources = source if isinstance(source, list) else [source]
+        size = self.fixed_size or imgsz
+        images = []
+        for src in sources:
+            image = src if isinstance(src, np.ndarray) else cv2.imread(str(src))
+            if image is None:
+                raise FileNotFoundError(f"Could not read frame: {src}")
+            images.append(image)
+
+        letterboxed = [letterbox(image, size) for image in images]
+        # BGR HWC uint8 -> RGB NCHW float32 in [0, 1]
+        batch = np.stack([padded[:, :, ::-1] for padded, _, _ in letterboxed])
+        batch = np.ascontiguousarray(batch.transpose(0, 3, 1, 2), dtype=np.float32) / 255.0
+
+        step = self.fixed_batch or len(batch)
+        outputs = [
+            self.session.run(None, {self.input.name: batch[i:i + step]})[0]
+            for i in range(0, len(batch), step)
+        ]
+        outputs = np.concatenate(outputs)
+
+        results = []
+        for output, image, (_, scale, (pad_x, pad_y)) in zip(outputs, images, letterboxed):
+            class_ids, confs, boxes = decode(output, self.conf_thresh, self.iou_thresh)
+            # Undo the letterbox: back to original image pixels
+            boxes -= (pad_x, pad_y, pad_x, pad_y)
+            boxes /= scale
+            height, width = image.shape[:2]
+            boxes[:, [0, 2]] = boxes[:, [0, 2]].clip(0, width)
+            boxes[:, [1, 3]] = boxes[:, [1, 3]].clip(0, height)
+            results.append((self.names[class_ids], confs, boxes))
+        return results
+
+
+def export_model(weights="yolov8n.pt", imgsz=640, dynamic=False):
+    """
+    Export ultralytics weights to ONNX (simplified). dynamic=True keeps the
+    input size variable, which VisionModule's latency budget needs to switch
+    resolutions; static exports are slightly faster but fixed at imgsz.
+    """
+    from ultralytics import YOLO
+    return YOLO(weights).export(format="onnx", imgsz=imgsz, simplify=True, dynamic=dynamic)
+
+
+class _FrameReader:
+    """onnxruntime calibration reader over sample frames."""
+
+    def __init__(self, paths, input_name, size):
+        self.items = iter(paths)
+        self.input_name = input_name
+        self.size = size
+
+    def get_next(self):
+        for path in self.items:
+            image = cv2.imread(path)
+            if image is None:
+                continue
+            padded, _, _ = letterbox(image, self.size)
+            blob = padded[:, :, ::-1].transpose(2, 0, 1)[None].astype(np.float32) / 255.0
+            return {self.input_name: np.ascontiguousarray(blob)}
+        return None
+
+
+def quantize_model(model_path, out_path, calib_dir=None, max_calib=100):
+    """
+    Int8-quantize an ONNX model: static (calibrated on frames in calib_dir)
+    if given, else dynamic weight-only quantization.
+    """
+    from onnxruntime.quantization import QuantType, quantize_dynamic, quantize_static
+
+    if not calib_dir:
+        quantize_dynamic(model_path, out_path, weight_type=QuantType.QUInt8)
+        return out_path
+
+    paths = sorted(glob.glob(os.path.join(calib_dir, "*.jpg")) + glob.glob(os.path.join(calib_dir, "*.png")))
+    if not paths:
+        raise FileNotFoundError(f"No calibration frames in {calib_dir}")
+    session = ort.InferenceSession(model_path, providers=["CPUExecutionProvider"])
+    model_input = session.get_inputs()[0]
+    size = model_input.shape[2] if isinstance(model_input.shape[2], int) else 640
+    reader = _FrameReader(paths[:max_calib], model_input.name, size)
+    quantize_static(model_path, out_path, reader,
+                    activation_type=QuantType.QUInt8, weight_type=QuantType.QInt8)
+    return out_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    exp = sub.add_parser("export", help="export ultralytics weights to ONNX")
+    exp.add_argument("weights", nargs="?", default="yolov8n.pt")
+    exp.add_argument("--imgsz", type=int, default=640)
+    exp.add_argument("--dynamic", action="store_true", help="variable input size (for latency budgets)")
+    quant = sub.add_parser("quantize", help="int8-quantize an ONNX model")
+    quant.add_argument("model")
+    quant.add_argument("out")
+    quant.add_argument("--calib", default=None, help="folder of sample frames for static quantization")
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    if args.cmd == "export":
+        out = export_model(args.weights, args.imgsz, args.dynamic)
+    else:
+        out = quantize_model(args.model, args.out, args.calib)
+    print(f"[INFO] Wrote {out} in {time.perf_counter() - t0:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,374 @@
+# vision_pool.py
+"""
+Process-isolated vision inference.
+
+YOLO inference and its Python post-processing run in worker processes, so
+camera load never competes with command handling (control_device, the
+intent firewall) for the parent's GIL. Frames travel through preallocated
+shared-memory slots - only a small task tuple is pickled - and workers send
+back compact arrays (class-name table, uint16 ids, float32 confidences and
+boxes) plus the relations list. A worker that crashes fails only the frames
+it held, their slots are freed and a replacement process is started.
+
+VisionPool duck-types VisionModule (analyze_frame / analyze_frames), so it
+can be handed to VisionWorker, VideoMonitor or LazyComponent unchanged:
+
+    pool = VisionPool(workers=2).start()
+    context = pool.analyze_frame("frames/latest.jpg", camera_id="default")
+    pool.close()
+
+    vision = LazyComponent("VisionPool", "vision_pool", "start_pool", workers=2).start()
+
+Compare control-path latency under camera load, in-process vs pooled:
+    python vision_benchmark.py control --cameras 4 --workers 2
+"""
+
+import multiprocessing as mp
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from multiprocessing import shared_memory
+from multiprocessing.connection import wait
+
+import numpy as np
+
+from vision_cache import FrameCache
+from vision_zones import DEFAULT_ZONES_PATH
+
+
+def encode_context(context):
+    """Compact arrays for one analyze_frame result (what crosses the process boundary)."""
+    dets = context.get("detections", [])
+    names, ids = np.unique(np.array([d["label"] for d in dets], dtype=object), return_inverse=True)
+    return {
+        "names": tuple(names),
+        "ids": ids.astype(np.uint16),
+        "conf": np.array([d["confidence"] for d in dets], dtype=np.float32),
+        "boxes": np.array([d["bbox"] for d in dets], dtype=np.float32).reshape(-1, 4),
+        "relations": context.get("relations", []),
+    }
+
+
+def decode_context(packed):
+    """Back to the analyze_frame schema."""
+    names = packed["names"]
+    dets = [
+        {"label": names[i], "confidence": float(c), "bbox": tuple(float(v) for v in box)}
+        for i, c, box in zip(packed["ids"], packed["conf"], packed["boxes"])
+    ]
+    return {"detections": dets, "relations": packed["relations"]}
+
+
+def _worker_main(slot_names, model_kwargs, threads, tasks, results, vision_factory=None):
+    # Cap math-library threads before torch/onnxruntime are imported, so
+    # workers don't oversubscribe the cores the control path needs
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+        os.environ[var] = str(threads)
+    if vision_factory is None:
+        from vision_module import VisionModule as vision_factory
+
+    slots = [shared_memory.SharedMemory(name=name) for name in slot_names]
+    try:
+        # The parent caches by frame; a worker-side cache would only hash pixels twice
+        vision = vision_factory(cache_size=0, **model_kwargs)
+        results.send(("ready", os.getpid(), None))
+    except Exception as e:
+        results.send(("failed", os.getpid(), repr(e)))
+        return
+
+    while True:
+        task = tasks.get()
+        if task is None:
+            break
+        task_id, slot, source, camera_id = task
+        try:
+            if slot is not None:
+                shape, dtype = source
+                frame = np.ndarray(shape, dtype=dtype, buffer=slots[slot].buf)
+                context = vision.analyze_frame(frame, camera_id=camera_id)
+                del frame
+            else:
+                context = vision.analyze_frame(source, camera_id=camera_id)
+            results.send((task_id, slot, encode_context(context)))
+        except Exception as e:
+            # Not every exception pickles; the message is what callers need
+            results.send((task_id, slot, RuntimeError(f"{type(e).__name__}: {e}")))
+
+    for shm in slots:
+        shm.close()
+
+
+class VisionPool:
+    def __init__(self, workers=2, model_path="yolov8n.pt", backend="ultralytics",
+                 zones_path=DEFAULT_ZONES_PATH, max_frame_shape=(1080, 1920, 3), slots=None,
+                 threads_per_worker=1, cache_size=32, start_timeout=120.0, health_interval=0.5,
+                 vision_factory=None):
+        """
+        workers: inference processes (each loads its own model); one that dies
+            fails its in-flight frames and is replaced
+        max_frame_shape: largest array frame a shared-memory slot can hold
+        slots: frames in flight at once (default 2 per worker); submit blocks when all are busy
+        threads_per_worker: math-library threads per process
+        cache_size: parent-side FrameCache, so unchanged frames skip the round trip
+        health_interval: seconds between worker liveness checks
+        vision_factory: picklable callable(cache_size=..., **model kwargs) building
+            each worker's model (default VisionModule)
+        """
+        self.workers = workers
+        self.model_kwargs = {"model_path": model_path, "backend": backend, "zones_path": zones_path}
+        self.threads_per_worker = threads_per_worker
+        self.slot_bytes = int(np.prod(max_frame_shape))
+        self.n_slots = slots or 2 * workers
+        self.start_timeout = start_timeout
+        self.health_interval = health_interval
+        self.vision_factory = vision_factory
+        self.cache = FrameCache(cache_size) if cache_size else None
+        self.stats = {"submitted": 0, "completed": 0, "errors": 0, "shm_frames": 0, "path_frames": 0,
+                      "worker_restarts": 0}
+
+        self._ctx = mp.get_context("spawn")
+        # One entry per worker: {"proc", "tasks" (queue), "results" (pipe), "in_flight" (task ids),
+        # "ready", "retired"}
+        self._workers = []
+        self._shms = []
+        self._free_slots = queue.Queue()
+        self._pending = {}
+        self._pending_lock = threading.Lock()
+        self._task_ids = iter(range(1, 2 ** 62))
+        self._listener = None
+        self._started = False
+        self._closing = False
+
+    # -------- lifecycle --------
+    def start(self):
+        if self._started:
+            return self
+        self._shms = [shared_memory.SharedMemory(create=True, size=self.slot_bytes) for _ in range(self.n_slots)]
+        for slot in range(self.n_slots):
+            self._free_slots.put(slot)
+        self._closing = False
+        self._workers = [self._spawn() for _ in range(self.workers)]
+
+        deadline = time.monotonic() + self.start_timeout
+        for worker in self._workers:
+            try:
+                if not worker["results"].poll(max(0.0, deadline - time.monotonic())):
+                    raise TimeoutError(f"not ready after {self.start_timeout:.0f}s")
+                status, _, error = worker["results"].recv()
+            except (EOFError, OSError, TimeoutError) as e:
+                status, error = "failed", repr(e)
+            if status != "ready":
+                self.close()
+                raise RuntimeError(f"Vision worker {worker['proc'].pid} failed to start: {error}")
+            worker["ready"] = True
+
+        self._listener = threading.Thread(target=self._collect, name="vision-pool-results", daemon=True)
+        self._listener.start()
+        self._started = True
+        print(f"[Vision] Pool ready: {self.workers} worker processes, {self.n_slots} frame slots")
+        return self
+
+    def _spawn(self):
+        # Each worker gets its own task queue, so the parent knows which frames it
+        # holds, and its own result pipe, so a worker killed mid-write can only
+        # break its own channel
+        tasks = self._ctx.Queue()
+        results, child_end = self._ctx.Pipe(duplex=False)
+        proc = self._ctx.Process(
+            target=_worker_main, daemon=True,
+            args=([shm.name for shm in self._shms], self.model_kwargs, self.threads_per_worker,
+                  tasks, child_end, self.vision_factory),
+        )
+        proc.start()
+        child_end.close()
+        return {"proc": proc, "tasks": tasks, "results": results, "in_flight": set(),
+                "ready": False, "retired": False}
+
+    def close(self):
+        # Workers exiting from here on are not crashes
+        self._closing = True
+        for worker in self._workers:
+            worker["tasks"].put(None)
+        for worker in self._workers:
+            worker["proc"].join(timeout=5)
+            if worker["proc"].is_alive():
+                worker["proc"].terminate()
+        if self._listener is not None:
+            # Wakes within health_interval and sees _closing
+            self._listener.join(timeout=5)
+            self._listener = None
+        for worker in self._workers:
+            worker["results"].close()
+        self._workers = []
+        with self._pending_lock:
+            for future, _, _ in self._pending.values():
+                future.set_exception(RuntimeError("Vision pool closed"))
+            self._pending.clear()
+        for shm in self._shms:
+            shm.close()
+            shm.unlink()
+        self._shms = []
+        self._started = False
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    # -------- requests --------
+    def submit(self, frame, camera_id=None, timeout=None):
+        """
+        Queue one frame (path or BGR array); returns a Future of its context.
+        Arrays are copied into a free shared-memory slot, paths are read by the worker.
+        """
+        if not self._started:
+            raise RuntimeError("VisionPool.start() has not been called")
+        future = Future()
+        key = None
+        if self.cache:
+            key = self.cache.key(frame)
+            if camera_id is not None:
+                key = (camera_id,) + key
+            cached = self.cache.get(key)
+            if cached is not None:
+                future.set_result(cached)
+                return future
+        future.cache_key = key
+
+        slot = None
+        if isinstance(frame, np.ndarray):
+            if frame.nbytes > self.slot_bytes:
+                raise ValueError(f"Frame of {frame.shape} exceeds the pool's max_frame_shape")
+            # Blocks while every slot is in flight (backpressure on busy cameras)
+            slot = self._free_slots.get(timeout=timeout)
+            view = np.ndarray(frame.shape, dtype=frame.dtype, buffer=self._shms[slot].buf)
+            view[...] = frame
+            del view
+
+        task_id = next(self._task_ids)
+        with self._pending_lock:
+            # Least-loaded live worker; a crashed one is replaced by _check_workers
+            live = [w for w in self._workers if not w["retired"]]
+            if not live:
+                if slot is not None:
+                    self._free_slots.put(slot)
+                raise RuntimeError("No vision workers running")
+            worker = min(live, key=lambda w: len(w["in_flight"]))
+            worker["in_flight"].add(task_id)
+            self._pending[task_id] = (future, slot, worker)
+        self.stats["submitted"] += 1
+        if slot is not None:
+            self.stats["shm_frames"] += 1
+            worker["tasks"].put((task_id, slot, (frame.shape, frame.dtype.str), camera_id))
+        else:
+            self.stats["path_frames"] += 1
+            worker["tasks"].put((task_id, None, str(frame), camera_id))
+        return future
+
+    def _finish(self, task_id):
+        """Pop a pending task and release its slot; None if it was already failed."""
+        with self._pending_lock:
+            entry = self._pending.pop(task_id, None)
+            if entry is None:
+                return None
+            future, slot, worker = entry
+            worker["in_flight"].discard(task_id)
+        # Freed only here, so a late result from a crashed worker never frees a slot twice
+        if slot is not None:
+            self._free_slots.put(slot)
+        return future
+
+    def _check_workers(self):
+        """Fail the frames of workers that died and start replacements."""
+        for i, worker in enumerate(self._workers):
+            if self._closing or worker["retired"] or worker["proc"].is_alive():
+                continue
+            # Results it sent before dying still count
+            self._drain(worker)
+            error = RuntimeError(f"Vision worker {worker['proc'].pid} died "
+                                 f"(exit code {worker['proc'].exitcode})")
+            # Swapped out before its frames are failed, so no new frame is queued to it after
+            if worker["ready"]:
+                print(f"[WARNING] {error}, starting a replacement.")
+                self.stats["worker_restarts"] += 1
+                replacement = self._spawn()
+                with self._pending_lock:
+                    self._workers[i] = replacement
+                    lost = list(worker["in_flight"])
+            else:
+                # It never loaded its model; restarting would only fail again
+                print(f"[WARNING] {error} before it was ready, not restarting it.")
+                with self._pending_lock:
+                    worker["retired"] = True
+                    lost = list(worker["in_flight"])
+            worker["results"].close()
+            for task_id in lost:
+                future = self._finish(task_id)
+                if future is not None:
+                    self.stats["errors"] += 1
+                    future.set_exception(error)
+
+    def _drain(self, worker):
+        """Handle every message waiting on a worker's result pipe."""
+        try:
+            while worker["results"].poll():
+                self._handle(worker, worker["results"].recv())
+        except (EOFError, OSError):
+            # Closed, or cut off mid-message by a crash
+            pass
+
+    def _handle(self, worker, message):
+        if message[0] in ("ready", "failed"):
+            # A replacement worker finished (or failed) loading its model
+            if message[0] == "ready":
+                worker["ready"] = True
+            else:
+                print(f"[WARNING] Vision worker {message[1]} failed to start: {message[2]}")
+            return
+        task_id, _, payload = message
+        future = self._finish(task_id)
+        if future is None:
+            return
+        if isinstance(payload, Exception):
+            self.stats["errors"] += 1
+            future.set_exception(payload)
+            return
+        context = decode_context(payload)
+        if self.cache and future.cache_key is not None:
+            self.cache.put(future.cache_key, context)
+        self.stats["completed"] += 1
+        future.set_result(context)
+
+    def _collect(self):
+        while not self._closing:
+            workers = [w for w in self._workers if not w["retired"]]
+            # Result pipes and process sentinels: a crash wakes this up like a result does
+            ready = wait([w["results"] for w in workers] + [w["proc"].sentinel for w in workers],
+                         timeout=self.health_interval)
+            for worker in workers:
+                if worker["results"] in ready:
+                    self._drain(worker)
+            self._check_workers()
+
+    def analyze_frame(self, image_path, camera_id=None, timeout=30.0):
+        """Blocking VisionModule.analyze_frame equivalent."""
+        return self.submit(image_path, camera_id).result(timeout)
+
+    def analyze_frames(self, frames, timeout=30.0):
+        """
+        frames: {camera_id: path or array} or a list; frames are spread over
+        the workers and gathered in the same shape.
+        """
+        if isinstance(frames, dict):
+            futures = {cam: self.submit(frame, cam) for cam, frame in frames.items()}
+            return {cam: f.result(timeout) for cam, f in futures.items()}
+        return [f.result(timeout) for f in [self.submit(frame) for frame in frames]]
+
+
+def start_pool(**kwargs):
+    """VisionPool(**kwargs), started (a LazyComponent factory)."""
+    return VisionPool(**kwargs).start()
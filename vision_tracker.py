@@ -0,0 +1,251 @@
+# vision_tracker.py
+"""
+Lightweight multi-object tracking on top of VisionModule.
+
+Detections are associated to tracks by IoU (falling back to centroid distance
+for small/fast objects), and each track carries a constant-velocity
+alpha-beta filter (a fixed-gain Kalman predictor) so its box can be predicted
+on frames where detection is skipped.
+
+TrackedVision runs full detection only every ``detect_every`` frames, or
+sooner when the track set is unstable (births/deaths or a track leaving the
+frame). Relations carry stable track ids and a dwell time, so "person near
+oven" no longer flickers between frames.
+"""
+
+import itertools
+import time
+
+import cv2
+import numpy as np
+
+from vision_module import NEAR_THRESH, near_pairs
+
+
+def iou_matrix(a, b):
+    """Pairwise IoU between (N, 4) and (M, 4) x1,y1,x2,y2 boxes."""
+    a = np.asarray(a, dtype=np.float64).reshape(-1, 4)
+    b = np.asarray(b, dtype=np.float64).reshape(-1, 4)
+    x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    union = area_a[:, None] + area_b[None, :] - inter
+    return np.where(union > 0, inter / np.maximum(union, 1e-9), 0.0)
+
+
+class Track:
+    """One tracked object: state (cx, cy, w, h) plus center velocity."""
+
+    def __init__(self, track_id, label, bbox, confidence, timestamp, alpha=0.6, beta=0.2):
+        self.id = track_id
+        self.label = label
+        self.confidence = confidence
+        self.alpha = alpha
+        self.beta = beta
+        x1, y1, x2, y2 = bbox
+        self.state = np.array([(x1 + x2) / 2.0, (y1 + y2) / 2.0, x2 - x1, y2 - y1])
+        self.velocity = np.zeros(2)
+        self.first_seen = timestamp
+        self.last_update = timestamp
+        self.last_predict = timestamp
+        self.misses = 0
+
+    @property
+    def bbox(self):
+        cx, cy, w, h = self.state
+        return (cx - w / 2.0, cy - h / 2.0, cx + w / 2.0, cy + h / 2.0)
+
+    def predict(self, timestamp):
+        dt = timestamp - self.last_predict
+        if dt > 0:
+            self.state[:2] += self.velocity * dt
+            self.last_predict = timestamp
+        return self.bbox
+
+    def update(self, bbox, confidence, timestamp):
+        x1, y1, x2, y2 = bbox
+        measured = np.array([(x1 + x2) / 2.0, (y1 + y2) / 2.0, x2 - x1, y2 - y1])
+        self.predict(timestamp)
+        residual = measured - self.state
+        self.state += self.alpha * residual
+        dt = timestamp - self.last_update
+        if dt > 0:
+            self.velocity += self.beta * residual[:2] / dt
+        self.confidence = confidence
+        self.last_update = timestamp
+        self.misses = 0
+
+
+class IoUTracker:
+    """
+    Greedy per-label association by IoU, then by centroid distance.
+
+    iou_thresh: minimum IoU to match a detection to a track
+    max_center_dist: centroid fallback gate (pixels) for unmatched pairs
+    max_misses: detection rounds a track survives without a match
+    """
+
+    def __init__(self, iou_thresh=0.3, max_center_dist=80.0, max_misses=2):
+        self.iou_thresh = iou_thresh
+        self.max_center_dist = max_center_dist
+        self.max_misses = max_misses
+        self.tracks = []
+        self.unstable = True
+        # Per tracker, so each camera's ids start at 1 and don't depend on other cameras
+        self._next_id = itertools.count(1)
+
+    def predict(self, timestamp):
+        for track in self.tracks:
+            track.predict(timestamp)
+
+    def update(self, detections, timestamp):
+        """Associate detections (analyze_frame schema) and return the live tracks."""
+        self.predict(timestamp)
+        unmatched_dets = set(range(len(detections)))
+        unmatched_tracks = set(range(len(self.tracks)))
+
+        if detections and self.tracks:
+            det_boxes = [d["bbox"] for d in detections]
+            track_boxes = [t.bbox for t in self.tracks]
+            ious = iou_matrix(track_boxes, det_boxes)
+            det_centers = np.array([((b[0] + b[2]) / 2, (b[1] + b[3]) / 2) for b in det_boxes])
+            track_centers = np.array([t.state[:2] for t in self.tracks])
+            dists = np.linalg.norm(track_centers[:, None, :] - det_centers[None, :, :], axis=2)
+
+            same_label = np.array([[t.label == d["label"] for d in detections] for t in self.tracks])
+            # Rank candidate pairs: IoU matches first (best IoU), then nearest centroids
+            candidates = []
+            for ti, di in zip(*np.nonzero(same_label)):
+                if ious[ti, di] >= self.iou_thresh:
+                    candidates.append((0, -ious[ti, di], ti, di))
+                elif dists[ti, di] <= self.max_center_dist:
+                    candidates.append((1, dists[ti, di], ti, di))
+            for _, _, ti, di in sorted(candidates):
+                if ti in unmatched_tracks and di in unmatched_dets:
+                    det = detections[di]
+                    self.tracks[ti].update(det["bbox"], det["confidence"], timestamp)
+                    unmatched_tracks.discard(ti)
+                    unmatched_dets.discard(di)
+
+        for ti in unmatched_tracks:
+            self.tracks[ti].misses += 1
+        lost = [t for t in self.tracks if t.misses > self.max_misses]
+        self.tracks = [t for t in self.tracks if t.misses <= self.max_misses]
+
+        for di in sorted(unmatched_dets):
+            det = detections[di]
+            self.tracks.append(Track(next(self._next_id), det["label"], det["bbox"], det["confidence"], timestamp))
+
+        self.unstable = bool(unmatched_dets or unmatched_tracks or lost)
+        return self.tracks
+
+
+class TrackedVision:
+    """
+    Run VisionModule every ``detect_every`` frames and track in between.
+
+    analyze(frame) returns the analyze_frame schema, with detections carrying
+    "track_id" and relations carrying "subject_id", "object_id" and "dwell"
+    (seconds the pair has been near), plus "inferred": whether YOLO ran.
+    min_dwell: only report relations that have held for at least this long.
+    camera_id: passed to analyze_frame; if the camera has zones, relations are
+    its zone relations (with "zone"/"room", no object_id) for the tracked persons.
+    """
+
+    def __init__(self, vision, detect_every=5, min_dwell=0.0, near_thresh=NEAR_THRESH, tracker=None,
+                 camera_id=None):
+        self.vision = vision
+        self.camera_id = camera_id
+        self.zones = getattr(vision, "zones", {}).get(camera_id)
+        self.detect_every = detect_every
+        self.min_dwell = min_dwell
+        self.near_thresh = near_thresh
+        self.tracker = tracker or IoUTracker()
+        self.frames_since_detect = None
+        self.frame_size = None
+        self._near_since = {}
+        self.stats = {"frames": 0, "inferred": 0}
+
+    def _needs_detection(self):
+        if self.frames_since_detect is None or self.frames_since_detect + 1 >= self.detect_every:
+            return True
+        if self.tracker.unstable:
+            return True
+        if self.frame_size is not None:
+            width, height = self.frame_size
+            for track in self.tracker.tracks:
+                x1, y1, x2, y2 = track.bbox
+                if x2 < 0 or y2 < 0 or x1 > width or y1 > height:
+                    return True
+        return False
+
+    def analyze(self, frame, timestamp=None):
+        timestamp = time.time() if timestamp is None else timestamp
+        if isinstance(frame, np.ndarray):
+            self.frame_size = (frame.shape[1], frame.shape[0])
+        elif self.zones is not None and self.frame_size is None:
+            # Zone polygons are normalized, so the camera's resolution is needed once
+            image = cv2.imread(str(frame))
+            if image is not None:
+                self.frame_size = (image.shape[1], image.shape[0])
+        self.stats["frames"] += 1
+
+        inferred = self._needs_detection()
+        if inferred:
+            context = self.vision.analyze_frame(frame, camera_id=self.camera_id)
+            self.tracker.update(context.get("detections", []), timestamp)
+            self.frames_since_detect = 0
+            self.stats["inferred"] += 1
+        else:
+            self.tracker.predict(timestamp)
+            self.frames_since_detect += 1
+
+        tracks = self.tracker.tracks
+        detections = [
+            {"label": t.label, "confidence": t.confidence, "bbox": t.bbox, "track_id": t.id}
+            for t in tracks
+        ]
+        return {
+            "detections": detections,
+            "relations": self._relations(tracks, timestamp),
+            "inferred": inferred,
+        }
+
+    def _pairs(self, tracks):
+        """(relation key, relation fields) for the current tracked boxes."""
+        if not tracks:
+            return []
+        labels = np.array([t.label for t in tracks], dtype=object)
+        boxes = np.array([t.bbox for t in tracks], dtype=np.float64)
+        if self.zones is not None and self.frame_size is not None:
+            return [
+                ((tracks[p].id, zone["name"]), {
+                    "object": zone["object"], "zone": zone["name"], "room": zone["room"],
+                    "distance": 0.0, "subject_id": tracks[p].id, "object_id": None,
+                })
+                for zone, p in self.zones.zone_pairs(labels, boxes, *self.frame_size)
+            ]
+        return [
+            ((tracks[p].id, obj_name, tracks[o].id), {
+                "object": obj_name, "distance": dist,
+                "subject_id": tracks[p].id, "object_id": tracks[o].id,
+            })
+            for obj_name, p, o, dist in near_pairs(labels, boxes, self.near_thresh)
+        ]
+
+    def _relations(self, tracks, timestamp):
+        near_since = {}
+        relations = []
+        for key, fields in self._pairs(tracks):
+            since = self._near_since.get(key, timestamp)
+            near_since[key] = since
+            dwell = timestamp - since
+            if dwell < self.min_dwell:
+                continue
+            relations.append({"subject": "person", "relation": "near", **fields, "dwell": dwell})
+        self._near_since = near_since
+        return relations
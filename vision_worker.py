@@ -0,0 +1,118 @@
+# vision_worker.py
+"""
+Background vision worker.
+
+Keeps a fresh image_context per camera on a daemon thread so the command loop
+reads the latest scene without waiting on YOLO. A context older than
+``max_age`` seconds is refreshed synchronously on read, so commands never act
+on a scene that is too stale.
+"""
+
+import threading
+import time
+
+
+class VisionWorker:
+    def __init__(self, vision, cameras, interval=1.0, max_age=5.0, events=None, record_every=60.0):
+        """
+        vision: VisionModule or VisionPool (or a LazyComponent wrapping either)
+        cameras: {camera_id: frame path} - e.g. {"living_room": "frames/latest.jpg"}
+        interval: seconds between background refresh rounds
+        max_age: contexts older than this are refreshed synchronously on read
+        events: optional EventStore refreshed contexts are appended to - only
+            when the scene changed, or every record_every seconds while it hasn't
+        """
+        self.vision = vision
+        self.cameras = dict(cameras)
+        self.interval = interval
+        self.max_age = max_age
+        self.events = events
+        self.record_every = record_every
+        self._recorded = {}
+
+        self._contexts = {}
+        self._lock = threading.Lock()
+        # One inference at a time: the model is shared with synchronous refreshes
+        self._infer_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.last_errors = {}
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="vision-worker", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            for camera_id in list(self.cameras):
+                if self._stop.is_set():
+                    break
+                try:
+                    self.refresh(camera_id)
+                except Exception as e:
+                    # Keep the last good context; readers fall back to a sync refresh
+                    self.last_errors[camera_id] = str(e)
+            self._stop.wait(self.interval)
+
+    def analyze(self, frame, camera_id=None):
+        """
+        One-off analysis of any frame (e.g. a per-command override), serialized
+        with the worker's own inference on the shared model.
+        """
+        with self._infer_lock:
+            return self.vision.analyze_frame(frame, camera_id=camera_id)
+
+    def refresh(self, camera_id):
+        """Analyze the camera's current frame now and store the result."""
+        context = dict(self.analyze(self.cameras[camera_id], camera_id=camera_id))
+        context["camera"] = camera_id
+        context["timestamp"] = time.time()
+        with self._lock:
+            self._contexts[camera_id] = context
+        if self.events is not None:
+            self._record(camera_id, context)
+        self.last_errors.pop(camera_id, None)
+        return context
+
+    def _record(self, camera_id, context):
+        """
+        Append to the event store when the scene changed. Cache hits and a
+        person standing still repeat the same scene every refresh; those are
+        written once per record_every so counts and the store stay meaningful.
+        """
+        scene = (
+            frozenset((r.get("subject"), r.get("relation"), r.get("object"), r.get("room"))
+                      for r in context.get("relations", [])),
+            tuple(sorted(d.get("label") for d in context.get("detections", []))),
+        )
+        last = self._recorded.get(camera_id)
+        if last is not None and last[0] == scene and context["timestamp"] - last[1] < self.record_every:
+            return
+        self._recorded[camera_id] = (scene, context["timestamp"])
+        self.events.record(camera_id, context)
+
+    def context_age(self, camera_id):
+        with self._lock:
+            context = self._contexts.get(camera_id)
+        return None if context is None else time.time() - context["timestamp"]
+
+    def get_context(self, camera_id, max_age=None):
+        """
+        Latest image_context for a camera, without waiting on inference unless
+        it is missing or older than max_age (default: the worker's max_age).
+        Errors from a synchronous refresh propagate to the caller.
+        """
+        max_age = self.max_age if max_age is None else max_age
+        with self._lock:
+            context = self._contexts.get(camera_id)
+        if context is not None and time.time() - context["timestamp"] <= max_age:
+            return context
+        return self.refresh(camera_id)
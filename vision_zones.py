@@ -0,0 +1,159 @@
+# vision_zones.py
+"""
+Per-camera zone configuration (regions of interest).
+
+The safety rules only care about a few areas of each camera view - the stove,
+the front door, the sofa/TV corner. camera_zones.json lists them per camera as
+polygons in normalized image coordinates (0-1, so they survive resolution
+changes), each labeled with the room it belongs to and the relation object it
+stands for. Zoning is opt-in: copy camera_zones.example.json and draw the
+polygons for your own cameras; without the file every frame is analyzed whole.
+
+    {
+      "default": {
+        "padding": 0.05,
+        "zones": [
+          {"name": "stove_area", "room": "kitchen", "object": "oven",
+           "polygon": [[0.0, 0.35], [0.3, 0.35], [0.3, 1.0], [0.0, 1.0]]}
+        ]
+      }
+    }
+
+VisionModule crops each frame to the zones' bounding rectangles before
+inference, and a person standing inside a zone (bottom-center of the box)
+yields a room-level relation:
+
+    {"subject": "person", "relation": "near", "object": "oven",
+     "zone": "stove_area", "room": "kitchen", "distance": 0.0}
+"""
+
+import json
+import os
+
+import numpy as np
+
+DEFAULT_ZONES_PATH = "camera_zones.json"
+
+
+def points_in_polygon(points, polygon):
+    """Boolean mask of (N, 2) points inside a (K, 2) polygon (even-odd rule)."""
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    polygon = np.asarray(polygon, dtype=np.float64)
+    x, y = points[:, 0:1], points[:, 1:2]
+    x1, y1 = polygon[:, 0], polygon[:, 1]
+    x2, y2 = np.roll(x1, -1), np.roll(y1, -1)
+    # Edges straddling each point's horizontal ray, crossed to the right of the point
+    straddles = (y1 > y) != (y2 > y)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cross_x = x1 + (y - y1) * (x2 - x1) / (y2 - y1)
+    crossings = straddles & (x < cross_x)
+    return crossings.sum(axis=1) % 2 == 1
+
+
+def merge_rects(rects):
+    """Merge overlapping (x1, y1, x2, y2) rectangles so no pixel is inferred twice."""
+    rects = [list(r) for r in rects]
+    merged = True
+    while merged:
+        merged = False
+        out = []
+        for r in rects:
+            for m in out:
+                if r[0] < m[2] and m[0] < r[2] and r[1] < m[3] and m[1] < r[3]:
+                    m[:] = [min(r[0], m[0]), min(r[1], m[1]), max(r[2], m[2]), max(r[3], m[3])]
+                    merged = True
+                    break
+            else:
+                out.append(r)
+        rects = out
+    return [tuple(r) for r in rects]
+
+
+class CameraZones:
+    def __init__(self, zones, padding=0.05):
+        """
+        zones: [{"name", "room", "object", "polygon": [[x, y], ...]}] in 0-1 coordinates
+        padding: fraction of the frame added around each zone when cropping,
+                 so people standing at the zone edge are still fully visible
+        """
+        self.zones = []
+        for zone in zones:
+            polygon = np.asarray(zone["polygon"], dtype=np.float64)
+            if polygon.ndim != 2 or polygon.shape[1] != 2 or len(polygon) < 3:
+                raise ValueError(f"Zone {zone.get('name')!r} needs a polygon of at least 3 [x, y] points")
+            self.zones.append({
+                "name": zone["name"],
+                "room": zone["room"],
+                "object": zone.get("object", zone["name"]),
+                "polygon": polygon,
+            })
+        self.padding = padding
+
+    def crop_rects(self, width, height):
+        """Pixel rectangles to run inference on (padded zone bounds, merged)."""
+        rects = []
+        for zone in self.zones:
+            poly = zone["polygon"]
+            x1, y1 = poly.min(axis=0) - self.padding
+            x2, y2 = poly.max(axis=0) + self.padding
+            rects.append((
+                int(max(0.0, x1) * width), int(max(0.0, y1) * height),
+                int(np.ceil(min(1.0, x2) * width)), int(np.ceil(min(1.0, y2) * height)),
+            ))
+        return merge_rects(rects)
+
+    def crop_fraction(self, width, height):
+        """Share of frame pixels that still goes through inference."""
+        area = sum((x2 - x1) * (y2 - y1) for x1, y1, x2, y2 in self.crop_rects(width, height))
+        return area / float(width * height)
+
+    def zone_pairs(self, labels, boxes, width, height):
+        """(zone, person index) for every person standing inside a zone."""
+        labels = np.asarray(labels, dtype=object)
+        boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+        person_idx = np.flatnonzero(labels == "person")
+        if len(person_idx) == 0:
+            return []
+        # Feet position (bottom-center), normalized like the polygons
+        feet = np.column_stack([
+            (boxes[person_idx, 0] + boxes[person_idx, 2]) / 2.0 / width,
+            boxes[person_idx, 3] / height,
+        ])
+
+        return [
+            (zone, int(person_idx[i]))
+            for zone in self.zones
+            for i in np.flatnonzero(points_in_polygon(feet, zone["polygon"]))
+        ]
+
+    def relations(self, labels, boxes, width, height):
+        """Room-level 'near' relations for persons standing inside a zone."""
+        return [
+            {
+                "subject": "person",
+                "relation": "near",
+                "object": zone["object"],
+                "zone": zone["name"],
+                "room": zone["room"],
+                "distance": 0.0,
+            }
+            for zone, _ in self.zone_pairs(labels, boxes, width, height)
+        ]
+
+
+def load_zones(path=DEFAULT_ZONES_PATH):
+    """{camera_id: CameraZones} from a zones file; {} if there is none."""
+    if not path or not os.path.exists(path):
+        print(f"[INFO] No zone config at {path}, analyzing full frames.")
+        return {}
+    try:
+        with open(path, "r") as f:
+            config = json.load(f)
+    except json.JSONDecodeError:
+        print(f"[WARNING] Could not parse {path}, analyzing full frames.")
+        return {}
+    return {
+        camera_id: CameraZones(cam.get("zones", []), cam.get("padding", 0.05))
+        for camera_id, cam in config.items()
+        if cam.get("zones")
+    }